@@ -0,0 +1,97 @@
+"""
+Load test of `/llm/signposting-alix` against a stubbed Gemini model, comparing request throughput before and after
+the routes became async.
+
+"sync" reproduces the previous handler: a `def` route making blocking model calls, which FastAPI runs on its
+threadpool (40 threads per worker by default). "async" is the app's current route with the model awaited on the
+event loop. Both are driven in-process through `httpx.ASGITransport` with the same stubbed latency, so the difference
+is only in how many slow calls one worker can hold in flight. The async route looks up the pre-generated store first,
+as it does in production with `SIGNPOSTING_STORE_ENABLED`; the store is an empty mongomock collection, so every lookup
+misses and the options are described live.
+
+Usage (from the ai_api directory):
+    python -m benchmarks.async_load --requests 400 --concurrency 200 --latency 0.5
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from .fakes import install_fake_clients
+
+install_fake_clients()
+import httpx  # noqa: E402
+import mongomock  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from src.main import app  # noqa: E402
+from src.routes import llm  # noqa: E402
+from src.models.SignpostingRequest import SignpostingRequest  # noqa: E402
+from src.services.ServiceRegistry import registry, get_signposting_service  # noqa: E402
+from src.services.SignpostingStoreService import SignpostingStore  # noqa: E402
+from .signposting_fanout import StubGenerativeModel, StubVertexAI_Service, make_option, percentile  # noqa: E402
+
+
+def create_sync_app(service):
+    sync_app=FastAPI()
+
+    @sync_app.post("/llm/signposting-alix")
+    def create_signposting_messages(request_body: SignpostingRequest):
+        options=[option.model_dump(by_alias=True) for option in request_body.options]
+        messages=[]
+        for option in options:
+            prompt=service.create_signposting_prompt(option, request_body.category)
+            description=service.get_model_response(prompt, service.SIGNPOSTING_GENERATION_CONFIG)
+            messages.append(service.create_signposting_message(option, description))
+        return {"message": "success", "data":messages}
+    return sync_app
+
+
+def create_async_app(service):
+    app.dependency_overrides[get_signposting_service]=lambda: service
+    registry.signposting_store=SignpostingStore(mongomock.MongoClient().db["signposting_messages"])
+    llm.signposting_store_enabled=True
+    return app
+
+
+async def drive(asgi_app, request_count, concurrency, payload):
+    semaphore=asyncio.Semaphore(concurrency)
+    latencies=[]
+    transport=httpx.ASGITransport(app=asgi_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        async def send():
+            async with semaphore:
+                start=time.perf_counter()
+                response=await client.post("/llm/signposting-alix", json=payload)
+                latencies.append(time.perf_counter()-start)
+                assert response.json()["message"]=="success"
+        start=time.perf_counter()
+        await asyncio.gather(*(send() for _ in range(request_count)))
+        elapsed=time.perf_counter()-start
+    return elapsed, latencies
+
+
+def main():
+    parser=argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--options", type=int, default=1, help="signposting options per request")
+    parser.add_argument("--latency", type=float, default=0.5, help="mean stubbed model latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.05, help="standard deviation of the stubbed latency")
+    args=parser.parse_args()
+    logging.disable(logging.ERROR)
+
+    stub_model=StubGenerativeModel(args.latency, args.jitter, 0.0)
+    service=StubVertexAI_Service(stub_model, max_concurrency=8)
+    payload={"options":[make_option(i) for i in range(args.options)], "language":"en", "category":"benchmark"}
+    apps={"sync": create_sync_app(service), "async": create_async_app(service)}
+    print(f"{'mode':<8}{'requests':>10}{'conc.':>7}{'req/s':>9}{'p50 (s)':>10}{'p99 (s)':>10}{'mean (s)':>10}")
+    for name, asgi_app in apps.items():
+        elapsed, latencies=asyncio.run(drive(asgi_app, args.requests, args.concurrency, payload))
+        print(
+            f"{name:<8}{args.requests:>10}{args.concurrency:>7}{args.requests/elapsed:>9.1f}"
+            f"{percentile(latencies, 50):>10.3f}{percentile(latencies, 99):>10.3f}{statistics.mean(latencies):>10.3f}"
+        )
+
+
+if __name__=="__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Wall-clock benchmark of chunked transcription against single-shot recognition, over synthetic voice notes.
+
+Each clip is 16 kHz mono WAV made of noise "utterances" of 1-8 s separated by 0.3-1.2 s pauses. Speech-to-Text is
+stubbed with a latency of `--base-latency` plus `--real-time-factor` seconds per second of audio, so a single-shot
+recognition of the whole clip (what `long_running_recognize` does for clips over a minute) waits on its full length,
+while the chunked path waits on roughly its longest segment per concurrency slot. The stub reports one word per
+second of audio, so the stitched word offsets are checked against the clip's timeline.
+
+Usage (from the ai_api directory):
+    python -m benchmarks.chunked_transcription --lengths 60,180,300,600 --segment-concurrency 4
+"""
+import argparse
+import asyncio
+import contextlib
+import datetime
+import io
+import logging
+import random
+import time
+import numpy as np
+from .fakes import install_fake_clients
+
+install_fake_clients()
+from google.cloud import speech  # noqa: E402
+from src.services import SpeechToTextService as speech_to_text_module  # noqa: E402
+from src.services.AudioProbeService import AudioProbeService  # noqa: E402
+from src.services.AudioSegmentService import AudioSegmentService  # noqa: E402
+
+SAMPLE_RATE=16000
+
+
+def create_synthetic_voice_note(seconds, seed=0):
+    generator=np.random.default_rng(seed)
+    samples=[]
+    total=0
+    while total<seconds*SAMPLE_RATE:
+        utterance=int(generator.uniform(1, 8)*SAMPLE_RATE)
+        pause=int(generator.uniform(0.3, 1.2)*SAMPLE_RATE)
+        samples.append((generator.normal(0, 6000, utterance)).clip(-32768, 32767).astype(np.int16))
+        samples.append((generator.normal(0, 30, pause)).astype(np.int16))
+        total+=utterance+pause
+    return AudioSegmentService.encode_wav(np.concatenate(samples)[:seconds*SAMPLE_RATE], SAMPLE_RATE)
+
+
+class StubSpeechAsyncClient:
+    """
+    Stands in for `SpeechAsyncClient`, taking longer the more audio it is given.
+    """
+    def __init__(self, base_latency, real_time_factor):
+        self.base_latency=base_latency
+        self.real_time_factor=real_time_factor
+        self.calls=0
+
+    async def recognize(self, config, audio):
+        self.calls+=1
+        duration=AudioProbeService.probe(audio.content)["duration_seconds"]
+        await asyncio.sleep(self.base_latency+duration*self.real_time_factor*random.uniform(0.9, 1.1))
+        words=[
+            speech.WordInfo(word=f"w{second}", start_time=datetime.timedelta(seconds=second), end_time=datetime.timedelta(seconds=second+0.5))
+            for second in range(int(duration))
+        ]
+        alternative=speech.SpeechRecognitionAlternative(transcript=" ".join(word.word for word in words), confidence=0.9, words=words)
+        return speech.RecognizeResponse(results=[speech.SpeechRecognitionResult(alternatives=[alternative], language_code="en-us")])
+
+
+async def run_single_shot(service, audio_content, audio_format):
+    config=service.create_recognition_config(audio_format)
+    return await service.transcribe_audio_async(None, audio_content, config)
+
+
+async def run_chunked(service, audio_content, audio_format):
+    first_partial=None
+    start=time.perf_counter()
+
+    async def on_progress(partial_result, segment_count):
+        nonlocal first_partial
+        if first_partial is None:
+            first_partial=time.perf_counter()-start
+    result=await service.transcribe_chunked_async(audio_content, audio_format, on_progress=on_progress)
+    return result, first_partial
+
+
+def main():
+    parser=argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lengths", default="60,180,300,600", help="comma-separated clip lengths in seconds")
+    parser.add_argument("--base-latency", type=float, default=0.5, help="stubbed per-call recognition latency in seconds")
+    parser.add_argument("--real-time-factor", type=float, default=0.25, help="stubbed recognition seconds per second of audio")
+    parser.add_argument("--segment-concurrency", type=int, default=4)
+    args=parser.parse_args()
+    logging.disable(logging.WARNING)
+    speech_to_text_module.transcription_segment_concurrency=args.segment_concurrency
+    client=StubSpeechAsyncClient(args.base_latency, args.real_time_factor)
+    service=speech_to_text_module.SpeechToTextService(cache=None)
+    service.async_transcribe_client=client
+
+    print(f"{'length (s)':>10}{'segments':>10}{'split (s)':>11}{'single (s)':>12}{'chunked (s)':>13}{'first partial (s)':>19}{'speedup':>9}{'offsets ok':>12}")
+    for seconds in [int(length) for length in args.lengths.split(",")]:
+        audio_content=create_synthetic_voice_note(seconds)
+        audio_format=AudioProbeService.probe(audio_content)
+        samples, sample_rate=AudioSegmentService.read_wav_samples(audio_content)
+        start=time.perf_counter()
+        AudioSegmentService.split_samples(samples, sample_rate)
+        split_seconds=time.perf_counter()-start
+
+        # The service prints every recognition response; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            start=time.perf_counter()
+            asyncio.run(run_single_shot(service, audio_content, audio_format))
+            single_seconds=time.perf_counter()-start
+
+            start=time.perf_counter()
+            result, first_partial=asyncio.run(run_chunked(service, audio_content, audio_format))
+            chunked_seconds=time.perf_counter()-start
+
+        offsets=[word["startSeconds"] for word in result["words"]]
+        offsets_ok=offsets==sorted(offsets) and offsets[-1]<=seconds
+        print(f"{seconds:>10}{result['segmentCount']:>10}{split_seconds:>11.3f}{single_seconds:>12.2f}{chunked_seconds:>13.2f}{first_partial:>19.2f}{single_seconds/chunked_seconds:>8.1f}x{str(offsets_ok):>12}")
+
+
+if __name__=="__main__":
+    main()
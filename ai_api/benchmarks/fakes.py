@@ -0,0 +1,353 @@
+"""
+Credential-free stand-ins for the SDK clients created at import time in `src.config`, so benchmarks can import the
+services offline. Call `install_fake_clients()` before importing anything from `src`: it swaps the SDK client
+constructors, so the config modules keep their real settings but build fakes.
+
+`install_fake_backends()` goes further for the load suite: Gemini, the OpenAI assistants API, Speech-to-Text and the
+Twilio media download are replaced too, each with injected latency and error rate from `FAKE_BACKENDS`, and MongoDB
+with mongomock unless a real server is used.
+"""
+import asyncio
+import io
+import os
+import random
+import re
+import struct
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+
+class FakeBackend:
+    """
+    Latency and failure profile of one fake backend.
+
+    Attributes:
+        latency (float): Mean latency of a call in seconds.
+        jitter (float): Standard deviation of the latency.
+        error_rate (float): Probability that a call raises.
+    """
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0):
+        self.latency=latency
+        self.jitter=jitter
+        self.error_rate=error_rate
+        self.lock=threading.Lock()
+        self.calls=0
+        self.errors=0
+
+    def sample_latency(self):
+        return max(0.0, random.gauss(self.latency, self.jitter)) if self.jitter else self.latency
+
+    def maybe_fail(self, name):
+        with self.lock:
+            self.calls+=1
+            failed=random.random()<self.error_rate
+            if failed:
+                self.errors+=1
+        if failed:
+            raise RuntimeError(f"injected {name} error")
+
+    def wait(self, name):
+        time.sleep(self.sample_latency())
+        self.maybe_fail(name)
+
+    async def wait_async(self, name):
+        await asyncio.sleep(self.sample_latency())
+        self.maybe_fail(name)
+
+
+FAKE_BACKENDS={
+    "vertexai": FakeBackend(),
+    "openai": FakeBackend(),
+    "translate": FakeBackend(),
+    "speech": FakeBackend(),
+    "gcs": FakeBackend(),
+    "twilio": FakeBackend(),
+}
+FAKE_AUDIO_BYTES=64*1024
+FAKE_DESCRIPTION="Stub Organisation offers support. It is a stubbed description."
+FAKE_ANSWER="Enham Trust supports disabled people to live independently. Contact the team for more details."
+FAKE_TRANSCRIPT="this is a stubbed voice note"
+fake_blob_names=set()
+fake_blob_contents={}
+
+
+def configure_fake_backends(latencies=None, error_rates=None, jitter_ratio=0.1, audio_bytes=None):
+    """
+    Set the profile of each fake backend.
+
+    Args:
+        latencies (dict[str, float], optional): Mean latency per backend name.
+        error_rates (dict[str, float], optional): Error rate per backend name.
+        jitter_ratio (float): Latency standard deviation as a fraction of the mean.
+        audio_bytes (int, optional): Size of the fake Twilio voice notes.
+    """
+    global FAKE_AUDIO_BYTES
+    for name, latency in (latencies or {}).items():
+        FAKE_BACKENDS[name].latency=latency
+        FAKE_BACKENDS[name].jitter=latency*jitter_ratio
+    for name, error_rate in (error_rates or {}).items():
+        FAKE_BACKENDS[name].error_rate=error_rate
+    if audio_bytes is not None:
+        FAKE_AUDIO_BYTES=audio_bytes
+
+
+class FakeTranslateClient:
+    def translate(self, values, target_language=None):
+        FAKE_BACKENDS["translate"].wait("translate")
+        if isinstance(values, str):
+            return {"translatedText": f"[{target_language}] {values}"}
+        return [{"translatedText": f"[{target_language}] {value}"} for value in values]
+
+
+class FakeBlobWriter(io.RawIOBase):
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            FAKE_BACKENDS["gcs"].wait("gcs")
+        super().close()
+
+
+class FakeBlob:
+    def __init__(self, name):
+        self.name=name
+
+    def exists(self):
+        return self.name in fake_blob_names
+
+    def upload_from_string(self, data, content_type=None):
+        FAKE_BACKENDS["gcs"].wait("gcs")
+        fake_blob_names.add(self.name)
+        fake_blob_contents[self.name]=data
+
+    def download_as_bytes(self):
+        FAKE_BACKENDS["gcs"].wait("gcs")
+        return fake_blob_contents.get(self.name, b"")
+
+    def open(self, mode="wb", chunk_size=None, **kwargs):
+        fake_blob_names.add(self.name)
+        return FakeBlobWriter()
+
+
+class FakeBucket:
+    def __init__(self, name):
+        self.name=name
+
+    def blob(self, name, **kwargs):
+        return FakeBlob(name)
+
+
+class FakeStorageClient:
+    def bucket(self, name):
+        return FakeBucket(name)
+
+
+class FakeGenerativeModel:
+    """
+    Stands in for `GenerativeModel`. Plain prompts get a fixed description; function-calling prompts get one
+    description per `"index"` found in the prompt, shaped like a Gemini function call.
+    """
+    def __init__(self, model_name=None, **kwargs):
+        self.model_name=model_name
+
+    @staticmethod
+    def create_response(contents, tools):
+        if not tools:
+            return SimpleNamespace(text=FAKE_DESCRIPTION)
+        prompt_text=contents.parts[0].text if hasattr(contents, "parts") else str(contents)
+        indices=[int(index) for index in re.findall(r'"index": ?(\d+)', prompt_text)]
+        function_call={"function_call": {"name": "record_signposting_descriptions", "args": {
+            "descriptions": [{"index": index, "description": FAKE_DESCRIPTION} for index in indices]
+        }}}
+        part=SimpleNamespace(to_dict=lambda: function_call)
+        return SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))])
+
+    def generate_content(self, contents, generation_config=None, tools=None, tool_config=None):
+        FAKE_BACKENDS["vertexai"].wait("vertexai")
+        return self.create_response(contents, tools)
+
+    async def generate_content_async(self, contents, generation_config=None, tools=None, tool_config=None):
+        await FAKE_BACKENDS["vertexai"].wait_async("vertexai")
+        return self.create_response(contents, tools)
+
+
+class FakeAssistantStream:
+    """
+    Async iterator of assistant run events, emitted the way `AsyncAssistantEventHandler` yields them.
+    """
+    def __init__(self):
+        self.events=None
+
+    async def __aenter__(self):
+        self.events=self.generate_events()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def __aiter__(self):
+        return self.events
+
+    async def generate_events(self):
+        run_id=f"run_{uuid.uuid4().hex}"
+        yield SimpleNamespace(event="thread.run.created", data=SimpleNamespace(id=run_id))
+        await FAKE_BACKENDS["openai"].wait_async("openai")
+        for word in FAKE_ANSWER.split(" "):
+            text=SimpleNamespace(value=f"{word} ")
+            delta=SimpleNamespace(content=[SimpleNamespace(type="text", text=text)])
+            yield SimpleNamespace(event="thread.message.delta", data=SimpleNamespace(delta=delta))
+        yield SimpleNamespace(event="thread.run.completed", data=SimpleNamespace(id=run_id, status="completed", last_error=None))
+
+
+class FakeAsyncRuns:
+    def stream(self, thread_id, assistant_id, **kwargs):
+        return FakeAssistantStream()
+
+    async def cancel(self, run_id, thread_id):
+        pass
+
+
+class FakeAsyncMessages:
+    async def create(self, thread_id, role, content):
+        pass
+
+
+class FakeAsyncThreads:
+    def __init__(self):
+        self.runs=FakeAsyncRuns()
+        self.messages=FakeAsyncMessages()
+
+    async def create(self, messages=None):
+        return SimpleNamespace(id=f"thread_{uuid.uuid4().hex}")
+
+
+class FakeAsyncOpenAI:
+    def __init__(self, **kwargs):
+        self.beta=SimpleNamespace(threads=FakeAsyncThreads())
+
+
+def create_fake_recognize_response():
+    from google.cloud import speech
+    alternative=speech.SpeechRecognitionAlternative(transcript=FAKE_TRANSCRIPT, confidence=0.92)
+    return speech.RecognizeResponse(results=[speech.SpeechRecognitionResult(alternatives=[alternative], language_code="en-us")])
+
+
+class FakeOperationsClient:
+    """
+    Tracks fake long-running recognitions, reporting each as done once its latency has elapsed.
+    """
+    def __init__(self):
+        self.finish_times={}
+
+    def start(self):
+        name=f"operations/{uuid.uuid4().hex}"
+        self.finish_times[name]=time.monotonic()+FAKE_BACKENDS["speech"].sample_latency()
+        return name
+
+    def get_operation(self, name):
+        from google.cloud import speech
+        from google.longrunning import operations_pb2
+        from google.protobuf import any_pb2
+        operation=operations_pb2.Operation(name=name, done=time.monotonic()>=self.finish_times.get(name, 0))
+        if operation.done:
+            response=speech.LongRunningRecognizeResponse(results=create_fake_recognize_response().results)
+            operation.response.CopyFrom(any_pb2.Any(value=speech.LongRunningRecognizeResponse.serialize(response)))
+        return operation
+
+
+fake_operations_client=FakeOperationsClient()
+
+
+class FakeSpeechClient:
+    def __init__(self, **kwargs):
+        self.transport=SimpleNamespace(operations_client=fake_operations_client)
+
+    def recognize(self, config, audio):
+        FAKE_BACKENDS["speech"].wait("speech")
+        return create_fake_recognize_response()
+
+
+class FakeSpeechAsyncClient:
+    def __init__(self, **kwargs):
+        pass
+
+    async def recognize(self, config, audio):
+        await FAKE_BACKENDS["speech"].wait_async("speech")
+        return create_fake_recognize_response()
+
+    async def long_running_recognize(self, config, audio):
+        FAKE_BACKENDS["speech"].maybe_fail("speech")
+        return SimpleNamespace(operation=SimpleNamespace(name=fake_operations_client.start()))
+
+
+def create_ogg_page(granule, sequence, payload, header_type=0):
+    return b"OggS"+struct.pack("<BBqIIIB", 0, header_type, granule, 1, sequence, 0, 1)+bytes([len(payload)])+payload
+
+
+def create_fake_ogg_opus(media_id, size_bytes, bytes_per_second=2000):
+    """
+    Build a clip with real Ogg Opus header and final pages around filler, so the audio probe reads it as a mono 16 kHz
+    voice note lasting as long as WhatsApp Opus of that size (~16 kbit/s).
+    """
+    pre_skip=312
+    head=create_ogg_page(0, 0, b"OpusHead"+struct.pack("<BBHIhB", 1, 1, pre_skip, 16000, 0, 0), header_type=2)
+    granule=int(size_bytes/bytes_per_second*48000)+pre_skip
+    tail=create_ogg_page(granule, 2, b"\0", header_type=4)
+    # The media id follows the header, so identical URLs serve byte-identical audio and others differ
+    filler=(media_id+b"\0"*size_bytes)[:max(0, size_bytes-len(head)-len(tail))]
+    return head+filler+tail
+
+
+async def serve_fake_twilio_media(request):
+    import httpx
+    await FAKE_BACKENDS["twilio"].wait_async("twilio")
+    media_id=request.url.path.rsplit("/", 1)[-1].encode()
+    return httpx.Response(200, headers={"Content-Type": "audio/ogg"}, content=create_fake_ogg_opus(media_id, FAKE_AUDIO_BYTES))
+
+
+def install_fake_clients():
+    from google.cloud import speech, storage, translate_v2
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    os.environ.setdefault("GOOGLE_PROJECT_ID", "benchmark")
+    os.environ.setdefault("GOOGLE_PROJECT_LOCATION", "europe-west2")
+    os.environ.setdefault("BUCKET_NAME", "benchmark-bucket")
+    translate_v2.Client=FakeTranslateClient
+    speech.SpeechClient=FakeSpeechClient
+    storage.Client=FakeStorageClient
+
+
+def install_fake_backends(use_mongomock=True):
+    """
+    Install every fake needed to run the app offline. Must be called before importing anything from `src`.
+
+    Args:
+        use_mongomock (bool): Replace `MongoClient` with mongomock. Pass False to use the server at `MONGO_URI`.
+    """
+    import httpx
+    import openai
+    import pymongo
+    import vertexai.generative_models
+    from google.cloud import speech
+    install_fake_clients()
+    os.environ.setdefault("TWILIO_ACCOUNT_SID", "benchmark")
+    os.environ.setdefault("TWILIO_AUTH_TOKEN", "benchmark")
+    vertexai.generative_models.GenerativeModel=FakeGenerativeModel
+    openai.AsyncOpenAI=FakeAsyncOpenAI
+    speech.SpeechAsyncClient=FakeSpeechAsyncClient
+    real_async_client=httpx.AsyncClient
+
+    class FakeTwilioAsyncClient(real_async_client):
+        # Clients created without a transport are the service's Twilio downloads
+        def __init__(self, **kwargs):
+            kwargs.setdefault("transport", httpx.MockTransport(serve_fake_twilio_media))
+            super().__init__(**kwargs)
+    httpx.AsyncClient=FakeTwilioAsyncClient
+    if use_mongomock:
+        import mongomock
+        pymongo.MongoClient=mongomock.MongoClient
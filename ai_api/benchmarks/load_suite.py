@@ -0,0 +1,294 @@
+"""
+Offline load suite for ai_api.
+
+Starts `src.main:app` under uvicorn on a loopback port, with every external backend replaced by the in-process fakes
+in `benchmarks.fakes` (Gemini, OpenAI assistants, Translate, Speech-to-Text, GCS, Twilio media and, unless
+`--mongo-uri` is given, MongoDB through mongomock, a dev dependency). Each scenario is driven at a fixed concurrency and reports
+throughput, latency percentiles, errors and process memory. Transcription jobs are also timed until they finish.
+
+Each request uses distinct content by default, so the caches miss and the numbers reflect the backends; pass
+`--repeat-payload` to measure the warm-cache path instead. `--output` writes the results as JSON, with the git
+revision and settings, for regression tracking.
+
+Usage (from the ai_api directory):
+    python -m benchmarks.load_suite --requests 200 --concurrency 50 --latency vertexai=0.8 --latency openai=2
+    python -m benchmarks.load_suite --scenario transcription --error-rate speech=0.05 --output results.json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import resource
+import socket
+import statistics
+import subprocess
+import threading
+import time
+from .fakes import FAKE_BACKENDS, configure_fake_backends, install_fake_backends
+
+SCENARIOS=["signposting-golding", "signposting-alix", "enham-qa", "transcription"]
+DEFAULT_LATENCIES={"vertexai": 0.8, "openai": 2.0, "translate": 0.15, "speech": 1.5, "gcs": 0.1, "twilio": 0.2}
+
+
+def parse_backend_values(values, name):
+    parsed={}
+    for value in values or []:
+        backend, _, number=value.partition("=")
+        if backend not in FAKE_BACKENDS or not number:
+            raise SystemExit(f"{name} must look like BACKEND=NUMBER with BACKEND one of {', '.join(FAKE_BACKENDS)}")
+        parsed[backend]=float(number)
+    return parsed
+
+
+def get_rss_mb():
+    # Linux only; falls back to the peak where /proc is unavailable
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1])*os.sysconf("SC_PAGE_SIZE")/2**20
+    except OSError:
+        return get_peak_rss_mb()
+
+
+def get_peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/1024
+
+
+def get_git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def find_free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(samples, pct):
+    ordered=sorted(samples)
+    index=min(len(ordered)-1, max(0, round(pct/100*len(ordered))-1))
+    return ordered[index]
+
+
+def create_option(scenario, request_index, option_index, repeat_payload):
+    suffix="" if repeat_payload else f" {scenario} {request_index}"
+    return {
+        "community_group": None,
+        "location_scope": "local" if option_index%2 else "national",
+        "category_tags": ["benchmark"],
+        "description_short": f"Benchmark organisation {option_index}{suffix}",
+        "description_long": None,
+        "postcode": "SW1A 1AA",
+        "area_covered": "UK",
+        "external_url": f"https://example.org/{option_index}",
+        "email": f"org{option_index}@example.org",
+        "name": f"Organisation {option_index}{suffix}",
+        "organizationName": f"Organisation {option_index}{suffix}",
+    }
+
+
+def create_request(scenario, index, args):
+    """
+    Returns:
+        tuple[str, dict]: The path and JSON body of the `index`-th request of a scenario.
+    """
+    if scenario.startswith("signposting-"):
+        options=[create_option(scenario, index, option_index, args.repeat_payload) for option_index in range(args.options)]
+        return f"/llm/{scenario}", {"options": options, "language": args.language, "category": "benchmark"}
+    if scenario=="enham-qa":
+        question="What support does Enham offer?" if args.repeat_payload else f"What support does Enham offer for case {index}?"
+        return "/llm/enham-qa", {"user_message": question}
+    message_sid=f"SM{index:032d}" if not args.repeat_payload else "SM"+"0"*32
+    # Forwarded voice notes: distinct messages whose media is byte-identical
+    media_index=0 if index%100<args.duplicate_audio_rate*100 else index
+    media_url=f"https://api.twilio.com/2010-04-01/Accounts/ACbenchmark/Messages/{message_sid}/Media/ME{media_index:032d}"
+    return "/tasks/transcription", {"MessageSid": message_sid, "MediaUrl0": media_url}
+
+
+def is_success(response):
+    if response.status_code>=400:
+        return False
+    return response.json().get("message")!="error"
+
+
+async def drive(client, scenario, args):
+    semaphore=asyncio.Semaphore(args.concurrency)
+    latencies=[]
+    failures=0
+    job_ids=[]
+
+    async def send(index):
+        nonlocal failures
+        path, body=create_request(scenario, index, args)
+        async with semaphore:
+            start=time.perf_counter()
+            try:
+                response=await client.post(path, json=body)
+                succeeded=is_success(response)
+            except Exception:
+                response=None
+                succeeded=False
+            latencies.append(time.perf_counter()-start)
+        if not succeeded:
+            failures+=1
+        elif scenario=="transcription":
+            job_ids.append(response.json()["job_id"])
+    start=time.perf_counter()
+    await asyncio.gather(*(send(index) for index in range(args.requests)))
+    return time.perf_counter()-start, latencies, failures, job_ids
+
+
+async def wait_for_jobs(client, job_ids, timeout_seconds):
+    """
+    Poll the job route until every job is completed or failed.
+
+    Returns:
+        dict: Completed, failed and cache-hit job counts and how long the last job took to finish after the requests were sent.
+    """
+    start=time.perf_counter()
+    pending=set(job_ids)
+    statuses={"completed": 0, "failed": 0}
+    cache_hits=0
+    while pending and time.perf_counter()-start<timeout_seconds:
+        for job_id in list(pending):
+            job=(await client.get(f"/tasks/transcription/{job_id}")).json()["data"]
+            if job["status"] in statuses:
+                statuses[job["status"]]+=1
+                cache_hits+=bool(job.get("cacheHit"))
+                pending.discard(job_id)
+        if pending:
+            await asyncio.sleep(0.2)
+    return {"jobs_completed": statuses["completed"], "jobs_failed": statuses["failed"], "jobs_unfinished": len(pending), "jobs_cache_hits": cache_hits, "drain_seconds": time.perf_counter()-start}
+
+
+async def run_scenario(base_url, scenario, args):
+    import httpx
+    # Explicit transport: clients without one are routed to the fake Twilio media server
+    transport=httpx.AsyncHTTPTransport(limits=httpx.Limits(max_connections=args.concurrency))
+    async with httpx.AsyncClient(base_url=base_url, timeout=None, transport=transport) as client:
+        rss_before=get_rss_mb()
+        elapsed, latencies, failures, job_ids=await drive(client, scenario, args)
+        result={
+            "scenario": scenario,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "errors": failures,
+            "throughput_rps": args.requests/elapsed,
+            "p50_s": percentile(latencies, 50),
+            "p90_s": percentile(latencies, 90),
+            "p99_s": percentile(latencies, 99),
+            "max_s": max(latencies),
+            "mean_s": statistics.mean(latencies),
+        }
+        if job_ids:
+            result.update(await wait_for_jobs(client, job_ids, args.job_timeout))
+        result["rss_mb"]=get_rss_mb()
+        result["rss_delta_mb"]=result["rss_mb"]-rss_before
+        result["peak_rss_mb"]=get_peak_rss_mb()
+        return result
+
+
+def start_server(app, port):
+    import uvicorn
+    server=uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", access_log=False))
+    thread=threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise SystemExit("uvicorn failed to start")
+        time.sleep(0.05)
+    return server, thread
+
+
+def wait_until_ready(registry, timeout_seconds=30):
+    deadline=time.monotonic()+timeout_seconds
+    while not registry.ready and time.monotonic()<deadline:
+        time.sleep(0.05)
+    if not registry.ready:
+        raise SystemExit(f"services failed to initialise: {registry.error}")
+
+
+def print_report(results):
+    print(f"{'scenario':<21}{'req/s':>8}{'p50 (s)':>9}{'p90 (s)':>9}{'p99 (s)':>9}{'errors':>8}{'rss (MB)':>10}{'peak (MB)':>11}")
+    for result in results:
+        print(
+            f"{result['scenario']:<21}{result['throughput_rps']:>8.1f}{result['p50_s']:>9.3f}{result['p90_s']:>9.3f}"
+            f"{result['p99_s']:>9.3f}{result['errors']:>8}{result['rss_mb']:>10.1f}{result['peak_rss_mb']:>11.1f}"
+        )
+        if "jobs_completed" in result:
+            print(
+                f"{'':<21}jobs completed {result['jobs_completed']}, failed {result['jobs_failed']}, "
+                f"unfinished {result['jobs_unfinished']}, cache hits {result['jobs_cache_hits']}, drained in {result['drain_seconds']:.2f}s"
+            )
+
+
+def main():
+    parser=argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="repeatable; defaults to every scenario")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--options", type=int, default=5, help="signposting options per request")
+    parser.add_argument("--language", default="en", help="signposting target language; anything but en exercises Translate")
+    parser.add_argument("--latency", action="append", metavar="BACKEND=SECONDS", help=f"repeatable; defaults {DEFAULT_LATENCIES}")
+    parser.add_argument("--error-rate", action="append", metavar="BACKEND=RATE", help="repeatable; defaults to 0")
+    parser.add_argument("--jitter", type=float, default=0.1, help="latency standard deviation as a fraction of the mean")
+    parser.add_argument("--audio-bytes", type=int, default=64*1024, help="fake voice note size; above LONG_RUNNING_MIN_BYTES uses long-running recognition")
+    parser.add_argument("--repeat-payload", action="store_true", help="send identical content so the caches are hit")
+    parser.add_argument("--duplicate-audio-rate", type=float, default=0.0, help="fraction of transcription requests whose audio is byte-identical")
+    parser.add_argument("--job-timeout", type=float, default=120, help="seconds to wait for transcription jobs to finish")
+    parser.add_argument("--mongo-uri", help="use this MongoDB server instead of mongomock")
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    args=parser.parse_args()
+
+    if args.mongo_uri:
+        os.environ["MONGO_URI"]=args.mongo_uri
+    os.environ.setdefault("TRANSCRIPTION_POLL_INTERVAL_SECONDS", "0.5")
+    install_fake_backends(use_mongomock=not args.mongo_uri)
+    configure_fake_backends(
+        latencies={**DEFAULT_LATENCIES, **parse_backend_values(args.latency, "--latency")},
+        error_rates=parse_backend_values(args.error_rate, "--error-rate"),
+        jitter_ratio=args.jitter,
+        audio_bytes=args.audio_bytes,
+    )
+    from src.main import app
+    from src.services.ServiceRegistry import registry
+    # Injected failures are logged by the services and the routes print per request; keep the report readable
+    logging.disable(logging.ERROR)
+
+    rss_start=get_rss_mb()
+    with contextlib.redirect_stdout(io.StringIO()):
+        server, thread=start_server(app, find_free_port())
+        wait_until_ready(registry)
+    base_url=f"http://127.0.0.1:{server.config.port}"
+    results=[]
+    try:
+        for scenario in args.scenario or SCENARIOS:
+            with contextlib.redirect_stdout(io.StringIO()):
+                results.append(asyncio.run(run_scenario(base_url, scenario, args)))
+    finally:
+        server.should_exit=True
+        thread.join(timeout=10)
+
+    print(f"startup rss {rss_start:.1f} MB; backend latencies {', '.join(f'{name}={backend.latency}s' for name, backend in FAKE_BACKENDS.items())}")
+    print_report(results)
+    if args.output:
+        report={
+            "git_revision": get_git_revision(),
+            "timestamp": time.time(),
+            "settings": {key: value for key, value in vars(args).items() if key!="output"},
+            "backends": {name: {"latency": backend.latency, "error_rate": backend.error_rate, "calls": backend.calls, "errors": backend.errors} for name, backend in FAKE_BACKENDS.items()},
+            "startup_rss_mb": rss_start,
+            "results": results,
+        }
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+        print(f"results written to {args.output}")
+
+
+if __name__=="__main__":
+    main()
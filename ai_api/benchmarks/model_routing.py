@@ -0,0 +1,111 @@
+"""
+Latency and error benchmark of `ModelRouter` against stub model backends.
+
+Each scenario runs the same requests twice: through the primary backend alone, with no hedging or retries (what
+`VertexAI_Service` did before the router), and through the router over the primary and a secondary backend, which
+hedges slow calls after the primary's p95 latency, fails over on errors and retries quota errors with jittered backoff.
+
+Scenarios:
+    healthy:    both backends answer in about `--latency` seconds.
+    slow-tail:  4% of primary calls take 8x as long.
+    quota:      30% of primary calls raise `ResourceExhausted`.
+    outage:     every primary call fails, so its circuit opens.
+
+Usage (from the ai_api directory):
+    python -m benchmarks.model_routing --requests 400 --concurrency 20 --latency 0.2
+"""
+import argparse
+import asyncio
+import logging
+import random
+import time
+from google.api_core import exceptions as google_exceptions
+from .fakes import install_fake_clients
+
+install_fake_clients()
+from src.services import ModelRouterService  # noqa: E402
+from src.services.ModelRouterService import ModelRouter  # noqa: E402
+
+SCENARIOS={
+    "healthy": {},
+    "slow-tail": {"slow_rate": 0.04},
+    "quota": {"quota_rate": 0.3},
+    "outage": {"error_rate": 1.0},
+}
+
+
+class StubBackend:
+    """
+    Stands in for a model backend, with a jittered latency, a slow tail and injected errors.
+    """
+    def __init__(self, name, latency, slow_rate=0.0, quota_rate=0.0, error_rate=0.0):
+        self.name=name
+        self.latency=latency
+        self.slow_rate=slow_rate
+        self.quota_rate=quota_rate
+        self.error_rate=error_rate
+        self.calls=0
+
+    async def generate_async(self, prompt_text, generation_config, function_dictionaries=None, tool_config=None):
+        self.calls+=1
+        latency=random.gauss(self.latency, self.latency*0.1)*(8 if random.random()<self.slow_rate else 1)
+        await asyncio.sleep(max(0.0, latency))
+        if random.random()<self.quota_rate:
+            raise google_exceptions.ResourceExhausted("stubbed quota exceeded")
+        if random.random()<self.error_rate:
+            raise RuntimeError("stubbed model error")
+        return f"{self.name} description"
+
+
+def percentile(values, fraction):
+    return sorted(values)[min(len(values)-1, int(len(values)*fraction))] if values else float("nan")
+
+
+async def drive(router, request_count, concurrency):
+    semaphore=asyncio.Semaphore(concurrency)
+    latencies=[]
+    errors=0
+
+    async def send():
+        nonlocal errors
+        async with semaphore:
+            start=time.perf_counter()
+            try:
+                await router.generate_async(prompt_text="describe", generation_config={"temperature": 0.6})
+                latencies.append(time.perf_counter()-start)
+            except Exception:
+                errors+=1
+    await asyncio.gather(*(send() for _ in range(request_count)))
+    return latencies, errors
+
+
+def main():
+    parser=argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2, help="mean stubbed latency of the primary in seconds")
+    parser.add_argument("--secondary-latency", type=float, default=0.25, help="mean stubbed latency of the secondary in seconds")
+    args=parser.parse_args()
+    logging.disable(logging.ERROR)
+    # Scale the backoff and hedge floor, tuned for real model latencies, to the stubbed ones
+    ModelRouterService.llm_backoff_base_seconds=args.latency
+    ModelRouterService.llm_hedge_min_seconds=args.latency
+
+    print(f"{'scenario':<11}{'routing':<14}{'p50 (s)':>9}{'p99 (s)':>9}{'errors':>8}{'calls/req':>11}")
+    for scenario, profile in SCENARIOS.items():
+        for routing in ["primary only", "router"]:
+            # Every run starts with fresh latency history and closed circuits
+            ModelRouterService.backend_health.clear()
+            primary=StubBackend("stub:primary", args.latency, **profile)
+            secondary=StubBackend("stub:secondary", args.secondary_latency)
+            if routing=="router":
+                router=ModelRouter([primary, secondary])
+            else:
+                router=ModelRouter([primary], hedging_enabled=False, max_retries=0)
+            latencies, errors=asyncio.run(drive(router, args.requests, args.concurrency))
+            calls=(primary.calls+secondary.calls)/args.requests
+            print(f"{scenario:<11}{routing:<14}{percentile(latencies, 0.5):>9.3f}{percentile(latencies, 0.99):>9.3f}{errors:>8}{calls:>11.2f}")
+
+
+if __name__=="__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Broadcast benchmark of request coalescing: `--users` identical `/llm/signposting-alix` requests arrive together, as
+they do a few seconds after a broadcast, with a stubbed Gemini model and the fake Translation API.
+
+With coalescing off, every request makes its own model calls and, as they all miss the translation cache together,
+its own Translation API calls. With it on, each distinct prompt and each distinct translation request goes upstream
+once and the others wait on it. The pre-generated store is disabled so every request takes the live path.
+
+Usage (from the ai_api directory):
+    python -m benchmarks.request_coalescing --users 50 --options 5 --latency 1.0 --language cy
+"""
+import argparse
+import asyncio
+import logging
+import time
+from .fakes import FAKE_BACKENDS, configure_fake_backends, install_fake_backends
+
+install_fake_backends()
+import httpx  # noqa: E402
+from src.main import app  # noqa: E402
+from src.routes import llm  # noqa: E402
+from src.services.RequestCoalescingService import model_flights, translation_flights  # noqa: E402
+from src.services.ServiceRegistry import get_signposting_service  # noqa: E402
+from .signposting_fanout import StubVertexAI_Service, make_option, percentile  # noqa: E402
+from .signposting_store import CountingGenerativeModel  # noqa: E402
+
+
+async def broadcast(payload, users):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=None) as client:
+        async def send():
+            start=time.perf_counter()
+            response=await client.post("/llm/signposting-alix", json=payload)
+            assert response.json()["message"]=="success"
+            return time.perf_counter()-start
+        return await asyncio.gather(*(send() for _ in range(users)))
+
+
+def main():
+    parser=argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--options", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=1.0, help="mean stubbed model latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.2, help="standard deviation of the stubbed latency")
+    parser.add_argument("--translate-latency", type=float, default=0.2)
+    parser.add_argument("--language", default="cy")
+    args=parser.parse_args()
+    logging.disable(logging.ERROR)
+    configure_fake_backends(latencies={"translate": args.translate_latency})
+    llm.signposting_store_enabled=False
+
+    model=CountingGenerativeModel(args.latency, args.jitter, 0.0)
+    # A large pool, so the uncoalesced run is limited by upstream calls, not by the service's own concurrency cap
+    service=StubVertexAI_Service(model, max_concurrency=args.users*args.options)
+    app.dependency_overrides[get_signposting_service]=lambda: service
+
+    # Warm up first: the router's latency history fills during the first run, which changes its timings
+    asyncio.run(broadcast({"options": [make_option(i) for i in range(args.options)], "language": "en", "category": "warmup"}, args.users))
+    print(f"{'coalescing':<12}{'p50 (s)':>9}{'p99 (s)':>9}{'model calls':>13}{'translate calls':>17}")
+    for enabled in [False, True]:
+        model_flights.enabled=enabled
+        translation_flights.enabled=enabled
+        # Fresh websites, which are part of each message, so the translation cache starts cold for each run
+        options=[dict(make_option(i), external_url=f"https://example.org/{'on' if enabled else 'off'}/{i}") for i in range(args.options)]
+        payload={"options": options, "language": args.language, "category": "benchmark"}
+        model_calls=model.calls
+        translate_calls=FAKE_BACKENDS["translate"].calls
+        timings=asyncio.run(broadcast(payload, args.users))
+        print(f"{'on' if enabled else 'off':<12}{percentile(timings, 50):>9.3f}{percentile(timings, 99):>9.3f}{model.calls-model_calls:>13}{FAKE_BACKENDS['translate'].calls-translate_calls:>17}")
+
+
+if __name__=="__main__":
+    main()
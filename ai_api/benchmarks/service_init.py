@@ -0,0 +1,62 @@
+"""
+Microbenchmark of per-request service overhead: constructing a `VertexAI_Service` (SDK init, `GenerativeModel` and its
+prediction client) on every request, as the routes used to, versus looking it up in the process-wide `ServiceRegistry`.
+
+Offline this only measures local object construction; in production the fresh client also pays a gRPC channel setup,
+TLS handshake and token fetch on its first call, which the registry amortises across requests.
+
+Usage (from the ai_api directory):
+    python -m benchmarks.service_init --iterations 200
+"""
+import argparse
+import statistics
+import time
+from .fakes import install_fake_clients
+
+install_fake_clients()
+import vertexai  # noqa: E402
+from google.auth.credentials import AnonymousCredentials  # noqa: E402
+from src.config.vertexai_config import signposting_model_name  # noqa: E402
+from src.services.AI_Service import VertexAI_Service  # noqa: E402
+from src.services.ServiceRegistry import ServiceRegistry  # noqa: E402
+
+
+def per_request():
+    service=VertexAI_Service("vertexai", signposting_model_name)
+    service.model._prediction_client
+    return service
+
+
+def make_registry_lookup():
+    registry=ServiceRegistry()
+    registry.get_vertexai_service(signposting_model_name).model._prediction_client
+
+    def registry_lookup():
+        return registry.get_vertexai_service(signposting_model_name)
+    return registry_lookup
+
+
+def measure(func, iterations):
+    samples=[]
+    for _ in range(iterations):
+        start=time.perf_counter()
+        func()
+        samples.append((time.perf_counter()-start)*1000)
+    return samples
+
+
+def main():
+    parser=argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    args=parser.parse_args()
+
+    vertexai.init(credentials=AnonymousCredentials())
+    print(f"{'mode':<14}{'p50 (ms)':>10}{'p99 (ms)':>10}{'mean (ms)':>11}")
+    for name, func in {"per-request": per_request, "registry": make_registry_lookup()}.items():
+        samples=sorted(measure(func, args.iterations))
+        p99=samples[min(len(samples)-1, int(len(samples)*0.99))]
+        print(f"{name:<14}{statistics.median(samples):>10.4f}{p99:>10.4f}{statistics.mean(samples):>11.4f}")
+
+
+if __name__=="__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Latency benchmark for `VertexAI_Service.describe_signposting_options` against a stubbed Gemini model.
+
+Compares the serial path (max_concurrency=1) with the bounded async fan-out and prints p50/p99 latencies
+for 1, 5, 10 and 25 options.
+
+Usage (from the ai_api directory):
+    python -m benchmarks.signposting_fanout --runs 20 --latency 0.8 --max-concurrency 8
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+from src.services.AI_Service import VertexAI_Service  # noqa: E402
+
+OPTION_COUNTS=[1, 5, 10, 25]
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text=text
+
+
+class StubGenerativeModel:
+    """
+    Stands in for `GenerativeModel`, sleeping for a jittered latency and failing at a configurable rate.
+    """
+    def __init__(self, latency, jitter, error_rate):
+        self.latency=latency
+        self.jitter=jitter
+        self.error_rate=error_rate
+
+    def generate_content(self, contents, generation_config=None, tools=None, tool_config=None):
+        time.sleep(max(0.0, random.gauss(self.latency, self.jitter)))
+        if random.random()<self.error_rate:
+            raise RuntimeError("stubbed model error")
+        return StubResponse("Stub Organisation offers support. It is a stubbed description.")
+
+    async def generate_content_async(self, contents, generation_config=None, tools=None, tool_config=None):
+        await asyncio.sleep(max(0.0, random.gauss(self.latency, self.jitter)))
+        if random.random()<self.error_rate:
+            raise RuntimeError("stubbed model error")
+        return StubResponse("Stub Organisation offers support. It is a stubbed description.")
+
+
+class StubVertexAI_Service(VertexAI_Service):
+    def __init__(self, stub_model, max_concurrency):
+        self.stub_model=stub_model
+        super().__init__("vertexai", "stub-model", max_concurrency=max_concurrency, description_cache=None)
+
+    def create_model(self, model_source, model_name=None):
+        return self.stub_model
+
+
+def make_option(i):
+    return {
+        "community_group": None,
+        "location_scope": "local" if i%2 else "national",
+        "category_tags": ["benchmark"],
+        "description_short": f"Benchmark organisation {i}",
+        "description_long": None,
+        "postcode": "SW1A 1AA",
+        "area_covered": "UK",
+        "external_url": f"https://example.org/{i}",
+        "email": f"org{i}@example.org",
+        "name": f"Organisation {i}",
+        "organizationName": f"Organisation {i}",
+    }
+
+
+def percentile(samples, pct):
+    ordered=sorted(samples)
+    index=min(len(ordered)-1, max(0, round(pct/100*len(ordered))-1))
+    return ordered[index]
+
+
+def run(service, option_count, runs):
+    options=[make_option(i) for i in range(option_count)]
+    samples=[]
+    for _ in range(runs):
+        start=time.perf_counter()
+        descriptions=asyncio.run(service.describe_signposting_options(options, "benchmark"))
+        samples.append(time.perf_counter()-start)
+        assert len(descriptions)==option_count
+    return samples
+
+
+def main():
+    parser=argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.8, help="mean stubbed model latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.2, help="standard deviation of the stubbed latency")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    args=parser.parse_args()
+    # per-option failures are logged by the service; keep the report readable
+    logging.disable(logging.ERROR)
+
+    stub_model=StubGenerativeModel(args.latency, args.jitter, args.error_rate)
+    modes={
+        "serial": StubVertexAI_Service(stub_model, max_concurrency=1),
+        f"concurrent({args.max_concurrency})": StubVertexAI_Service(stub_model, max_concurrency=args.max_concurrency),
+    }
+    print(f"{'mode':<18}{'options':>8}{'p50 (s)':>10}{'p99 (s)':>10}{'mean (s)':>10}")
+    for name, service in modes.items():
+        for option_count in OPTION_COUNTS:
+            samples=run(service, option_count, args.runs)
+            print(f"{name:<18}{option_count:>8}{percentile(samples, 50):>10.3f}{percentile(samples, 99):>10.3f}{statistics.mean(samples):>10.3f}")
+
+
+if __name__=="__main__":
+    main()
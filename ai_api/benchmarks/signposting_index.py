@@ -0,0 +1,106 @@
+"""
+Offline benchmark of `SignpostingIndex` build and query latency over synthetic organisations.
+
+For each index size it reports the time to build the index from scratch, save it, and load it again (memory-mapping
+the token array), then p50/p99 latencies for a query over the whole index, for ranking a request's 50 candidate options
+(the path `/llm/signposting-*` takes before calling the model) and for adding one new option incrementally.
+
+Usage (from the ai_api directory):
+    python -m benchmarks.signposting_index --sizes 1000,10000,100000 --queries 200
+"""
+import argparse
+import contextlib
+import io
+import random
+import statistics
+import tempfile
+import time
+from src.services.SignpostingIndexService import SignpostingIndex
+
+CATEGORIES={
+    "housing": ["homelessness", "tenancy", "rent", "eviction", "shelter", "landlord"],
+    "food": ["foodbank", "meals", "groceries", "pantry", "nutrition", "hunger"],
+    "mental health": ["counselling", "anxiety", "depression", "wellbeing", "crisis", "therapy"],
+    "money": ["debt", "benefits", "budgeting", "grants", "bills", "advice"],
+    "employment": ["jobs", "cv", "training", "interview", "skills", "apprenticeship"],
+    "carers": ["respite", "carer", "support", "disability", "family", "breaks"],
+}
+FILLER="local community charity volunteers service people help free confidential friendly drop session weekly team".split()
+AREAS=[("SW", "London"), ("M", "Manchester"), ("LS", "Leeds"), ("B", "Birmingham"), ("BS", "Bristol"), ("NE", "Newcastle"), ("G", "Glasgow"), ("CF", "Cardiff")]
+
+
+def create_option(index, generator):
+    category=generator.choice(list(CATEGORIES))
+    words=CATEGORIES[category]
+    area, town=generator.choice(AREAS)
+    district=generator.randint(1, 20)
+    return {
+        "name": f"{town} {generator.choice(words).title()} Project {index}",
+        "organizationName": f"Organisation {index}",
+        "location_scope": generator.choice(["local", "local", "local", "regional", "national"]),
+        "category_tags": [category, *generator.sample(words, 2)],
+        "description_short": " ".join(generator.sample(words, 3)+generator.sample(FILLER, 5)),
+        "description_long": " ".join(generator.choices(words, k=10)+generator.choices(FILLER, k=40)),
+        "postcode": f"{area}{district} {generator.randint(1, 9)}{generator.choice('ABDEFGHJ')}{generator.choice('LNPQRSTU')}",
+        "area_covered": town,
+        "external_url": f"https://example.org/{index}",
+        "email": f"info{index}@example.org",
+    }
+
+
+def create_query(generator):
+    category=generator.choice(list(CATEGORIES))
+    area, _=generator.choice(AREAS)
+    return f"{category} {' '.join(generator.sample(CATEGORIES[category], 2))}", f"{area}{generator.randint(1, 20)} 1AA"
+
+
+def percentile(values, fraction):
+    return sorted(values)[min(len(values)-1, int(len(values)*fraction))]
+
+
+def time_calls(call, arguments):
+    latencies=[]
+    for argument in arguments:
+        start=time.perf_counter()
+        call(*argument)
+        latencies.append((time.perf_counter()-start)*1000)
+    return statistics.median(latencies), percentile(latencies, 0.99)
+
+
+def main():
+    parser=argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated numbers of organisations")
+    parser.add_argument("--queries", type=int, default=200, help="queries timed per measurement")
+    parser.add_argument("--candidates", type=int, default=50, help="options per ranking request")
+    parser.add_argument("--limit", type=int, default=10, help="options kept after ranking")
+    args=parser.parse_args()
+    generator=random.Random(0)
+
+    print(f"{'orgs':>8}{'build (s)':>11}{'save (s)':>10}{'load (s)':>10}{'search p50/p99 (ms)':>22}{'rank p50/p99 (ms)':>20}{'add p50/p99 (ms)':>19}")
+    for size in [int(size) for size in args.sizes.split(",")]:
+        options=[create_option(index, generator) for index in range(size)]
+        queries=[create_query(generator) for _ in range(args.queries)]
+        with tempfile.TemporaryDirectory() as index_dir, contextlib.redirect_stdout(io.StringIO()):
+            index=SignpostingIndex(index_dir=index_dir, autosave_updates=0)
+            start=time.perf_counter()
+            index.add_options(options)
+            build_seconds=time.perf_counter()-start
+
+            start=time.perf_counter()
+            index.save()
+            save_seconds=time.perf_counter()-start
+
+            index=SignpostingIndex(index_dir=index_dir, autosave_updates=0)
+            start=time.perf_counter()
+            index.load()
+            load_seconds=time.perf_counter()-start
+
+            search=time_calls(index.search, [(query, postcode, args.limit) for query, postcode in queries])
+            # Candidates are already indexed, as they are for any organisation seen in an earlier request
+            rank=time_calls(index.rank_options, [(generator.sample(options, args.candidates), query, postcode, args.limit) for query, postcode in queries])
+            add=time_calls(index.add_option, [(create_option(size+index_offset, generator),) for index_offset in range(args.queries)])
+        print(f"{size:>8}{build_seconds:>11.2f}{save_seconds:>10.3f}{load_seconds:>10.3f}{search[0]:>13.2f}/{search[1]:<8.2f}{rank[0]:>11.2f}/{rank[1]:<8.2f}{add[0]:>10.3f}/{add[1]:<8.3f}")
+
+
+if __name__=="__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark of the pre-generated signposting store, with a stubbed Gemini model and mongomock.
+
+First the `SignpostingPregenerator` fills the store for a catalogue of `--options` options, in English and
+`--languages`. Then it runs twice more: once unchanged, so it should make no model or translation calls, and once with
+one option edited, so it should regenerate only that option. Finally `/llm/signposting-alix` is timed with the store
+disabled (every option described by the model) and enabled (one lookup).
+
+Usage (from the ai_api directory):
+    python -m benchmarks.signposting_store --options 10 --runs 10 --latency 1.0
+"""
+import argparse
+import asyncio
+import logging
+import time
+from .fakes import install_fake_backends
+
+install_fake_backends()
+import httpx  # noqa: E402
+from src.main import app  # noqa: E402
+from src.routes import llm  # noqa: E402
+from src.services.ServiceRegistry import registry, get_signposting_service  # noqa: E402
+from src.services.SignpostingPregenerationService import SignpostingPregenerator  # noqa: E402
+from .signposting_fanout import StubGenerativeModel, StubVertexAI_Service, make_option, percentile  # noqa: E402
+
+ORGANISATION="alix"
+CATEGORY="benchmark"
+
+
+class CountingGenerativeModel(StubGenerativeModel):
+    def __init__(self, latency, jitter, error_rate):
+        super().__init__(latency, jitter, error_rate)
+        self.calls=0
+
+    async def generate_content_async(self, contents, generation_config=None, tools=None, tool_config=None):
+        self.calls+=1
+        return await super().generate_content_async(contents, generation_config, tools, tool_config)
+
+
+async def pregenerate(pregenerator, options, languages):
+    start=time.perf_counter()
+    stats=await pregenerator.pregenerate_async(ORGANISATION, CATEGORY, options, languages)
+    return stats, time.perf_counter()-start
+
+
+async def time_route(payload, runs):
+    timings=[]
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark") as client:
+        for _ in range(runs):
+            start=time.perf_counter()
+            response=await client.post("/llm/signposting-alix", json=payload)
+            timings.append(time.perf_counter()-start)
+            assert len(response.json()["data"])==len(payload["options"])
+    return timings
+
+
+def main():
+    parser=argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--options", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=1.0, help="mean stubbed model latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.4, help="standard deviation of the stubbed latency")
+    parser.add_argument("--languages", default="cy,pl", help="comma-separated languages to pre-generate besides English")
+    args=parser.parse_args()
+    logging.disable(logging.ERROR)
+    languages=[language for language in args.languages.split(",") if language]
+
+    model=CountingGenerativeModel(args.latency, args.jitter, 0.0)
+    service=StubVertexAI_Service(model, max_concurrency=8)
+    app.dependency_overrides[get_signposting_service]=lambda: service
+    pregenerator=SignpostingPregenerator(service, registry.get_signposting_store(), registry.get_translation_service)
+    options=[make_option(i) for i in range(args.options)]
+
+    print(f"{'run':<12}{'seconds':>9}{'model calls':>13}{'generated':>11}{'unchanged':>11}{'translated':>12}")
+    edited=[dict(option) for option in options]
+    edited[0]["description_short"]="Edited benchmark organisation"
+    for name, catalogue in [("initial", options), ("unchanged", options), ("one edited", edited)]:
+        calls=model.calls
+        stats, elapsed=asyncio.run(pregenerate(pregenerator, catalogue, languages))
+        print(f"{name:<12}{elapsed:>9.3f}{model.calls-calls:>13}{stats['generated']:>11}{stats['unchanged']:>11}{sum(stats['translated'].values()):>12}")
+
+    payload={"options": edited, "language": languages[0] if languages else "en", "category": CATEGORY}
+    print(f"\n{'route':<14}{'p50 (s)':>9}{'p99 (s)':>9}{'model calls':>13}")
+    for name, enabled in [("store off", False), ("store on", True)]:
+        llm.signposting_store_enabled=enabled
+        calls=model.calls
+        timings=asyncio.run(time_route(payload, args.runs))
+        print(f"{name:<14}{percentile(timings, 50):>9.3f}{percentile(timings, 99):>9.3f}{model.calls-calls:>13}")
+
+
+if __name__=="__main__":
+    main()
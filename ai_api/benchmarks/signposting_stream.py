@@ -0,0 +1,100 @@
+"""
+Time-to-first-message benchmark of `/llm/signposting-alix/stream` against the JSON `/llm/signposting-alix`, with a
+stubbed Gemini model.
+
+The JSON route answers once every option is described, so its first message arrives with its last. The streaming route
+writes each option as an NDJSON line as soon as its description is ready, so the first message should arrive after
+roughly one model round-trip. The app runs under uvicorn on a loopback port, with the other backends replaced by the
+fakes in `benchmarks.fakes`, since `httpx.ASGITransport` buffers whole responses and would hide the streaming.
+
+Usage (from the ai_api directory):
+    python -m benchmarks.signposting_stream --runs 10 --latency 1.0 --jitter 0.4
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import time
+from .fakes import install_fake_backends
+
+install_fake_backends()
+import httpx  # noqa: E402
+from src.main import app  # noqa: E402
+from src.services.ServiceRegistry import registry, get_signposting_service  # noqa: E402
+from .load_suite import find_free_port, start_server, wait_until_ready  # noqa: E402
+from .signposting_fanout import StubGenerativeModel, StubVertexAI_Service, make_option, percentile  # noqa: E402
+
+OPTION_COUNTS=[3, 5, 10, 25]
+
+
+async def time_json(client, payload):
+    start=time.perf_counter()
+    response=await client.post("/llm/signposting-alix", json=payload)
+    elapsed=time.perf_counter()-start
+    assert len(response.json()["data"])==len(payload["options"])
+    return elapsed, elapsed
+
+
+async def time_stream(client, payload):
+    start=time.perf_counter()
+    first=None
+    indices=set()
+    async with client.stream("POST", "/llm/signposting-alix/stream", json=payload) as response:
+        async for line in response.aiter_lines():
+            event=json.loads(line)
+            if "indices" in event:
+                selected=set(event["indices"])
+            elif "index" in event:
+                first=first or time.perf_counter()-start
+                indices.add(event["index"])
+            else:
+                assert event["message"]=="success"
+    assert indices==selected==set(range(len(payload["options"])))
+    return first, time.perf_counter()-start
+
+
+async def run(base_url, runs, language):
+    results={}
+    # A real transport: the fakes give clients without one a fake Twilio media server
+    async with httpx.AsyncClient(transport=httpx.AsyncHTTPTransport(), base_url=base_url, timeout=None) as client:
+        for option_count in OPTION_COUNTS:
+            payload={"options":[make_option(i) for i in range(option_count)], "language":language, "category":"benchmark"}
+            for name, timer in [("json", time_json), ("stream", time_stream)]:
+                timings=[await timer(client, payload) for _ in range(runs)]
+                results[(option_count, name)]=timings
+    return results
+
+
+def main():
+    parser=argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=1.0, help="mean stubbed model latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.4, help="standard deviation of the stubbed latency")
+    parser.add_argument("--language", default="en", help="response language; anything but en is translated per message")
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    args=parser.parse_args()
+    logging.disable(logging.ERROR)
+
+    service=StubVertexAI_Service(StubGenerativeModel(args.latency, args.jitter, 0.0), max_concurrency=args.max_concurrency)
+    app.dependency_overrides[get_signposting_service]=lambda: service
+    port=find_free_port()
+    # the routes print per request; keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        server, thread=start_server(app, port)
+        wait_until_ready(registry)
+        try:
+            results=asyncio.run(run(f"http://127.0.0.1:{port}", args.runs, args.language))
+        finally:
+            server.should_exit=True
+            thread.join()
+    print(f"{'options':>8}  {'route':<8}{'first p50 (s)':>15}{'first p99 (s)':>15}{'last p50 (s)':>14}")
+    for (option_count, name), timings in results.items():
+        firsts=[first for first, _ in timings]
+        lasts=[last for _, last in timings]
+        print(f"{option_count:>8}  {name:<8}{percentile(firsts, 50):>15.3f}{percentile(firsts, 99):>15.3f}{percentile(lasts, 50):>14.3f}")
+
+
+if __name__=="__main__":
+    main()
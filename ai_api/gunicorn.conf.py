@@ -0,0 +1,16 @@
+"""
+Production launcher: `gunicorn -c gunicorn.conf.py src.main:app`.
+
+Each worker is a uvicorn event loop, so concurrency per worker is bounded by in-flight I/O rather than by threads.
+Worker count and port come from `WEB_CONCURRENCY` and `PORT`.
+"""
+from src.config.server_config import port, web_concurrency, worker_timeout_seconds, graceful_timeout_seconds, keepalive_seconds
+
+bind=f"0.0.0.0:{port}"
+workers=web_concurrency
+worker_class="uvicorn.workers.UvicornWorker"
+timeout=worker_timeout_seconds
+graceful_timeout=graceful_timeout_seconds
+keepalive=keepalive_seconds
+accesslog="-"
+errorlog="-"
@@ -0,0 +1,16 @@
+from dotenv import load_dotenv
+import os
+load_dotenv()
+description_cache_backend=os.environ.get("DESCRIPTION_CACHE_BACKEND", "memory")
+description_cache_ttl_seconds=int(os.environ.get("DESCRIPTION_CACHE_TTL_SECONDS", 7*24*60*60))
+description_cache_max_size=int(os.environ.get("DESCRIPTION_CACHE_MAX_SIZE", 5000))
+translation_cache_backend=os.environ.get("TRANSLATION_CACHE_BACKEND", "memory")
+translation_cache_ttl_seconds=int(os.environ.get("TRANSLATION_CACHE_TTL_SECONDS", 30*24*60*60))
+translation_cache_max_size=int(os.environ.get("TRANSLATION_CACHE_MAX_SIZE", 20000))
+answer_cache_backend=os.environ.get("ANSWER_CACHE_BACKEND", "memory")
+answer_cache_ttl_seconds=int(os.environ.get("ANSWER_CACHE_TTL_SECONDS", 24*60*60))
+answer_cache_max_size=int(os.environ.get("ANSWER_CACHE_MAX_SIZE", 1000))
+# Transcripts are worth keeping across workers and restarts: forwarded voice notes recur long after the first one
+transcription_cache_backend=os.environ.get("TRANSCRIPTION_CACHE_BACKEND", "mongo")
+transcription_cache_ttl_seconds=int(os.environ.get("TRANSCRIPTION_CACHE_TTL_SECONDS", 30*24*60*60))
+transcription_cache_max_size=int(os.environ.get("TRANSCRIPTION_CACHE_MAX_SIZE", 20000))
@@ -0,0 +1,8 @@
+from dotenv import load_dotenv
+import os
+load_dotenv()
+# Collapse concurrent identical model and translation calls into one upstream call
+request_coalescing_enabled=os.environ.get("REQUEST_COALESCING_ENABLED", "true").lower()=="true"
+# How long a caller waits on a call another request started before giving up
+llm_coalescing_timeout_seconds=float(os.environ.get("LLM_COALESCING_TIMEOUT_SECONDS", 60))
+translation_coalescing_timeout_seconds=float(os.environ.get("TRANSLATION_COALESCING_TIMEOUT_SECONDS", 30))
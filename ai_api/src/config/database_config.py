@@ -0,0 +1,22 @@
+from dotenv import load_dotenv
+import os
+load_dotenv()
+mongo_uri=os.environ.get("MONGO_URI")
+db_name=os.environ.get("DB_NAME", "controlRoomDB_dev")
+mongo_max_pool_size=int(os.environ.get("MONGO_MAX_POOL_SIZE", 50))
+mongo_min_pool_size=int(os.environ.get("MONGO_MIN_POOL_SIZE", 0))
+mongo_max_idle_time_ms=int(os.environ.get("MONGO_MAX_IDLE_TIME_MS", 5*60*1000))
+mongo_server_selection_timeout_ms=int(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", 10000))
+mongo_connect_timeout_ms=int(os.environ.get("MONGO_CONNECT_TIMEOUT_MS", 10000))
+mongo_socket_timeout_ms=int(os.environ.get("MONGO_SOCKET_TIMEOUT_MS", 30000))
+mongo_write_concern=os.environ.get("MONGO_WRITE_CONCERN", "majority")
+mongo_use_transactions=os.environ.get("MONGO_USE_TRANSACTIONS", "false").lower()=="true"
+mongo_client_options={
+    "maxPoolSize":mongo_max_pool_size,
+    "minPoolSize":mongo_min_pool_size,
+    "maxIdleTimeMS":mongo_max_idle_time_ms,
+    "serverSelectionTimeoutMS":mongo_server_selection_timeout_ms,
+    "connectTimeoutMS":mongo_connect_timeout_ms,
+    "socketTimeoutMS":mongo_socket_timeout_ms,
+    "w":int(mongo_write_concern) if mongo_write_concern.isdigit() else mongo_write_concern,
+}
@@ -0,0 +1,13 @@
+from dotenv import load_dotenv
+import os
+load_dotenv()
+log_level=os.environ.get("LOG_LEVEL", "INFO").upper()
+# json for structured logs in production, text for local development
+log_format=os.environ.get("LOG_FORMAT", "json")
+request_id_header=os.environ.get("REQUEST_ID_HEADER", "X-Request-ID")
+metrics_latency_buckets=[float(bucket) for bucket in os.environ.get(
+    "METRICS_LATENCY_BUCKETS", "0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10,30,60"
+).split(",")]
+metrics_token_buckets=[float(bucket) for bucket in os.environ.get(
+    "METRICS_TOKEN_BUCKETS", "50,100,250,500,1000,2000,4000,8000,16000"
+).split(",")]
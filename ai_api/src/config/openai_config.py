@@ -1,6 +1,9 @@
 from dotenv import load_dotenv
 import os
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 load_dotenv()
 api_key=os.environ.get("OPENAI_API_KEY")
-openai=OpenAI(api_key=api_key)
\ No newline at end of file
+openai=OpenAI(api_key=api_key)
+async_openai=AsyncOpenAI(api_key=api_key)
+assistant_run_timeout_seconds=float(os.environ.get("ASSISTANT_RUN_TIMEOUT_SECONDS", 60))
+assistant_thread_ttl_seconds=int(os.environ.get("ASSISTANT_THREAD_TTL_SECONDS", 24*60*60))
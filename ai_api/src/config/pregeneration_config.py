@@ -0,0 +1,14 @@
+from dotenv import load_dotenv
+import os
+load_dotenv()
+# Whether the signposting routes read pre-generated messages before generating any themselves; enable once the pre-generation job has run
+signposting_store_enabled=os.environ.get("SIGNPOSTING_STORE_ENABLED", "false").lower()=="true"
+# Bound on a store lookup, including server selection, so a slow or unreachable Mongo only costs this much per request
+signposting_store_timeout_seconds=float(os.environ.get("SIGNPOSTING_STORE_TIMEOUT_SECONDS", 0.2))
+# After a failed lookup, requests skip the store for this long and generate their messages live
+signposting_store_retry_seconds=float(os.environ.get("SIGNPOSTING_STORE_RETRY_SECONDS", 30))
+# Languages the pre-generation job translates messages into besides English, e.g. "cy,pl,ar"
+pregeneration_languages=[language.strip() for language in os.environ.get("PREGENERATION_LANGUAGES", "").split(",") if language.strip()]
+# Organisation/category groups processed at once; each group's model calls are bounded by SIGNPOSTING_MAX_CONCURRENCY
+pregeneration_group_concurrency=int(os.environ.get("PREGENERATION_GROUP_CONCURRENCY", 4))
+signposting_catalogue_collection=os.environ.get("SIGNPOSTING_CATALOGUE_COLLECTION", "signposting_data")
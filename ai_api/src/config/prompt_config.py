@@ -0,0 +1,14 @@
+from dotenv import load_dotenv
+import os
+load_dotenv()
+prompt_template_dir=os.environ.get("PROMPT_TEMPLATE_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "prompts"))
+# Pin a template to a version, e.g. "golding=1,alix=2"; unpinned templates use their latest version.
+# The default template stays on v1 (the original wording) until a deployment opts into v2 with "default=2"
+prompt_template_versions={
+    "default": 1,
+    **{
+        name.strip(): int(version) for name, version in
+        (pin.split("=", 1) for pin in os.environ.get("PROMPT_TEMPLATE_VERSIONS", "").split(",") if "=" in pin)
+    },
+}
+default_prompt_template=os.environ.get("DEFAULT_PROMPT_TEMPLATE", "default")
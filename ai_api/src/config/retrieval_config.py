@@ -0,0 +1,11 @@
+from dotenv import load_dotenv
+import os
+load_dotenv()
+# Directory the signposting index is persisted to; empty keeps the index in memory only
+signposting_index_dir=os.environ.get("SIGNPOSTING_INDEX_DIR", "")
+# Cap on the options sent to the model per request, after ranking; 0 sends every option in its original order
+signposting_max_options=int(os.environ.get("SIGNPOSTING_MAX_OPTIONS", 0))
+signposting_location_weight=float(os.environ.get("SIGNPOSTING_LOCATION_WEIGHT", 1.0))
+signposting_index_autosave_updates=int(os.environ.get("SIGNPOSTING_INDEX_AUTOSAVE_UPDATES", 1000))
+bm25_k1=float(os.environ.get("BM25_K1", 1.2))
+bm25_b=float(os.environ.get("BM25_B", 0.75))
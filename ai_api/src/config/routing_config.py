@@ -0,0 +1,24 @@
+from dotenv import load_dotenv
+import os
+from .vertexai_config import signposting_model_name
+load_dotenv()
+# Backends for signposting prompts in order of preference, as provider:model, e.g. "vertexai:gemini-1.5-flash-001,openai:gpt-4o-mini"
+signposting_model_routes=[
+    route.strip() for route in os.environ.get("SIGNPOSTING_MODEL_ROUTES", f"vertexai:{signposting_model_name}").split(",") if route.strip()
+]
+llm_hedging_enabled=os.environ.get("LLM_HEDGING_ENABLED", "true").lower()=="true"
+# Fixed delay before a slow call is hedged to the next backend; 0 uses the backend's recent p95 latency
+llm_hedge_after_seconds=float(os.environ.get("LLM_HEDGE_AFTER_SECONDS", 0))
+llm_hedge_min_seconds=float(os.environ.get("LLM_HEDGE_MIN_SECONDS", 0.5))
+llm_latency_window=int(os.environ.get("LLM_LATENCY_WINDOW", 200))
+llm_circuit_failure_threshold=int(os.environ.get("LLM_CIRCUIT_FAILURE_THRESHOLD", 5))
+llm_circuit_reset_seconds=float(os.environ.get("LLM_CIRCUIT_RESET_SECONDS", 30))
+# Requests per second allowed per backend, e.g. "vertexai:gemini-1.5-flash-001=10,openai:gpt-4o-mini=5"; unlisted backends are not limited
+llm_rate_limits={
+    route.strip(): float(rate) for route, rate in
+    (limit.rsplit("=", 1) for limit in os.environ.get("LLM_RATE_LIMITS", "").split(",") if "=" in limit)
+}
+llm_rate_limit_wait_seconds=float(os.environ.get("LLM_RATE_LIMIT_WAIT_SECONDS", 2))
+llm_max_retries=int(os.environ.get("LLM_MAX_RETRIES", 2))
+llm_backoff_base_seconds=float(os.environ.get("LLM_BACKOFF_BASE_SECONDS", 0.5))
+llm_backoff_max_seconds=float(os.environ.get("LLM_BACKOFF_MAX_SECONDS", 8))
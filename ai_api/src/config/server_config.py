@@ -0,0 +1,10 @@
+from dotenv import load_dotenv
+import os
+load_dotenv()
+port=int(os.environ.get("PORT", 8000))
+web_concurrency=int(os.environ.get("WEB_CONCURRENCY", 2))
+# Threads available per worker for blocking calls (pymongo, GCS, Translation v2) made from async handlers
+blocking_io_max_threads=int(os.environ.get("BLOCKING_IO_MAX_THREADS", 64))
+worker_timeout_seconds=int(os.environ.get("WORKER_TIMEOUT_SECONDS", 120))
+graceful_timeout_seconds=int(os.environ.get("GRACEFUL_TIMEOUT_SECONDS", 30))
+keepalive_seconds=int(os.environ.get("KEEPALIVE_SECONDS", 5))
@@ -1,2 +1,49 @@
 from google.cloud import speech
-transcribe_client=speech.SpeechClient()
\ No newline at end of file
+import os
+from dotenv import load_dotenv
+load_dotenv()
+transcribe_client=speech.SpeechClient()
+audio_download_chunk_size=int(os.environ.get("AUDIO_DOWNLOAD_CHUNK_SIZE", 64*1024))
+# GCS resumable uploads need chunks in multiples of 256 KiB
+audio_upload_chunk_size=int(os.environ.get("AUDIO_UPLOAD_CHUNK_SIZE", 1024*1024))
+inline_audio_max_bytes=int(os.environ.get("INLINE_AUDIO_MAX_BYTES", 1024*1024))
+media_download_timeout_seconds=float(os.environ.get("MEDIA_DOWNLOAD_TIMEOUT_SECONDS", 30))
+
+# Synchronous recognition is capped at ~1 minute of audio; ~160 KiB of WhatsApp Opus is comfortably under that
+long_running_min_bytes=int(os.environ.get("LONG_RUNNING_MIN_BYTES", 160*1024))
+transcription_poll_interval_seconds=float(os.environ.get("TRANSCRIPTION_POLL_INTERVAL_SECONDS", 5))
+
+# Transcription job queue: `mongo` for the durable shared queue, `memory` for a local in-process stand-in
+transcription_queue_backend=os.environ.get("TRANSCRIPTION_QUEUE_BACKEND", "mongo")
+transcription_workers=int(os.environ.get("TRANSCRIPTION_WORKERS", 8))
+transcription_queue_poll_seconds=float(os.environ.get("TRANSCRIPTION_QUEUE_POLL_SECONDS", 1))
+transcription_lease_seconds=float(os.environ.get("TRANSCRIPTION_LEASE_SECONDS", 300))
+transcription_max_attempts=int(os.environ.get("TRANSCRIPTION_MAX_ATTEMPTS", 5))
+transcription_retry_base_seconds=float(os.environ.get("TRANSCRIPTION_RETRY_BASE_SECONDS", 2))
+transcription_retry_max_seconds=float(os.environ.get("TRANSCRIPTION_RETRY_MAX_SECONDS", 300))
+
+# Clips up to this size are read into memory and hashed before anything is uploaded, so duplicates skip GCS entirely
+audio_buffer_max_bytes=int(os.environ.get("AUDIO_BUFFER_MAX_BYTES", 10*1024*1024))
+audio_blob_prefix=os.environ.get("AUDIO_BLOB_PREFIX", "audio/")
+
+# Recognition defaults when the request carries no language hints; Speech-to-Text accepts up to 3 alternative languages
+speech_language_code=os.environ.get("SPEECH_LANGUAGE_CODE", "en-US")
+speech_alternative_language_codes=[code.strip() for code in os.environ.get("SPEECH_ALTERNATIVE_LANGUAGE_CODES", "").split(",") if code.strip()]
+max_alternative_language_codes=3
+# Synchronous recognition rejects audio over 1 minute; clips whose probed duration is known are switched on this instead of size
+sync_recognition_max_seconds=float(os.environ.get("SYNC_RECOGNITION_MAX_SECONDS", 55))
+# How much of a clip too large to buffer is read before streaming it, to sniff its format
+audio_probe_bytes=int(os.environ.get("AUDIO_PROBE_BYTES", 64*1024))
+# Unsupported formats are transcoded to mono FLAC with ffmpeg, when it is installed
+ffmpeg_path=os.environ.get("FFMPEG_PATH", "ffmpeg")
+transcode_sample_rate_hertz=int(os.environ.get("TRANSCODE_SAMPLE_RATE_HERTZ", 16000))
+
+# Chunked transcription: long clips are split on silence and the segments recognised concurrently
+chunked_transcription_enabled=os.environ.get("CHUNKED_TRANSCRIPTION_ENABLED", "false").lower()=="true"
+chunked_transcription_min_seconds=float(os.environ.get("CHUNKED_TRANSCRIPTION_MIN_SECONDS", 90))
+transcription_segment_target_seconds=float(os.environ.get("TRANSCRIPTION_SEGMENT_TARGET_SECONDS", 30))
+# Segments are recognised with synchronous `recognize`, so they must stay under its 1 minute limit
+transcription_segment_max_seconds=float(os.environ.get("TRANSCRIPTION_SEGMENT_MAX_SECONDS", 55))
+transcription_segment_concurrency=int(os.environ.get("TRANSCRIPTION_SEGMENT_CONCURRENCY", 4))
+silence_threshold_dbfs=float(os.environ.get("SILENCE_THRESHOLD_DBFS", -35))
+silence_min_ms=int(os.environ.get("SILENCE_MIN_MS", 250))
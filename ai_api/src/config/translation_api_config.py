@@ -1,2 +1,7 @@
 from google.cloud import translate_v2 as translate
-translate_client = translate.Client()
\ No newline at end of file
+from dotenv import load_dotenv
+import os
+load_dotenv()
+translate_client = translate.Client()
+# Streamed texts arriving within this long of the first untranslated one are translated in the same request
+stream_translation_window_seconds=float(os.environ.get("STREAM_TRANSLATION_WINDOW_SECONDS", 0.2))
@@ -2,4 +2,9 @@ from dotenv import load_dotenv
 import os
 load_dotenv()
 vertexai_project_location=os.environ.get("GOOGLE_PROJECT_LOCATION")
-vertex_ai_project_id=os.environ.get("GOOGLE_PROJECT_ID")
\ No newline at end of file
+vertex_ai_project_id=os.environ.get("GOOGLE_PROJECT_ID")
+signposting_max_concurrency=int(os.environ.get("SIGNPOSTING_MAX_CONCURRENCY", 8))
+signposting_mode=os.environ.get("SIGNPOSTING_MODE", "per_option")
+signposting_batch_token_budget=int(os.environ.get("SIGNPOSTING_BATCH_TOKEN_BUDGET", 6000))
+signposting_model_name=os.environ.get("SIGNPOSTING_MODEL_NAME", "gemini-1.5-flash-001")
+vertexai_model_names=[model_name.strip() for model_name in os.environ.get("VERTEXAI_MODEL_NAMES", signposting_model_name).split(",") if model_name.strip()]
\ No newline at end of file
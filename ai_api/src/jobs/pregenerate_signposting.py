@@ -0,0 +1,104 @@
+"""
+Batch job: pre-generate the signposting messages of the organisation catalogue, in English and in
+`PREGENERATION_LANGUAGES`, and write them to the `signposting_messages` store that the signposting routes read first.
+Run it on a schedule (cron, Cloud Scheduler) or after the catalogue changes; only options that changed since the last
+run are sent to the model and the Translation API.
+
+The catalogue is read from the `signposting_data` collection and grouped by organisation (the lower-cased
+`organizationName`, e.g. `alix`) and by each of an option's `category_tags`. Alternatively it can come from a JSON file
+holding a list of `{"organisation": ..., "category": ..., "options": [...]}` groups.
+
+Usage (from the ai_api directory):
+    python -m src.jobs.pregenerate_signposting
+    python -m src.jobs.pregenerate_signposting --organisation alix --languages cy,pl
+    python -m src.jobs.pregenerate_signposting --catalogue catalogue.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import re
+from typing import Any, Dict, List, Optional
+from pydantic import ValidationError
+from ..config.pregeneration_config import pregeneration_languages, pregeneration_group_concurrency, signposting_catalogue_collection
+from ..config.vertexai_config import signposting_model_name
+from ..models.SignpostingRequest import SignpostingOption
+from ..services.DatabaseService import DatabaseService, DB_NAME, close_mongo_client
+from ..services.PromptTemplateService import prompt_registry
+from ..services.ServiceRegistry import registry
+from ..services.SignpostingPregenerationService import SignpostingPregenerator
+
+
+def normalise_option(document: Dict[str, Any])->Optional[Dict[str, Any]]:
+    # Options must have the shape the routes see, or their content hashes will not match
+    try:
+        return SignpostingOption(**document).model_dump(by_alias=True)
+    except ValidationError as e:
+        logging.warning(f"Skipping catalogue entry {document.get('name')}: {e.error_count()} invalid fields")
+        return None
+
+
+def load_catalogue_from_db(organisation: Optional[str]=None)->List[Dict[str, Any]]:
+    query={"organizationName": {"$regex": f"^{re.escape(organisation)}$", "$options": "i"}} if organisation else {}
+    groups={}
+    for document in DatabaseService(DB_NAME).db[signposting_catalogue_collection].find(query, {"_id": 0}):
+        option=normalise_option(document)
+        if option is None:
+            continue
+        for category in option["category_tags"]:
+            groups.setdefault((option["organizationName"].lower(), category), []).append(option)
+    return [{"organisation": name, "category": category, "options": options} for (name, category), options in groups.items()]
+
+
+def load_catalogue_from_file(path: str, organisation: Optional[str]=None)->List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as catalogue_file:
+        groups=json.load(catalogue_file)
+    return [
+        {"organisation": group["organisation"], "category": group["category"], "options": [option for option in map(normalise_option, group["options"]) if option is not None]}
+        for group in groups if organisation is None or group["organisation"]==organisation
+    ]
+
+
+async def pregenerate_catalogue(groups: List[Dict[str, Any]], languages: List[str], group_concurrency: int=pregeneration_group_concurrency)->List[Dict[str, Any]]:
+    """
+    Pre-generate every group, at most `group_concurrency` at a time. A failed group is logged and skipped.
+
+    Returns:
+        list[dict]: The stats of each group that completed.
+    """
+    pregenerator=SignpostingPregenerator(registry.get_vertexai_service(signposting_model_name), registry.get_signposting_store(), registry.get_translation_service)
+    semaphore=asyncio.Semaphore(max(1, group_concurrency))
+
+    async def run(group):
+        async with semaphore:
+            try:
+                return await pregenerator.pregenerate_async(group["organisation"], group["category"], group["options"], languages)
+            except Exception as e:
+                logging.error(f"Error pre-generating {group['organisation']}/{group['category']}: {e}")
+                return None
+    results=await asyncio.gather(*(run(group) for group in groups))
+    return [result for result in results if result is not None]
+
+
+def main():
+    parser=argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--catalogue", help="JSON file of catalogue groups; defaults to the signposting_data collection")
+    parser.add_argument("--organisation", help="only pre-generate this organisation")
+    parser.add_argument("--languages", help="comma-separated languages besides English; defaults to PREGENERATION_LANGUAGES")
+    parser.add_argument("--group-concurrency", type=int, default=pregeneration_group_concurrency)
+    args=parser.parse_args()
+    languages=[language.strip() for language in args.languages.split(",") if language.strip()] if args.languages is not None else pregeneration_languages
+    try:
+        prompt_registry.load()
+        registry.get_signposting_store().ensure_indexes()
+        groups=load_catalogue_from_file(args.catalogue, args.organisation) if args.catalogue else load_catalogue_from_db(args.organisation)
+        results=asyncio.run(pregenerate_catalogue(groups, languages, args.group_concurrency))
+        totals={key: sum(result[key] for result in results) for key in ["options", "unchanged", "generated", "failed", "removed"]}
+        translated=sum(sum(result["translated"].values()) for result in results)
+        print(f"Pre-generated {len(results)} of {len(groups)} groups: {totals}, {translated} translations")
+    finally:
+        close_mongo_client()
+
+
+if __name__=="__main__":
+    main()
@@ -1,9 +1,91 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from .routes import llm, tasks, health
+from .routes import llm, tasks, health, metrics as metrics_route
+from .services.ServiceRegistry import registry
+from .services.DatabaseService import get_mongo_client, close_mongo_client
+from .services.TranscriptionJobService import TranscriptionJobPoller, TranscriptionWorkerPool
+from .config.server_config import blocking_io_max_threads
+from .config.observability_config import request_id_header
+from .services.LoggingService import configure_logging, request_id_var
+from .services.MetricsService import metrics
+from concurrent.futures import ThreadPoolExecutor
+import anyio.to_thread
+import asyncio
+import threading
+import time
+import uuid
 
 
-app = FastAPI()
+def configure_blocking_io_threads(max_threads: int):
+    """
+    Size the thread pools that blocking calls from async handlers run on: asyncio's default executor (used by
+    `asyncio.to_thread`) and anyio's limiter (used by Starlette for sync dependencies and background tasks).
+    """
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="blocking-io"))
+    anyio.to_thread.current_default_thread_limiter().total_tokens=max_threads
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    configure_blocking_io_threads(blocking_io_max_threads)
+    get_mongo_client()
+    # Initialise in the background so /health answers straight away and /health/ready reports when the worker is warm
+    threading.Thread(target=registry.initialise, daemon=True).start()
+    transcription_job_poller=TranscriptionJobPoller(registry.get_transcription_job_service)
+    transcription_job_poller.start()
+    transcription_worker_pool=TranscriptionWorkerPool(registry.get_transcription_job_service)
+    transcription_worker_pool.start()
+    yield
+    await transcription_worker_pool.stop()
+    transcription_job_poller.stop()
+    registry.shutdown()
+    close_mongo_client()
+
+
+configure_logging()
+app = FastAPI(lifespan=lifespan)
+
+
+@app.middleware("http")
+async def track_request(request: Request, call_next):
+    """
+    Tag the request with an id (the caller's `X-Request-ID` if sent), make it available to log records for the
+    request and any background work it starts, echo it in the response, and record the request's latency. The latency
+    runs until the response body has been sent, so streamed (NDJSON) responses are timed to their last line rather
+    than to their headers.
+    """
+    request_id=request.headers.get(request_id_header) or uuid.uuid4().hex
+    token=request_id_var.set(request_id)
+    start=time.perf_counter()
+
+    def observe(status_code):
+        route=request.scope.get("route")
+        metrics.http_request_duration.observe(
+            time.perf_counter()-start,
+            method=request.method,
+            route=route.path if route is not None else "unmatched",
+            status=str(status_code),
+        )
+    try:
+        try:
+            response=await call_next(request)
+        except Exception:
+            observe(500)
+            raise
+        response.headers[request_id_header]=request_id
+        body_iterator=response.body_iterator
+
+        async def send_body():
+            try:
+                async for chunk in body_iterator:
+                    yield chunk
+            finally:
+                observe(response.status_code)
+        response.body_iterator=send_body()
+        return response
+    finally:
+        request_id_var.reset(token)
 
 origins=[
   "http://localhost:8080", "https://ai-signposting.nw.r.appspot.com", "http://localhost:3000"
@@ -17,10 +99,11 @@ app.add_middleware(
    allow_headers=["*"],)
 
 @app.get("/")
-def main():
+async def main():
     return {"message": "Hello World"}
 
 
 app.include_router(llm.router)
 app.include_router(tasks.router)
 app.include_router(health.router)
+app.include_router(metrics_route.router)
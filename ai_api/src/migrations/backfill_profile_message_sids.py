@@ -0,0 +1,23 @@
+"""
+One-off migration: create the transcription lookup indexes and backfill `profileMessageSids` on existing contacts,
+so `DatabaseService.update_message_text` can find a contact by message SID through an index.
+
+Usage (from the ai_api directory):
+    python -m src.migrations.backfill_profile_message_sids
+"""
+from ..services.DatabaseService import DatabaseService, DB_NAME, close_mongo_client
+
+
+def main():
+    db_service=DatabaseService(DB_NAME)
+    try:
+        db_service.ensure_indexes()
+        print("Indexes created")
+        updated=db_service.backfill_profile_message_sids()
+        print(f"Backfilled profileMessageSids on {updated} contacts")
+    finally:
+        close_mongo_client()
+
+
+if __name__=="__main__":
+    main()
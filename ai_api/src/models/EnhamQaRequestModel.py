@@ -1,5 +1,7 @@
 from pydantic import BaseModel
+from typing import Optional
 
 
 class EnhamQaRequestModel(BaseModel):
-    user_message: str
\ No newline at end of file
+    user_message: str
+    conversation_key: Optional[str]=None
\ No newline at end of file
@@ -16,6 +16,7 @@ class SignpostingRequest(BaseModel):
     options:List[SignpostingOption]
     language:str
     category:str
-
-
-    
\ No newline at end of file
+    # Used to rank and cap the options before they reach the model; query defaults to the category
+    query:Optional[str]=None
+    postcode:Optional[str]=None
+    max_options:Optional[int]=None
@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from .SignpostingRequest import SignpostingOption
+class SignpostingWarmupRequest(BaseModel):
+    options:List[SignpostingOption]
+    category:str
+    organisation:Optional[str]=None
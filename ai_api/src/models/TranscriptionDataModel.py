@@ -1,7 +1,10 @@
 from pydantic import BaseModel
+from typing import List, Optional
 
 class TranscriptionDataModel(BaseModel):
     MediaUrl0: str
     MessageSid: str
+    language_code: Optional[str]=None
+    alternative_language_codes: Optional[List[str]]=None
+    partial_results: bool=False
 
-    
\ No newline at end of file
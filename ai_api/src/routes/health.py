@@ -1,9 +1,39 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from ..services.CacheService import caches
+from ..services.ServiceRegistry import registry
+from ..services.DatabaseService import get_pool_stats
+import asyncio
 import time
 router=APIRouter(prefix='/health')
 @router.get("")
-def health_check():
+async def health_check():
     response={
         "status":"ok", "timestamp":time.time()
     }
     return response
+
+@router.get("/cache")
+async def cache_stats():
+    # Mongo-backed caches count their documents, so collect the stats off the event loop
+    cache_stats=await asyncio.to_thread(lambda: {name: cache.get_stats() for name, cache in caches.items()})
+    response={
+        "status":"ok", "timestamp":time.time(), "caches":cache_stats
+    }
+    return response
+
+@router.get("/ready")
+async def readiness_check():
+    services=registry.get_status()
+    response={
+        "status":"ok" if services["ready"] else "initialising", "timestamp":time.time(), "services":services
+    }
+    return JSONResponse(content=response, status_code=200 if services["ready"] else 503)
+
+@router.get("/database")
+async def database_check():
+    pool=await asyncio.to_thread(get_pool_stats)
+    response={
+        "status":pool["status"], "timestamp":time.time(), "pool":pool
+    }
+    return JSONResponse(content=response, status_code=200 if pool["status"]=="ok" else 503)
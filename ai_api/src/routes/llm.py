@@ -1,52 +1,155 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
 from ..models.EnhamQaRequestModel import EnhamQaRequestModel
 from ..models.SignpostingRequest import SignpostingRequest
+from ..models.SignpostingWarmupRequest import SignpostingWarmupRequest
 from ..services.AI_Service import VertexAI_Service, OpenAI_Service
-from ..services.TranslationService import TranslationService
+from ..services.ServiceRegistry import registry, get_signposting_service, get_openai_service
+from ..config.retrieval_config import signposting_max_options
+from ..config.pregeneration_config import signposting_store_enabled
+import asyncio
+import json
 import logging
 router=APIRouter(
     prefix='/llm'
 )
 
-@router.post("/signposting-golding")
-def create_signposting_messages(request_body: SignpostingRequest):
+async def select_signposting_options(request_body: SignpostingRequest):
+    """
+    Return the options to describe, with each one's index in `request_body.options`.
+
+    When `max_options` (or `SIGNPOSTING_MAX_OPTIONS`) is set, the options are first ranked by relevance to the query
+    and closeness to the postcode, and only the best are described.
+    """
     options=[option.model_dump(by_alias=True) for option in request_body.options]
+    indices=list(range(len(options)))
+    max_options=request_body.max_options or signposting_max_options
+    if max_options and len(options)>max_options:
+        positions={id(option): index for index, option in enumerate(options)}
+        options=await asyncio.to_thread(registry.get_signposting_index().rank_options, options, request_body.query or request_body.category, request_body.postcode, max_options)
+        indices=[positions[id(option)] for option in options]
+    return options, indices
+
+async def get_stored_signposting_messages(organisation: str, request_body: SignpostingRequest, options, llm_service: VertexAI_Service):
+    """
+    Return the pre-generated message of each option in the request's language, or None where the store has no current
+    entry. Entries are looked up under the catalogue tag the options were selected by, as the job stores them, rather
+    than the category the flow sent. Every option is None when `SIGNPOSTING_STORE_ENABLED` is off.
+    """
+    if not signposting_store_enabled:
+        return [None]*len(options)
+    store=registry.get_signposting_store()
+    template=llm_service.prompt_templates.get(organisation)
+    category=store.resolve_category(request_body.category, options)
+    return await asyncio.to_thread(store.get_messages, organisation, category, request_body.language, options, template, llm_service.model_name)
+
+async def create_organisation_signposting_messages(organisation: str, request_body: SignpostingRequest, llm_service: VertexAI_Service):
+    """
+    Describe the requested options with the organisation's prompt template and translate them if needed.
+
+    Pre-generated messages are read from the store first; only the options it has no current entry for are described
+    and translated. `indices` gives the index in the request of each message in `data`, as ranking may cap and reorder
+    the options.
+    """
     try:
-        llm_service=VertexAI_Service("vertexai", "gemini-1.5-flash-001")
-        messages=llm_service.describe_signposting_options(options, request_body.category)
-        if (request_body.language!="en"):
-            messages=[TranslationService(request_body.language).translate_text(message) for message in messages]
-        print(len(messages))
-        return {"message": "success", "data":messages}
+        options, indices=await select_signposting_options(request_body)
+        messages=await get_stored_signposting_messages(organisation, request_body, options, llm_service)
+        missing_indices=[index for index, message in enumerate(messages) if message is None]
+        if missing_indices:
+            generated=await llm_service.describe_signposting_options([options[index] for index in missing_indices], request_body.category, organisation)
+            if (request_body.language!="en"):
+                generated=await registry.get_translation_service(request_body.language).translate_batch_async(generated)
+            for index, message in zip(missing_indices, generated):
+                messages[index]=message
+        logging.debug(f"Created {len(messages)} {organisation} signposting messages")
+        return {"message": "success", "data":messages, "indices":indices}
     except Exception as e:
         logging.error(f"An error occurred in LLM Service: {e}")
-        return {"message":"error", "data":[]}
+        return {"message":"error", "data":[], "indices":[]}
+
+async def stream_organisation_signposting_messages(organisation: str, request_body: SignpostingRequest, llm_service: VertexAI_Service):
+    """
+    Stream the organisation's signposting messages as NDJSON. The first line, `{"indices": [...]}`, lists the indices
+    of the options selected for description (all of them unless ranking capped the list). Then there is one line per
+    option as soon as it is described and translated, `{"index": i, "data": message}`, where `i` is the option's index
+    in the request; pre-generated messages come first, and translations are batched over
+    `STREAM_TRANSLATION_WINDOW_SECONDS`. A last line, `{"message": "success"|"error", "done": true}`, marks the end, so
+    a client can tell a finished stream from a dropped one and fall back for any selected option it did not receive.
+    """
+    async def stream_messages():
+        try:
+            options, indices=await select_signposting_options(request_body)
+            yield json.dumps({"indices":indices})+"\n"
+            stored=await get_stored_signposting_messages(organisation, request_body, options, llm_service)
+            for position, message in enumerate(stored):
+                if message is not None:
+                    yield json.dumps({"index":indices[position], "data":message})+"\n"
+            missing_positions=[position for position, message in enumerate(stored) if message is None]
+            if missing_positions:
+                messages=llm_service.stream_signposting_options([options[position] for position in missing_positions], request_body.category, organisation)
+                if request_body.language!="en":
+                    messages=registry.get_translation_service(request_body.language).translate_stream_async(messages)
+                async for position, message in messages:
+                    yield json.dumps({"index":indices[missing_positions[position]], "data":message})+"\n"
+            yield json.dumps({"message":"success", "done":True})+"\n"
+        except Exception as e:
+            logging.error(f"An error occurred streaming from LLM Service: {e}")
+            yield json.dumps({"message":"error", "done":True})+"\n"
+
+    return StreamingResponse(stream_messages(), media_type="application/x-ndjson")
+
+@router.post("/signposting-golding")
+async def create_golding_signposting_messages(request_body: SignpostingRequest, llm_service: VertexAI_Service=Depends(get_signposting_service)):
+    return await create_organisation_signposting_messages("golding", request_body, llm_service)
+
+@router.post("/signposting-golding/stream")
+async def stream_golding_signposting_messages(request_body: SignpostingRequest, llm_service: VertexAI_Service=Depends(get_signposting_service)):
+    return await stream_organisation_signposting_messages("golding", request_body, llm_service)
 
 @router.post("/signposting-alix")
-def create_signposting_messages(request_body: SignpostingRequest):
+async def create_alix_signposting_messages(request_body: SignpostingRequest, llm_service: VertexAI_Service=Depends(get_signposting_service)):
+    return await create_organisation_signposting_messages("alix", request_body, llm_service)
+
+@router.post("/signposting-alix/stream")
+async def stream_alix_signposting_messages(request_body: SignpostingRequest, llm_service: VertexAI_Service=Depends(get_signposting_service)):
+    return await stream_organisation_signposting_messages("alix", request_body, llm_service)
+
+@router.get("/prompt-templates")
+async def list_prompt_templates(llm_service: VertexAI_Service=Depends(get_signposting_service)):
+    """
+    Lists the loaded signposting prompt templates and versions, marking the version each name currently resolves to.
+    """
+    return {"message": "success", "data":llm_service.prompt_templates.list_templates()}
+
+@router.post("/signposting-cache/warm")
+async def warm_signposting_cache(request_body: SignpostingWarmupRequest, llm_service: VertexAI_Service=Depends(get_signposting_service)):
     options=[option.model_dump(by_alias=True) for option in request_body.options]
     try:
-        llm_service=VertexAI_Service("vertexai", "gemini-1.5-flash-001")
-        messages=llm_service.describe_signposting_options(options, request_body.category)
-        if (request_body.language!="en"):
-            messages=[TranslationService(request_body.language).translate_text(message) for message in messages]
-        print(len(messages))
-        return {"message": "success", "data":messages}
+        result=await llm_service.warm_description_cache(options, request_body.category, request_body.organisation)
+        return {"message": "success", "data":result}
     except Exception as e:
-        logging.error(f"An error occurred in LLM Service: {e}")
-        return {"message":"error", "data":[]}
-
+        logging.error(f"An error occurred warming the signposting cache: {e}")
+        return {"message":"error", "data":None}
 
 @router.post("/enham-qa")
-def answer_enham_qa(request_body: EnhamQaRequestModel):
-    llm=OpenAI_Service("openai")
+async def answer_enham_qa(request_body: EnhamQaRequestModel, llm: OpenAI_Service=Depends(get_openai_service)):
     try:
-        thread_id=llm.create_thread(user_message=request_body.user_message)
-        response=llm.create_run("enham", thread_id)
-        return {"message":"success", "data":response.data[0].content[0].text.value}
+        response=await llm.answer_question_async("enham", request_body.user_message, request_body.conversation_key)
+        return {"message":"success", "data":response}
     except Exception as e:
         logging.error(f"Error occurred in Enham Assistant service: {e}")
         return {
             "message":"error", 
             "data":None
         }
+
+@router.post("/enham-qa/stream")
+async def stream_enham_qa(request_body: EnhamQaRequestModel, llm: OpenAI_Service=Depends(get_openai_service)):
+    async def stream_answer():
+        try:
+            async for text in llm.stream_answer("enham", request_body.user_message, request_body.conversation_key):
+                yield text
+        except Exception as e:
+            logging.error(f"Error occurred streaming Enham Assistant answer: {e}")
+
+    return StreamingResponse(stream_answer(), media_type="text/plain")
@@ -1,61 +1,87 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from ..models.TranscriptionDataModel import TranscriptionDataModel
-from ..services.SpeechToTextService import SpeechToTextService
-from ..services.DatabaseService import get_database_service, DatabaseService    
+from ..services.TranscriptionJobService import TranscriptionJobService
+from ..services.ServiceRegistry import get_transcription_job_service
 from pymongo import errors
+import asyncio
 router=APIRouter(prefix="/tasks")
 
-@router.post("/transcription")
-def create_transcription(
+@router.post("/transcription", status_code=status.HTTP_202_ACCEPTED)
+async def create_transcription(
     request_body: TranscriptionDataModel,
-    db_service: DatabaseService = Depends(get_database_service),
+    job_service: TranscriptionJobService = Depends(get_transcription_job_service),
 ):
     """
-    Creates a transcription from a media URL and updates the database with the transcription and its storage URI.
+    Queues a transcription job for a media URL and returns its job id without waiting for the transcription.
 
     This endpoint processes a transcription request by:
-    - Fetching audio from the given media URL.
-    - Transcribing the audio using the `SpeechToTextService`.
+    - Queueing a job keyed by the message's SID in the `transcription_jobs` collection. A job that already exists for
+      the SID (e.g. a Cloud Tasks retry) is returned as is instead of being queued again.
+    - A `TranscriptionWorkerPool` worker then fetches the audio from the given media URL, probes its format (transcoding
+      it only if Speech-to-Text cannot read it) and stores it in GCS.
+    - Transcribing the audio using the `SpeechToTextService`: synchronously for short clips, in concurrent segments for
+      long clips when chunked transcription is enabled, or otherwise with long-running recognition for long clips, in
+      which case the job is completed by the `TranscriptionJobPoller`.
     - Storing the transcription text and its associated GCS (Google Cloud Storage) URI in the database.
 
     Args:
-        request_body (TranscriptionDataModel): The request payload containing the media URL and message SID.
-        db_service (DatabaseService, optional): An instance of the `DatabaseService` to handle database operations. Injected using `Depends`.
+        request_body (TranscriptionDataModel): The request payload containing the media URL and message SID, and
+            optionally the speaker's `language_code` and `alternative_language_codes`, and `partial_results` to have a
+            long clip's transcript so far reported by `GET /tasks/transcription/{job_id}` while it is recognised in segments.
+        job_service (TranscriptionJobService, optional): The worker's shared `TranscriptionJobService`. Injected using `Depends`.
 
     Returns:
-        dict: A JSON response containing the success message and status code.
+        dict: A JSON response containing the job id, its current status, whether it was a duplicate, and the status code.
 
     Raises:
-        HTTPException: If a database error occurs or any other exception is raised during processing.
+        HTTPException: If the job cannot be recorded in the database.
 
     Example Request:
         {
             "MediaUrl0": "https://example.com/audio-file.mp3",
-            "MessageSid": "SMXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXX"
+            "MessageSid": "SMXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXX",
+            "language_code": "en-GB",
+            "alternative_language_codes": ["cy-GB", "pl-PL"]
         }
 
     Example Response:
         {
-            "message": "Message updated successfully with TranscriptionText",
-            "status": 200
+            "message": "Transcription job accepted",
+            "job_id": "SMXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXXX",
+            "job_status": "pending",
+            "duplicate": false,
+            "status": 202
         }
 
     External References:
-        - :py:meth:`~services.SpeechToTextService.handle_transcription`: Handles the audio transcription process.
-        - :py:meth:`~services.DatabaseService.update_message_text`: Updates the transcription and URI in the MongoDB database.
+        - :py:meth:`~services.TranscriptionJobService.process_job`: Prepares the audio and starts recognition.
+        - :py:meth:`~services.DatabaseService.update_message_texts`: Updates the transcription and URI in the MongoDB database.
     """
-    media_url=request_body.MediaUrl0
-    message_sid=request_body.MessageSid
-    speech_to_text_service=SpeechToTextService()
     try:
-        # Generate transcription and GCS URI using the transcription service
-        transcription, gcs_uri=speech_to_text_service.handle_transcription(media_url)
-        print(gcs_uri)
-        db_service.update_message_text(message_sid, transcription, gcs_uri)
-        return {"message": f"Message updated successfully with {transcription}", "status": 200}
+        job, created=await asyncio.to_thread(
+            job_service.create_job, request_body.MessageSid, request_body.MediaUrl0, request_body.language_code,
+            request_body.alternative_language_codes, request_body.partial_results,
+        )
     except errors.PyMongoError as db_error: 
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error in database: {db_error}")
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"An error occurred: {e}")
+    if created:
+        job_service.job_enqueued.set()
+    return {"message": "Transcription job accepted", "job_id": job["_id"], "job_status": job["status"], "duplicate": not created, "status": 202}
 
-    
+
+@router.get("/transcription/{job_id}")
+async def get_transcription_job(
+    job_id: str,
+    job_service: TranscriptionJobService = Depends(get_transcription_job_service),
+):
+    """
+    Returns the state of a transcription job: `pending`, `running`, `recognising`, `completed` or `failed`, with the transcription once completed.
+    """
+    try:
+        job=await asyncio.to_thread(job_service.get_job, job_id)
+    except errors.PyMongoError as db_error: 
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error in database: {db_error}")
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Transcription job {job_id} not found")
+    job["job_id"]=job.pop("_id")
+    return {"message": "success", "data": job}
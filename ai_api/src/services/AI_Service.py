@@ -1,20 +1,45 @@
 from dotenv import load_dotenv
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
 import vertexai
-from ..config.openai_config import openai
+from ..config.openai_config import openai, async_openai, assistant_run_timeout_seconds, assistant_thread_ttl_seconds
+from openai import NotFoundError
 from abc import ABC
-import json
 from vertexai.generative_models import (
     Content,
     FunctionDeclaration,
     Part,
-    Tool, GenerativeModel
+    Tool, ToolConfig, GenerativeModel
 )
-from ..config.vertexai_config import vertexai_project_location, vertex_ai_project_id
+from ..config.vertexai_config import vertexai_project_location, vertex_ai_project_id, signposting_max_concurrency, signposting_mode, signposting_batch_token_budget
+from .CacheService import CacheService, description_cache, answer_cache
+from .MetricsService import metrics
+from .ModelRouterService import ModelRouter
+from .RequestCoalescingService import model_flights
+from .PromptTemplateService import PromptTemplate, PromptTemplateRegistry, prompt_registry, estimate_tokens, prompt_usage_var
+import asyncio
+import json
+import logging
 import os
+import re
+import threading
 import time
+import weakref
 load_dotenv()
 ENHAM_ASSISTANT_ID=os.environ.get("ENHAM_ASSISTANT_ID")
+vertexai_init_lock=threading.Lock()
+# The function calling mode and allowed names of each tool config built by `create_tool_config`, for request keys
+tool_config_descriptions: "weakref.WeakKeyDictionary[ToolConfig, Dict[str, Any]]"=weakref.WeakKeyDictionary()
+vertexai_initialised=False
+
+def init_vertexai():
+    """
+    Initialise the Vertex AI SDK once per process.
+    """
+    global vertexai_initialised
+    with vertexai_init_lock:
+        if not vertexai_initialised:
+            vertexai.init(project=vertex_ai_project_id, location=vertexai_project_location)
+            vertexai_initialised=True
 
 class AI_Service(ABC):
     """
@@ -29,22 +54,78 @@ class AI_Service(ABC):
 
     def create_model(self, model_source, model_name=None):
         if model_source == "vertexai":
-            vertexai.init(project=vertex_ai_project_id, location=vertexai_project_location)
+            init_vertexai()
             return GenerativeModel(model_name)
         elif model_source=="openai":
             return openai
         else:
             raise ValueError(f"Unsupported model source: {model_source}")
+
+    @staticmethod
+    def create_backend(route: str, model=None):
+        """
+        Create a model router backend from a `provider:model` route.
+
+        Args:
+            route (str): E.g. `vertexai:gemini-1.5-flash-001` or `openai:gpt-4o-mini`.
+            model (GenerativeModel, optional): An existing Vertex AI model to reuse for the route.
+        """
+        provider, _, model_name=route.partition(":")
+        if provider=="vertexai":
+            return VertexAIBackend(model_name, model)
+        elif provider=="openai":
+            return OpenAIChatBackend(model_name)
+        else:
+            raise ValueError(f"Unsupported model source: {provider}")
         
 class VertexAI_Service(AI_Service):
     """
     Service for interacting with Vertex AI generative models. Provides methods for creating prompts, defining tools, and processing messages.
 
+    Signposting prompts come from `prompt_registry`: each organisation may have its own versioned template, which also
+    decides which option fields reach the model and how many tokens each option may take.
+
+    Async model calls go through a `ModelRouter` over `routes` (by default just this model), which hedges slow calls,
+    fails over to the next route, retries quota errors and skips backends whose circuit is open.
+
     Inherits:
         AI_Service
     """
-    def __init__(self, model_source: str, model_name:str):
+    SIGNPOSTING_GENERATION_CONFIG={"temperature":0.6}
+    SIGNPOSTING_BATCH_FUNCTION={
+        "func_name":"record_signposting_descriptions",
+        "func_description":"Record the description written for each organization, keyed by the organization's index.",
+        "func_params":{
+            "type":"object",
+            "properties":{
+                "descriptions":{
+                    "type":"array",
+                    "items":{
+                        "type":"object",
+                        "properties":{
+                            "index":{"type":"integer", "description":"The index of the organization in the input list"},
+                            "description":{"type":"string", "description":"The description of the organization"}
+                        },
+                        "required":["index", "description"]
+                    }
+                }
+            },
+            "required":["descriptions"]
+        }
+    }
+
+    def __init__(self, model_source: str, model_name:str, max_concurrency:int=signposting_max_concurrency, mode:str=signposting_mode, batch_token_budget:int=signposting_batch_token_budget, description_cache:Optional[CacheService]=description_cache, prompt_templates:PromptTemplateRegistry=prompt_registry, routes:Optional[List[str]]=None):
         super().__init__(model_source, model_name)
+        self.model_name=model_name
+        primary_route=f"vertexai:{model_name}"
+        self.router=ModelRouter([
+            self.create_backend(route, self.model if route==primary_route else None) for route in (routes or [primary_route])
+        ])
+        self.max_concurrency=max_concurrency
+        self.mode=mode
+        self.batch_token_budget=batch_token_budget
+        self.description_cache=description_cache
+        self.prompt_templates=prompt_templates
 
     @staticmethod
     def create_user_prompt(prompt_text:str)->Content:
@@ -87,7 +168,8 @@ class VertexAI_Service(AI_Service):
         )
         return func
     
-    def create_tool(self, function_dictionaries: List[Dict[str, Any]]) -> List[Tool]:
+    @classmethod
+    def create_tool(cls, function_dictionaries: List[Dict[str, Any]]) -> List[Tool]:
         """
         Create tools from a list of function dictionaries.
 
@@ -99,10 +181,30 @@ class VertexAI_Service(AI_Service):
         """
         function_declarations=[]
         for dictionary in function_dictionaries:
-            func_declaration=self.create_func_declaration(dictionary["func_name"], dictionary["func_description"], dictionary["func_params"])
+            func_declaration=cls.create_func_declaration(dictionary["func_name"], dictionary["func_description"], dictionary["func_params"])
             function_declarations.append(func_declaration)
         tool = Tool(function_declarations=function_declarations)
         return [tool]
+
+    @staticmethod
+    def create_tool_config(function_names: List[str]) -> ToolConfig:
+        """
+        Create a tool config that forces the model to call one of the given functions.
+
+        Args:
+            function_names (list[str]): The names of the functions the model may call.
+
+        Returns:
+            ToolConfig: The tool config object.
+        """
+        tool_config=ToolConfig(
+            function_calling_config=ToolConfig.FunctionCallingConfig(
+                mode=ToolConfig.FunctionCallingConfig.Mode.ANY,
+                allowed_function_names=function_names,
+            )
+        )
+        tool_config_descriptions[tool_config]={"mode":"ANY", "allowed_function_names":list(function_names)}
+        return tool_config
     
     def get_model_response(
         self,
@@ -110,6 +212,7 @@ class VertexAI_Service(AI_Service):
         generation_config: Dict[str, Any],
         use_tool: bool = False,
         function_dictionaries: Optional[List[Dict[str, Any]]] = None,
+        tool_config: Optional[ToolConfig] = None,
     ) -> Any:
         """
         Generate a response from the model using a prompt and configuration.
@@ -119,6 +222,7 @@ class VertexAI_Service(AI_Service):
             generation_config (dict): Configuration for content generation (e.g., temperature).
             use_tool (bool, optional): Whether to use tools in the generation. Defaults to False.
             function_dictionaries (list[dict], optional): Metadata for tools, if tools are used. Defaults to None.
+            tool_config (ToolConfig, optional): Function calling config, if tools are used. Defaults to None.
 
         Returns:
             Any: The generated content or function call output.
@@ -126,18 +230,77 @@ class VertexAI_Service(AI_Service):
         Raises:
             ValueError: If `use_tool` is True but no `function_dictionaries` are provided.
         """
+        user_prompt, tools=self.create_model_request(prompt_text, use_tool, function_dictionaries)
+
+        def generate():
+            with metrics.track_stage("vertexai.generate", self.model_name):
+                response = self.model.generate_content(
+                user_prompt,
+                generation_config=generation_config,
+                tools=tools,
+                tool_config=tool_config,
+
+)
+            self.record_token_usage(response)
+            return self.parse_model_response(response, use_tool)
+        return model_flights.do(self.create_request_key("sync", prompt_text, generation_config, use_tool, function_dictionaries, tool_config), generate)
+
+    async def get_model_response_async(
+        self,
+        prompt_text: str,
+        generation_config: Dict[str, Any],
+        use_tool: bool = False,
+        function_dictionaries: Optional[List[Dict[str, Any]]] = None,
+        tool_config: Optional[ToolConfig] = None,
+    ) -> Any:
+        """
+        Async counterpart of `get_model_response`. The request goes through `router`, so it may be answered by another
+        route's model; no thread is held while waiting on it.
+        """
+        if use_tool and not function_dictionaries:
+            raise ValueError("If use_tool is set to True, function_dictionaries must be provided.")
+        return await model_flights.do_async(
+            self.create_request_key("async", prompt_text, generation_config, use_tool, function_dictionaries, tool_config),
+            lambda: self.router.generate_async(
+                prompt_text=prompt_text,
+                generation_config=generation_config,
+                function_dictionaries=function_dictionaries if use_tool else None,
+                tool_config=tool_config,
+            ),
+        )
+
+    def create_request_key(self, mode: str, prompt_text: str, generation_config: Dict[str, Any], use_tool: bool, function_dictionaries: Optional[List[Dict[str, Any]]], tool_config: Optional[ToolConfig])->str:
+        """
+        Key identical model requests for `model_flights`: the prompt with its whitespace normalised, the config, the
+        tools and the model. `mode` keeps sync and async callers apart, as they wait on different kinds of flight.
+        """
+        return CacheService.make_key(mode, self.model_name, " ".join(prompt_text.split()), generation_config, use_tool, function_dictionaries if use_tool else None, self.describe_tool_config(tool_config))
+
+    @staticmethod
+    def describe_tool_config(tool_config: Optional[ToolConfig])->Any:
+        """
+        The inputs `create_tool_config` built `tool_config` from. ToolConfig exposes no public view of its settings, so a
+        config built elsewhere is identified by the object itself: identical requests then only coalesce when they share
+        it, but distinct configs are never merged (the flight holds a reference, so its id is not reused while in flight).
+        """
+        if tool_config is None:
+            return None
+        return tool_config_descriptions.get(tool_config) or {"object":id(tool_config)}
+
+    def record_token_usage(self, response):
+        record_vertexai_token_usage(response, self.model_name)
+
+    def create_model_request(self, prompt_text: str, use_tool: bool, function_dictionaries: Optional[List[Dict[str, Any]]]):
         if use_tool and not function_dictionaries:
             raise ValueError("If use_tool is set to True, function_dictionaries must be provided.")
         tools=[]
         if use_tool:
             tools=self.create_tool(function_dictionaries)
         user_prompt=self.create_user_prompt(prompt_text)
-        response = self.model.generate_content(
-        user_prompt,
-        generation_config=generation_config,
-        tools=tools,
+        return user_prompt, tools
 
-)
+    @staticmethod
+    def parse_model_response(response, use_tool: bool) -> Any:
         if use_tool:
             response_function_call_content = response.candidates[0].content.parts[0].to_dict()
             return response_function_call_content
@@ -145,37 +308,464 @@ class VertexAI_Service(AI_Service):
             return response.text
         
     
-    def describe_signposting_options(self, options: List[Dict[str, Any]], category:str)->List[str]:
-        model_responses=[]
-        for option in options:
-            print(option)
-            input=json.dumps(option)
-            prompt=f"""
-                This is a dictionary representing information on a support organization within the UK. 
-                 The organization has been categorized. The category is {category}.
-                write a concise and helpful description of the organization. Don't mention the website.
-                Mention the name first. Include any additional details if you have knowledge of them. Keep your answer in the range of 2 sentences.
-                Organization dictionary:
-                {input}               
-"""
-            response=self.get_model_response(prompt, {"temperature":0.6})
-            location=option['postcode'] if option['location_scope']=='local' else option['area_covered'] #TO-DO check location logic
-            detail=f"""Website/Social URL: {option['external_url']}\nLocation: {location}"""
-            final_response=f"""{response}\n{detail}"""
-            model_responses.append(final_response)
-        return model_responses
-
-            
+    def get_prompt_template(self, template:Optional[PromptTemplate]=None)->PromptTemplate:
+        return template if template is not None else self.prompt_templates.get()
+
+    def create_signposting_prompt(self, option: Dict[str, Any], category:str, template:Optional[PromptTemplate]=None)->str:
+        return self.get_prompt_template(template).render_single(option, category)
+
+    @staticmethod
+    def create_signposting_detail(option: Dict[str, Any])->str:
+        location=option['postcode'] if option['location_scope']=='local' else option['area_covered'] #TO-DO check location logic
+        detail=f"""Website/Social URL: {option['external_url']}\nLocation: {location}"""
+        return detail
+
+    @staticmethod
+    def create_fallback_description(option: Dict[str, Any])->str:
+        """
+        Build a description from the option's own data, used when the model call for that option fails.
+        """
+        return f"{option['name']}: {option['description_short']}"
+
+    def create_signposting_batch_prompt(self, indexed_options: List[Dict[str, Any]], category:str, template:Optional[PromptTemplate]=None)->str:
+        return self.get_prompt_template(template).render_batch(indexed_options, category)
+
+    @staticmethod
+    def estimate_tokens(text:str)->int:
+        return estimate_tokens(text)
+
+    def chunk_signposting_options(self, options: List[Dict[str, Any]], category:str, template:Optional[PromptTemplate]=None)->List[List[Dict[str, Any]]]:
+        """
+        Split options into indexed chunks whose packed prompt stays within `batch_token_budget`. Options are sized as the
+        template projects them, so trimmed fields pack more options per request.
+
+        Args:
+            options (list[dict]): The signposting options.
+            category (str): The category the options were selected for.
+            template (PromptTemplate, optional): The prompt template, defaulting to the registry's default.
+
+        Returns:
+            list[list[dict]]: Chunks of `{"index": int, "organization": dict}` entries. An option that exceeds the budget on its own gets a chunk to itself.
+        """
+        template=self.get_prompt_template(template)
+        base_tokens=template.base_tokens["batch"]+self.estimate_tokens(category)
+        chunks=[]
+        chunk=[]
+        chunk_tokens=base_tokens
+        for index, option in enumerate(options):
+            indexed_option={"index":index, "organization":option}
+            option_tokens=template.estimate_option_tokens(indexed_option)
+            if chunk and chunk_tokens+option_tokens>self.batch_token_budget:
+                chunks.append(chunk)
+                chunk=[]
+                chunk_tokens=base_tokens
+            chunk.append(indexed_option)
+            chunk_tokens+=option_tokens
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    async def get_batch_descriptions(self, indexed_options: List[Dict[str, Any]], category:str, template:Optional[PromptTemplate]=None)->Dict[int, str]:
+        """
+        Describe a chunk of options with a single function-calling request.
+
+        Args:
+            indexed_options (list[dict]): A chunk produced by `chunk_signposting_options`.
+            category (str): The category the options were selected for.
+            template (PromptTemplate, optional): The prompt template, defaulting to the registry's default.
+
+        Returns:
+            dict[int, str]: Descriptions keyed by option index. Indices the model left out, or a failed request, are simply absent.
+        """
+        template=self.get_prompt_template(template)
+        prompt=template.render_batch(indexed_options, category)
+        template.record_prompt("batch", prompt)
+        expected_indices={indexed_option["index"] for indexed_option in indexed_options}
+        function_name=self.SIGNPOSTING_BATCH_FUNCTION["func_name"]
+        try:
+            response=await self.get_model_response_async(
+                prompt,
+                self.SIGNPOSTING_GENERATION_CONFIG,
+                use_tool=True,
+                function_dictionaries=[self.SIGNPOSTING_BATCH_FUNCTION],
+                tool_config=self.create_tool_config([function_name]),
+            )
+        except Exception as e:
+            logging.error(f"Error describing signposting batch of {len(indexed_options)} options: {e}")
+            return {}
+        function_call=response.get("function_call", {})
+        descriptions={}
+        for item in function_call.get("args", {}).get("descriptions", []):
+            try:
+                index=int(item["index"])
+                description=item["description"].strip()
+            except (KeyError, TypeError, ValueError, AttributeError):
+                continue
+            if index in expected_indices and description:
+                descriptions[index]=description
+        return descriptions
+
+    async def get_signposting_description(self, option: Dict[str, Any], category:str, template:Optional[PromptTemplate]=None)->Optional[str]:
+        """
+        Generate the description for a single signposting option with its own model call.
+
+        Args:
+            option (dict): The signposting option.
+            category (str): The category the option was selected for.
+            template (PromptTemplate, optional): The prompt template, defaulting to the registry's default.
+
+        Returns:
+            str | None: The model's description, or None if the call failed.
+        """
+        template=self.get_prompt_template(template)
+        prompt=template.render_single(option, category)
+        template.record_prompt("single", prompt)
+        try:
+            return await self.get_model_response_async(prompt, self.SIGNPOSTING_GENERATION_CONFIG)
+        except Exception as e:
+            logging.error(f"Error describing signposting option {option.get('name')}: {e}")
+            return None
+
+    def create_signposting_message(self, option: Dict[str, Any], description:Optional[str])->str:
+        """
+        Combine a description with the option's website and location details.
+
+        A missing description only degrades this option to its fallback description instead of failing the whole batch.
+        """
+        if description is None:
+            description=self.create_fallback_description(option)
+        detail=self.create_signposting_detail(option)
+        final_response=f"""{description}\n{detail}"""
+        return final_response
+
+    def create_description_cache_key(self, option: Dict[str, Any], category:str, template:Optional[PromptTemplate]=None)->str:
+        """
+        Key a generated description on everything that can change it: the option as the template projects it (so
+        fields the model never sees, like the email, don't split the cache), the category, the template's fingerprint
+        (which covers its name and version), the model name and the generation config.
+        """
+        template=self.get_prompt_template(template)
+        return CacheService.make_key(
+            template.project_option(option), category, template.fingerprint, self.model_name, self.SIGNPOSTING_GENERATION_CONFIG,
+        )
+
+    async def gather_bounded(self, func, items: List[Any])->List[Any]:
+        """
+        Await `func(item)` for each item with at most `max_concurrency` calls in flight, preserving input order.
+        """
+        semaphore=asyncio.Semaphore(max(1, self.max_concurrency))
+
+        async def run(item):
+            async with semaphore:
+                return await func(item)
+        return await asyncio.gather(*(run(item) for item in items))
+
+    async def iterate_bounded(self, func, items: List[Any])->AsyncIterator[Tuple[int, Any]]:
+        """
+        Like `gather_bounded`, but yield `(position, result)` pairs as the calls complete. Calls still pending when the
+        caller stops iterating are cancelled.
+        """
+        semaphore=asyncio.Semaphore(max(1, self.max_concurrency))
+
+        async def run(position, item):
+            async with semaphore:
+                return position, await func(item)
+        tasks=[asyncio.ensure_future(run(position, item)) for position, item in enumerate(items)]
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                yield await next_result
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def iterate_signposting_descriptions(self, options: List[Dict[str, Any]], category:str, template:Optional[PromptTemplate]=None)->AsyncIterator[Tuple[int, Optional[str]]]:
+        """
+        Generate raw descriptions for a list of options, bypassing the cache, and yield each as soon as it is ready.
+
+        In the default `per_option` mode, per-option prompts are fanned out concurrently with at most `max_concurrency` calls in flight.
+        In `batched` mode options are chunked to `batch_token_budget`, each chunk is described by one function-calling request, and any
+        option missing from the structured responses falls back to its own per-option call once every chunk has finished.
+
+        Args:
+            options (list[dict]): The signposting options.
+            category (str): The category the options were selected for.
+            template (PromptTemplate, optional): The prompt template, defaulting to the registry's default.
+
+        Yields:
+            tuple[int, str | None]: The option's index in `options` and its description, in order of completion. None marks an option whose generation failed.
+        """
+        template=self.get_prompt_template(template)
+        if self.mode!="batched":
+            async for index, description in self.iterate_bounded(lambda option: self.get_signposting_description(option, category, template), options):
+                yield index, description
+            return
+        chunks=self.chunk_signposting_options(options, category, template)
+        missing_indices=[]
+        async for position, chunk_descriptions in self.iterate_bounded(lambda chunk: self.get_batch_descriptions(chunk, category, template), chunks):
+            for indexed_option in chunks[position]:
+                index=indexed_option["index"]
+                if index in chunk_descriptions:
+                    yield index, chunk_descriptions[index]
+                else:
+                    missing_indices.append(index)
+        if missing_indices:
+            logging.warning(f"Falling back to per-option calls for {len(missing_indices)} of {len(options)} options")
+            async for position, description in self.iterate_bounded(lambda index: self.get_signposting_description(options[index], category, template), missing_indices):
+                yield missing_indices[position], description
+
+    async def generate_signposting_descriptions(self, options: List[Dict[str, Any]], category:str, template:Optional[PromptTemplate]=None)->List[Optional[str]]:
+        """
+        Generate raw descriptions for a list of options, bypassing the cache.
+
+        In the default `per_option` mode, per-option prompts are fanned out concurrently with at most `max_concurrency` calls in flight.
+        In `batched` mode options are chunked to `batch_token_budget`, each chunk is described by one function-calling request, and any
+        option missing from the structured responses falls back to its own per-option call.
+
+        Args:
+            options (list[dict]): The signposting options.
+            category (str): The category the options were selected for.
+            template (PromptTemplate, optional): The prompt template, defaulting to the registry's default.
+
+        Returns:
+            list[str | None]: One description per option, in the order of `options`. None marks an option whose generation failed.
+        """
+        descriptions=[None]*len(options)
+        async for index, description in self.iterate_signposting_descriptions(options, category, template):
+            descriptions[index]=description
+        return descriptions
+
+    async def iterate_cached_descriptions(self, options: List[Dict[str, Any]], category:str, template:Optional[PromptTemplate]=None)->AsyncIterator[Tuple[int, Optional[str]]]:
+        """
+        Yield `(index, description)` for each option: cached descriptions first, then the rest as they are generated
+        and cached. Failed generations are not cached, so they are retried on the next request.
+        """
+        template=self.get_prompt_template(template)
+        if self.description_cache is None:
+            async for index, description in self.iterate_signposting_descriptions(options, category, template):
+                yield index, description
+            return
+        keys=[self.create_description_cache_key(option, category, template) for option in options]
+        missing_indices=[]
+        for index, key in enumerate(keys):
+            description=await self.description_cache.get_async(key)
+            if description is None:
+                missing_indices.append(index)
+            else:
+                yield index, description
+        async for position, description in self.iterate_signposting_descriptions([options[index] for index in missing_indices], category, template):
+            index=missing_indices[position]
+            if description is not None:
+                await self.description_cache.set_async(keys[index], description)
+            yield index, description
+
+    async def get_cached_descriptions(self, options: List[Dict[str, Any]], category:str, template:Optional[PromptTemplate]=None)->List[Optional[str]]:
+        """
+        Return descriptions for `options`, generating and caching only the ones missing from `description_cache`.
+        """
+        descriptions=[None]*len(options)
+        async for index, description in self.iterate_cached_descriptions(options, category, template):
+            descriptions[index]=description
+        return descriptions
+
+    async def describe_signposting_options(self, options: List[Dict[str, Any]], category:str, organisation:Optional[str]=None)->List[str]:
+        """
+        Generate descriptions for a list of signposting options.
+
+        Descriptions are served from `description_cache` where possible; the rest are generated according to `mode`
+        (see `generate_signposting_descriptions`). The output order always matches the order of `options`. The prompts
+        and estimated prompt tokens of the request are logged and recorded as one `request` observation of `ai_api_prompt_tokens`.
+
+        Args:
+            options (list[dict]): The signposting options.
+            category (str): The category the options were selected for.
+            organisation (str, optional): Selects the organisation's prompt template, if it has one.
+
+        Returns:
+            list[str]: One message per option: the description followed by the website and location details.
+        """
+        template=self.prompt_templates.get(organisation)
+        usage={"prompts":0, "tokens":0}
+        usage_token=prompt_usage_var.set(usage)
+        try:
+            descriptions=await self.get_cached_descriptions(options, category, template)
+        finally:
+            prompt_usage_var.reset(usage_token)
+        self.record_request_usage(template, len(options), usage)
+        return [self.create_signposting_message(option, description) for option, description in zip(options, descriptions)]
+
+    async def stream_signposting_options(self, options: List[Dict[str, Any]], category:str, organisation:Optional[str]=None)->AsyncIterator[Tuple[int, str]]:
+        """
+        Streaming counterpart of `describe_signposting_options`: yield each option's message as soon as it is ready.
+        Cached options come first; the others follow in the order their model calls complete.
+
+        Yields:
+            tuple[int, str]: The option's index in `options` and its message.
+        """
+        template=self.prompt_templates.get(organisation)
+        usage={"prompts":0, "tokens":0}
+        usage_token=prompt_usage_var.set(usage)
+        try:
+            async for index, description in self.iterate_cached_descriptions(options, category, template):
+                yield index, self.create_signposting_message(options[index], description)
+        finally:
+            try:
+                prompt_usage_var.reset(usage_token)
+            except ValueError:
+                # The generator was closed from another context (e.g. garbage collected), where the variable was never set
+                pass
+            self.record_request_usage(template, len(options), usage)
+
+    @staticmethod
+    def record_request_usage(template:PromptTemplate, option_count:int, usage:Dict[str, int]):
+        if usage["prompts"]:
+            metrics.prompt_tokens.observe(usage["tokens"], template=template.name, version=str(template.version), kind="request")
+            logging.info(f"Signposting request for {option_count} options used {usage['prompts']} prompts and ~{usage['tokens']} prompt tokens ({template.name} v{template.version})")
+
+    async def warm_description_cache(self, options: List[Dict[str, Any]], category:str, organisation:Optional[str]=None)->Dict[str, int]:
+        """
+        Pre-generate and cache descriptions for known options, e.g. before a campaign goes out.
+
+        Args:
+            options (list[dict]): The signposting options to describe.
+            category (str): The category the options will be selected for.
+            organisation (str, optional): Selects the organisation's prompt template, if it has one.
+
+        Returns:
+            dict: The number of options requested, already cached and freshly generated.
+        """
+        if self.description_cache is None:
+            raise ValueError("Description cache is disabled")
+        template=self.prompt_templates.get(organisation)
+        keys=[self.create_description_cache_key(option, category, template) for option in options]
+        missing_indices=[index for index, key in enumerate(keys) if await self.description_cache.get_async(key) is None]
+        generated=await self.generate_signposting_descriptions([options[index] for index in missing_indices], category, template)
+        for index, description in zip(missing_indices, generated):
+            if description is not None:
+                await self.description_cache.set_async(keys[index], description)
+        return {
+            "requested":len(options),
+            "cached":len(options)-len(missing_indices),
+            "generated":sum(description is not None for description in generated),
+        }
+
+
+
+def record_vertexai_token_usage(response, model_name: str):
+    usage=getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    metrics.llm_tokens.inc(usage.prompt_token_count, model=model_name, kind="prompt")
+    metrics.llm_tokens.inc(usage.candidates_token_count, model=model_name, kind="completion")
+
+
+class VertexAIBackend:
+    """
+    Model router backend for a Vertex AI generative model.
+
+    Attributes:
+        name (str): The route, `vertexai:<model>`.
+    """
+    def __init__(self, model_name: str, model: Optional[GenerativeModel]=None):
+        self.model_name=model_name
+        self.name=f"vertexai:{model_name}"
+        if model is None:
+            init_vertexai()
+            model=GenerativeModel(model_name)
+        self.model=model
+
+    async def generate_async(self, prompt_text: str, generation_config: Dict[str, Any], function_dictionaries: Optional[List[Dict[str, Any]]]=None, tool_config: Optional[ToolConfig]=None)->Any:
+        tools=VertexAI_Service.create_tool(function_dictionaries) if function_dictionaries else []
+        with metrics.track_stage("vertexai.generate", self.model_name):
+            response=await self.model.generate_content_async(
+                VertexAI_Service.create_user_prompt(prompt_text),
+                generation_config=generation_config,
+                tools=tools,
+                tool_config=tool_config,
+            )
+        record_vertexai_token_usage(response, self.model_name)
+        return VertexAI_Service.parse_model_response(response, bool(function_dictionaries))
+
+
+class OpenAIChatBackend:
+    """
+    Model router backend for an OpenAI chat completions model, answering in the same shape as `VertexAIBackend`: the
+    text, or `{"function_call": {"name": ..., "args": {...}}}` when functions are given. A function call is always
+    forced, as the Vertex AI `ToolConfig` used here does; the config object itself is Vertex-only and is ignored.
+
+    Attributes:
+        name (str): The route, `openai:<model>`.
+    """
+    def __init__(self, model_name: str):
+        self.model_name=model_name
+        self.name=f"openai:{model_name}"
+
+    async def generate_async(self, prompt_text: str, generation_config: Dict[str, Any], function_dictionaries: Optional[List[Dict[str, Any]]]=None, tool_config: Optional[ToolConfig]=None)->Any:
+        request={"model":self.model_name, "messages":[{"role":"user", "content":prompt_text}]}
+        if "temperature" in generation_config:
+            request["temperature"]=generation_config["temperature"]
+        if "max_output_tokens" in generation_config:
+            request["max_tokens"]=generation_config["max_output_tokens"]
+        if function_dictionaries:
+            request["tools"]=[
+                {"type":"function", "function":{"name":dictionary["func_name"], "description":dictionary["func_description"], "parameters":dictionary["func_params"]}}
+                for dictionary in function_dictionaries
+            ]
+            request["tool_choice"]="required"
+        with metrics.track_stage("openai.chat", self.model_name):
+            response=await async_openai.chat.completions.create(**request)
+        if response.usage is not None:
+            metrics.llm_tokens.inc(response.usage.prompt_tokens, model=self.model_name, kind="prompt")
+            metrics.llm_tokens.inc(response.usage.completion_tokens, model=self.model_name, kind="completion")
+        message=response.choices[0].message
+        if function_dictionaries:
+            function=message.tool_calls[0].function
+            return {"function_call":{"name":function.name, "args":json.loads(function.arguments)}}
+        return message.content
+
+
+class AssistantRunError(Exception):
+    """
+    Raised when an assistant run ends in any state other than `completed`.
+
+    Attributes:
+        status (str): The run status, e.g. `failed`, `expired`, `requires_action` or `timed_out`.
+    """
+    def __init__(self, status: str, message: str):
+        super().__init__(f"Assistant run {status}: {message}")
+        self.status=status
+
+
 class OpenAI_Service(AI_Service):
+    """
+    Service for answering questions with OpenAI assistants.
+
+    When a conversation key is given, the conversation's thread is stored through `db_service` and reused for later
+    questions until it expires. Answers to the opening question of a conversation are cached by exact (normalised)
+    match, so frequently asked questions skip the assistant run entirely.
+
+    Inherits:
+        AI_Service
+    """
     ASSISTANT_IDS={
         "enham": ENHAM_ASSISTANT_ID
     }
-    def __init__(self, model_source: str):
+    FAILED_RUN_STATUSES=["failed", "expired", "cancelled", "incomplete"]
+
+    def __init__(self, model_source: str, run_timeout_seconds: float=assistant_run_timeout_seconds, db_service=None, answer_cache:Optional[CacheService]=answer_cache, thread_ttl_seconds:int=assistant_thread_ttl_seconds):
         super().__init__(model_source)
+        self.async_model=async_openai
+        self.run_timeout_seconds=run_timeout_seconds
+        self.db_service=db_service
+        self.answer_cache=answer_cache
+        self.thread_ttl_seconds=thread_ttl_seconds
 
     @staticmethod
     def select_assistant(service):
         return OpenAI_Service.ASSISTANT_IDS[service]
+
+    @staticmethod
+    def normalise_question(user_message: str)->str:
+        return re.sub(r"\s+", " ", user_message).strip().lower().rstrip("?!. ")
     
     def create_thread(self, user_message: str)->str:
         thread=self.model.beta.threads.create(messages=[
@@ -185,6 +775,22 @@ class OpenAI_Service(AI_Service):
             }
         ])
         return thread.id
+
+    async def create_thread_async(self, user_message: str, assistant_message: Optional[str]=None)->str:
+        messages=[
+            {
+                "role":"user", 
+                "content": user_message
+            }
+        ]
+        if assistant_message is not None:
+            messages.append({"role":"assistant", "content": assistant_message})
+        thread=await self.async_model.beta.threads.create(messages=messages)
+        return thread.id
+
+    async def add_message_async(self, thread_id: str, user_message: str):
+        await self.async_model.beta.threads.messages.create(thread_id=thread_id, role="user", content=user_message)
+
     def create_run(self, service, thread_id)->dict:
         """
         Creates and polls a run for the given thread ID using the assistant ID.
@@ -195,27 +801,124 @@ class OpenAI_Service(AI_Service):
 
         Returns:
             dict: The list of messages in the thread upon completion.
+
+        Raises:
+            AssistantRunError: If the run ends in any state other than `completed`.
         """
         assistant_id=self.select_assistant(service)
-        run=self.model.beta.threads.runs.create_and_poll(thread_id=thread_id, assistant_id=assistant_id)
-        while run.status !="completed":
-            print(f"Run status: {run.status}")
-            time.sleep(1)
-            run=self.model.beta.threads.runs.retrieve(run_id=run.id, thread_id=thread_id)
-        
-        response=self.model.beta.threads.messages.list(thread_id=thread_id)
+        # create_and_poll only returns once the run reaches a terminal state
+        with metrics.track_stage("openai.run", service):
+            run=self.model.beta.threads.runs.create_and_poll(thread_id=thread_id, assistant_id=assistant_id)
+        if run.status=="requires_action":
+            self.model.beta.threads.runs.cancel(run_id=run.id, thread_id=thread_id)
+            raise AssistantRunError(run.status, "the assistant requested a tool call, which this service does not handle")
+        if run.status!="completed":
+            raise AssistantRunError(run.status, run.last_error.message if run.last_error else "no error details")
+        # Only the newest assistant message is needed
+        response=self.model.beta.threads.messages.list(thread_id=thread_id, run_id=run.id, order="desc", limit=1)
         return response
-        
-    
 
-    
+    async def cancel_run_async(self, thread_id: str, run_id: Optional[str]):
+        if run_id is None:
+            return
+        try:
+            await self.async_model.beta.threads.runs.cancel(run_id=run_id, thread_id=thread_id)
+        except Exception as e:
+            logging.error(f"Error cancelling assistant run {run_id}: {e}")
 
+    async def stream_run(self, service: str, thread_id: str)->AsyncIterator[str]:
+        """
+        Run the assistant on a thread and yield the answer's text as it is generated.
 
+        Args:
+            service (str): The service name to fetch the assistant ID.
+            thread_id (str): The ID of the thread to create a run for.
 
+        Yields:
+            str: Text deltas of the assistant's reply.
 
+        Raises:
+            AssistantRunError: If the run fails, expires, is cancelled, needs a tool call, or does not finish within `run_timeout_seconds`.
+        """
+        assistant_id=self.select_assistant(service)
+        loop=asyncio.get_running_loop()
+        deadline=loop.time()+self.run_timeout_seconds
+        run_id=None
+        with metrics.track_stage("openai.run", service):
+            async with self.async_model.beta.threads.runs.stream(thread_id=thread_id, assistant_id=assistant_id) as stream:
+                events=stream.__aiter__()
+                while True:
+                    try:
+                        event=await asyncio.wait_for(events.__anext__(), max(0.0, deadline-loop.time()))
+                    except StopAsyncIteration:
+                        return
+                    except asyncio.TimeoutError:
+                        await self.cancel_run_async(thread_id, run_id)
+                        raise AssistantRunError("timed_out", f"no completion within {self.run_timeout_seconds}s")
+                    if event.event=="thread.run.created":
+                        run_id=event.data.id
+                    elif event.event=="thread.message.delta":
+                        for content in event.data.delta.content or []:
+                            if content.type=="text" and content.text and content.text.value:
+                                yield content.text.value
+                    elif event.event=="thread.run.requires_action":
+                        await self.cancel_run_async(thread_id, event.data.id)
+                        raise AssistantRunError("requires_action", "the assistant requested a tool call, which this service does not handle")
+                    elif event.event.removeprefix("thread.run.") in self.FAILED_RUN_STATUSES:
+                        last_error=event.data.last_error
+                        raise AssistantRunError(event.data.status, last_error.message if last_error else "no error details")
+                    elif event.event=="error":
+                        raise AssistantRunError("error", event.data.message)
 
+    async def create_run_async(self, service: str, thread_id: str)->str:
+        """
+        Run the assistant on a thread without blocking a worker thread and return the full reply.
+        """
+        chunks=[chunk async for chunk in self.stream_run(service, thread_id)]
+        return "".join(chunks)
 
+    async def stream_answer(self, service: str, user_message: str, conversation_key: Optional[str]=None)->AsyncIterator[str]:
+        """
+        Answer a question, reusing the conversation's thread and the answer cache where possible.
 
+        Args:
+            service (str): The service name to fetch the assistant ID.
+            user_message (str): The user's question.
+            conversation_key (str, optional): Identifies the conversation (e.g. the contact's phone number). Without it every question starts a new thread.
 
-    
+        Yields:
+            str: The answer, as text deltas, or in one piece when served from the cache.
+        """
+        thread_key=f"{service}:{conversation_key}" if conversation_key and self.db_service is not None else None
+        thread_id=await asyncio.to_thread(self.db_service.get_assistant_thread, thread_key) if thread_key else None
+        cache_key=None
+        if thread_id is None and self.answer_cache is not None:
+            # Only opening questions are cached: follow-ups depend on the rest of the conversation
+            cache_key=self.answer_cache.make_key(service, self.normalise_question(user_message))
+            cached_answer=await self.answer_cache.get_async(cache_key)
+            if cached_answer is not None:
+                if thread_key:
+                    # Seed the thread with the cached exchange so follow-ups keep their context
+                    thread_id=await self.create_thread_async(user_message, cached_answer)
+                    await asyncio.to_thread(self.db_service.save_assistant_thread, thread_key, thread_id, self.thread_ttl_seconds)
+                yield cached_answer
+                return
+        if thread_id is not None:
+            try:
+                await self.add_message_async(thread_id, user_message)
+            except NotFoundError:
+                thread_id=None
+        if thread_id is None:
+            thread_id=await self.create_thread_async(user_message)
+        if thread_key:
+            await asyncio.to_thread(self.db_service.save_assistant_thread, thread_key, thread_id, self.thread_ttl_seconds)
+        chunks=[]
+        async for chunk in self.stream_run(service, thread_id):
+            chunks.append(chunk)
+            yield chunk
+        if cache_key is not None:
+            await self.answer_cache.set_async(cache_key, "".join(chunks))
 
+    async def answer_question_async(self, service: str, user_message: str, conversation_key: Optional[str]=None)->str:
+        chunks=[chunk async for chunk in self.stream_answer(service, user_message, conversation_key)]
+        return "".join(chunks)
@@ -0,0 +1,191 @@
+import asyncio
+import shutil
+import struct
+from typing import Any, Dict, Optional
+from ..config.speech_api_config import ffmpeg_path, transcode_sample_rate_hertz
+from .MetricsService import metrics
+
+# Sample rates Speech-to-Text accepts for Opus; Opus always decodes at 48 kHz, so anything else maps to that
+OPUS_SAMPLE_RATES={8000, 12000, 16000, 24000, 48000}
+MP3_BITRATES_KBPS={
+    "1": [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    "2": [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+MP3_SAMPLE_RATES={3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+
+class UnsupportedAudioError(Exception):
+    """
+    Raised when a clip is in a format Speech-to-Text cannot recognise and it cannot be transcoded. Retrying does not help.
+    """
+
+
+class AudioProbeService:
+    """
+    Identifies a clip's container, codec, sample rate, channel count and (where the header says) duration by sniffing
+    its first bytes, so the `RecognitionConfig` matches the audio instead of assuming WhatsApp's Ogg Opus.
+
+    Formats Speech-to-Text reads natively (Ogg/WebM Opus, WAV PCM or mu-law, FLAC, AMR) are used as they are.
+    Anything else (e.g. AAC in MP4, Ogg Vorbis, MP3) is transcoded to mono FLAC with ffmpeg, if it is installed. MP3 is
+    only accepted by the v1p1beta1 API, not the `speech_v1` client used here, so it is never passed through.
+    """
+    @classmethod
+    def probe(cls, data: bytes, content_type: str="", complete: bool=True)->Dict[str, Any]:
+        """
+        Describe a clip from its bytes.
+
+        Args:
+            data (bytes): The clip, or at least its first few KiB.
+            content_type (str, optional): The `Content-Type` it was served with, used when the bytes are not recognised.
+            complete (bool, optional): Whether `data` is the whole clip. Durations that need the end of the clip are only computed if so.
+
+        Returns:
+            dict: `container`, `codec`, `encoding` (the `RecognitionConfig.AudioEncoding` name, or None if unsupported),
+            `sample_rate_hertz`, `channels`, `duration_seconds` (None if unknown) and `supported`.
+        """
+        if data[:4]==b"OggS":
+            audio_format=cls.probe_ogg(data, complete)
+        elif data[:4]==b"RIFF" and data[8:12]==b"WAVE":
+            audio_format=cls.probe_wav(data)
+        elif data[:4]==b"fLaC":
+            audio_format=cls.probe_flac(data)
+        elif data.startswith(b"#!AMR-WB\n"):
+            audio_format=cls.create_format("amr", "amr_wb", "AMR_WB", 16000, 1)
+        elif data.startswith(b"#!AMR\n"):
+            audio_format=cls.create_format("amr", "amr_nb", "AMR", 8000, 1)
+        elif data[:4]==b"\x1a\x45\xdf\xa3":
+            audio_format=cls.probe_webm(data)
+        elif data[4:8]==b"ftyp":
+            audio_format=cls.create_format("mp4", "aac", None)
+        elif data[:3]==b"ID3" or (len(data)>1 and data[0]==0xFF and data[1]&0xE0==0xE0):
+            audio_format=cls.probe_mp3(data, complete)
+        else:
+            audio_format=cls.create_format(content_type.split("/")[-1] or "unknown", "unknown", None)
+        return audio_format
+
+    @staticmethod
+    def create_format(container, codec, encoding, sample_rate_hertz=None, channels=None, duration_seconds=None):
+        return {
+            "container": container,
+            "codec": codec,
+            "encoding": encoding,
+            "sample_rate_hertz": sample_rate_hertz,
+            "channels": channels,
+            "duration_seconds": duration_seconds,
+            "supported": encoding is not None,
+        }
+
+    @classmethod
+    def probe_ogg(cls, data, complete):
+        segment_count=data[26] if len(data)>26 else 0
+        packet=data[27+segment_count:]
+        last_page=data.rfind(b"OggS")
+        granule=struct.unpack_from("<q", data, last_page+6)[0] if complete and len(data)>=last_page+14 else None
+        if packet.startswith(b"OpusHead") and len(packet)>=16:
+            channels=packet[9]
+            pre_skip, input_sample_rate=struct.unpack_from("<HI", packet, 10)
+            sample_rate=input_sample_rate if input_sample_rate in OPUS_SAMPLE_RATES else 48000
+            duration=max(0, granule-pre_skip)/48000 if granule is not None else None
+            return cls.create_format("ogg", "opus", "OGG_OPUS", sample_rate, channels, duration)
+        if packet.startswith(b"\x01vorbis") and len(packet)>=16:
+            channels=packet[11]
+            sample_rate=struct.unpack_from("<I", packet, 12)[0]
+            duration=granule/sample_rate if granule is not None and sample_rate else None
+            return cls.create_format("ogg", "vorbis", None, sample_rate, channels, duration)
+        return cls.create_format("ogg", "unknown", None)
+
+    @classmethod
+    def probe_wav(cls, data):
+        offset=12
+        audio_format, channels, sample_rate, byte_rate, bits, data_size=None, None, None, None, None, None
+        while offset+8<=len(data):
+            chunk_id=data[offset:offset+4]
+            chunk_size=struct.unpack_from("<I", data, offset+4)[0]
+            if chunk_id==b"fmt " and offset+24<=len(data):
+                audio_format, channels, sample_rate, byte_rate, _, bits=struct.unpack_from("<HHIIHH", data, offset+8)
+                if audio_format==0xFFFE and offset+34<=len(data):
+                    # WAVE_FORMAT_EXTENSIBLE: the real format tag leads the sub-format GUID
+                    audio_format=struct.unpack_from("<H", data, offset+32)[0]
+            elif chunk_id==b"data":
+                data_size=chunk_size
+                break
+            offset+=8+chunk_size+chunk_size%2
+        duration=data_size/byte_rate if data_size is not None and byte_rate else None
+        if audio_format==1 and bits==16:
+            return cls.create_format("wav", "pcm_s16le", "LINEAR16", sample_rate, channels, duration)
+        if audio_format==7:
+            return cls.create_format("wav", "mulaw", "MULAW", sample_rate, channels, duration)
+        return cls.create_format("wav", f"format_{audio_format}", None, sample_rate, channels, duration)
+
+    @classmethod
+    def probe_flac(cls, data):
+        if len(data)<26:
+            return cls.create_format("flac", "flac", "FLAC")
+        packed=int.from_bytes(data[18:26], "big")
+        sample_rate=packed>>44
+        channels=((packed>>41)&0x7)+1
+        total_samples=packed&0xFFFFFFFFF
+        duration=total_samples/sample_rate if total_samples and sample_rate else None
+        return cls.create_format("flac", "flac", "FLAC", sample_rate, channels, duration)
+
+    @classmethod
+    def probe_webm(cls, data):
+        opus_head=data.find(b"OpusHead")
+        if b"A_OPUS" not in data or opus_head<0 or len(data)<opus_head+16:
+            return cls.create_format("webm", "unknown", None)
+        channels=data[opus_head+9]
+        input_sample_rate=struct.unpack_from("<I", data, opus_head+12)[0]
+        sample_rate=input_sample_rate if input_sample_rate in OPUS_SAMPLE_RATES else 48000
+        return cls.create_format("webm", "opus", "WEBM_OPUS", sample_rate, channels)
+
+    @classmethod
+    def probe_mp3(cls, data, complete):
+        offset=0
+        if data[:3]==b"ID3" and len(data)>=10:
+            # ID3v2 size is a 28-bit syncsafe integer
+            offset=10+((data[6]&0x7F)<<21|(data[7]&0x7F)<<14|(data[8]&0x7F)<<7|(data[9]&0x7F))
+        while offset+4<=len(data) and not (data[offset]==0xFF and data[offset+1]&0xE0==0xE0):
+            offset+=1
+        if offset+4>len(data):
+            return cls.create_format("mp3", "mp3", None)
+        header=int.from_bytes(data[offset:offset+4], "big")
+        version=(header>>19)&0x3
+        bitrate_index=(header>>12)&0xF
+        sample_rate_index=(header>>10)&0x3
+        channels=1 if (header>>6)&0x3==3 else 2
+        sample_rate=MP3_SAMPLE_RATES.get(version, [None]*4)[sample_rate_index] if sample_rate_index<3 else None
+        bitrate=MP3_BITRATES_KBPS["1" if version==3 else "2"][bitrate_index] if bitrate_index<15 else 0
+        # Constant-bitrate estimate; good enough to choose between sync and long-running recognition
+        duration=(len(data)-offset)*8/(bitrate*1000) if complete and bitrate else None
+        return cls.create_format("mp3", "mp3", None, sample_rate, channels, duration)
+
+    @staticmethod
+    def can_transcode()->bool:
+        return shutil.which(ffmpeg_path) is not None
+
+    @classmethod
+    async def transcode_async(cls, data: bytes)->bytes:
+        """
+        Transcode a clip to mono FLAC at `TRANSCODE_SAMPLE_RATE_HERTZ` with ffmpeg.
+
+        Raises:
+            UnsupportedAudioError: If ffmpeg is not installed or cannot decode the clip.
+        """
+        if not cls.can_transcode():
+            raise UnsupportedAudioError("audio format is not supported by Speech-to-Text and ffmpeg is not installed to transcode it")
+        with metrics.track_stage("audio.transcode"):
+            process=await asyncio.create_subprocess_exec(
+                ffmpeg_path, "-hide_banner", "-loglevel", "error", "-i", "pipe:0",
+                "-ac", "1", "-ar", str(transcode_sample_rate_hertz), "-f", "flac", "pipe:1",
+                stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+            )
+            output, error=await process.communicate(data)
+        if process.returncode!=0 or not output:
+            raise UnsupportedAudioError(f"ffmpeg could not transcode the audio: {error.decode(errors='replace').strip()}")
+        return output
+
+
+def describe_format(audio_format: Optional[Dict[str, Any]])->str:
+    if audio_format is None:
+        return "unknown"
+    return f"{audio_format['container']}/{audio_format['codec']} {audio_format['sample_rate_hertz']}Hz x{audio_format['channels']}"
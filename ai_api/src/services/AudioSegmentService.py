@@ -0,0 +1,149 @@
+import asyncio
+import struct
+from typing import Any, Dict, List, Tuple
+import numpy as np
+from ..config.speech_api_config import (
+    ffmpeg_path, transcode_sample_rate_hertz, transcription_segment_target_seconds, transcription_segment_max_seconds,
+    silence_threshold_dbfs, silence_min_ms,
+)
+from .AudioProbeService import AudioProbeService, UnsupportedAudioError
+from .MetricsService import metrics
+
+FRAME_MS=20
+
+
+class AudioSegmentService:
+    """
+    Splits long clips into segments at pauses in speech, so each can be recognised on its own and concurrently.
+
+    Clips are decoded to 16-bit mono PCM: WAV PCM is read directly and anything else is decoded with ffmpeg. Silence
+    is found from the RMS level of 20 ms frames; each cut is placed in the pause closest to
+    `TRANSCRIPTION_SEGMENT_TARGET_SECONDS` into the segment, or forced at `TRANSCRIPTION_SEGMENT_MAX_SECONDS` if the
+    speaker never pauses. Segments are returned as WAV clips with their offset into the original clip.
+    """
+    @staticmethod
+    def can_split(audio_format: Dict[str, Any])->bool:
+        return audio_format.get("encoding")=="LINEAR16" or AudioProbeService.can_transcode()
+
+    @staticmethod
+    def read_wav_samples(data: bytes)->Tuple[np.ndarray, int]:
+        offset=12
+        channels, sample_rate=1, None
+        while offset+8<=len(data):
+            chunk_id=data[offset:offset+4]
+            chunk_size=struct.unpack_from("<I", data, offset+4)[0]
+            if chunk_id==b"fmt ":
+                _, channels, sample_rate=struct.unpack_from("<HHI", data, offset+8)
+            elif chunk_id==b"data":
+                pcm=data[offset+8:offset+8+chunk_size]
+                samples=np.frombuffer(pcm[:len(pcm)//(2*channels)*2*channels], dtype="<i2")
+                if channels>1:
+                    samples=samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+                return samples, sample_rate
+            offset+=8+chunk_size+chunk_size%2
+        raise UnsupportedAudioError("WAV clip has no data chunk")
+
+    @classmethod
+    async def decode_async(cls, audio_content: bytes, audio_format: Dict[str, Any])->Tuple[np.ndarray, int]:
+        """
+        Decode a clip to 16-bit mono PCM.
+
+        Returns:
+            tuple[np.ndarray, int]: The samples and their sample rate.
+
+        Raises:
+            UnsupportedAudioError: If the clip is not WAV PCM and ffmpeg is missing or cannot decode it.
+        """
+        if audio_format.get("encoding")=="LINEAR16":
+            return cls.read_wav_samples(audio_content)
+        if not AudioProbeService.can_transcode():
+            raise UnsupportedAudioError(f"ffmpeg is needed to split {audio_format.get('codec')} audio")
+        with metrics.track_stage("audio.decode"):
+            process=await asyncio.create_subprocess_exec(
+                ffmpeg_path, "-hide_banner", "-loglevel", "error", "-i", "pipe:0",
+                "-ac", "1", "-ar", str(transcode_sample_rate_hertz), "-f", "s16le", "pipe:1",
+                stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+            )
+            output, error=await process.communicate(audio_content)
+        if process.returncode!=0:
+            raise UnsupportedAudioError(f"ffmpeg could not decode the audio: {error.decode(errors='replace').strip()}")
+        return np.frombuffer(output, dtype="<i2"), transcode_sample_rate_hertz
+
+    @staticmethod
+    def find_silences(samples: np.ndarray, sample_rate: int, threshold_dbfs: float=silence_threshold_dbfs, min_silence_ms: int=silence_min_ms)->List[int]:
+        """
+        Find pauses of at least `min_silence_ms` below `threshold_dbfs`.
+
+        Returns:
+            list[int]: The sample index at the middle of each pause.
+        """
+        frame_length=sample_rate*FRAME_MS//1000
+        frame_count=len(samples)//frame_length
+        if frame_count==0:
+            return []
+        frames=samples[:frame_count*frame_length].astype(np.float32).reshape(frame_count, frame_length)
+        rms=np.sqrt(np.mean(frames**2, axis=1))
+        silent=20*np.log10(rms/32768+1e-10)<threshold_dbfs
+        # Run boundaries of the silent mask: starts where it turns on, ends where it turns off
+        edges=np.diff(np.concatenate(([0], silent.astype(np.int8), [0])))
+        starts, ends=np.flatnonzero(edges==1), np.flatnonzero(edges==-1)
+        min_frames=max(1, min_silence_ms//FRAME_MS)
+        return [int((start+end)//2*frame_length) for start, end in zip(starts, ends) if end-start>=min_frames]
+
+    @classmethod
+    def find_segments(cls, samples: np.ndarray, sample_rate: int, target_seconds: float=transcription_segment_target_seconds, max_seconds: float=transcription_segment_max_seconds)->List[Tuple[int, int]]:
+        """
+        Choose segment boundaries, cutting in the pause closest to `target_seconds` into each segment and never
+        letting a segment run past `max_seconds`.
+
+        Returns:
+            list[tuple[int, int]]: The start and end sample of each segment, in order.
+        """
+        silences=cls.find_silences(samples, sample_rate)
+        target, longest, shortest=int(target_seconds*sample_rate), int(max_seconds*sample_rate), int(target_seconds*sample_rate/2)
+        segments=[]
+        start=0
+        while len(samples)-start>longest:
+            candidates=[cut for cut in silences if start+shortest<=cut<=start+longest]
+            end=min(candidates, key=lambda cut: abs(cut-start-target)) if candidates else start+longest
+            segments.append((start, end))
+            start=end
+        segments.append((start, len(samples)))
+        return segments
+
+    @staticmethod
+    def encode_wav(samples: np.ndarray, sample_rate: int)->bytes:
+        pcm=samples.astype("<i2").tobytes()
+        header=b"RIFF"+struct.pack("<I", 36+len(pcm))+b"WAVE"
+        header+=b"fmt "+struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate*2, 2, 16)
+        return header+b"data"+struct.pack("<I", len(pcm))+pcm
+
+    @classmethod
+    def split_samples(cls, samples: np.ndarray, sample_rate: int)->List[Dict[str, Any]]:
+        return [
+            {
+                "index": index,
+                "offset_seconds": start/sample_rate,
+                "duration_seconds": (end-start)/sample_rate,
+                "audio_content": cls.encode_wav(samples[start:end], sample_rate),
+            }
+            for index, (start, end) in enumerate(cls.find_segments(samples, sample_rate))
+        ]
+
+    @classmethod
+    async def split_async(cls, audio_content: bytes, audio_format: Dict[str, Any])->Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Split a clip on silence.
+
+        Returns:
+            tuple[list[dict], dict]: The segments (`index`, `offset_seconds`, `duration_seconds` and `audio_content` as
+            a mono WAV clip) and the probed format shared by every segment.
+
+        Raises:
+            UnsupportedAudioError: If the clip cannot be decoded.
+        """
+        samples, sample_rate=await cls.decode_async(audio_content, audio_format)
+        with metrics.track_stage("audio.split"):
+            segments=await asyncio.to_thread(cls.split_samples, samples, sample_rate)
+        segment_format=AudioProbeService.create_format("wav", "pcm_s16le", "LINEAR16", sample_rate, 1)
+        return segments, segment_format
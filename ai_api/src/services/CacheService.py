@@ -0,0 +1,265 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+from pymongo import errors
+from .MetricsService import metrics
+from ..config.cache_config import (
+    description_cache_backend, description_cache_ttl_seconds, description_cache_max_size,
+    translation_cache_backend, translation_cache_ttl_seconds, translation_cache_max_size,
+    answer_cache_backend, answer_cache_ttl_seconds, answer_cache_max_size,
+    transcription_cache_backend, transcription_cache_ttl_seconds, transcription_cache_max_size,
+)
+
+caches: Dict[str, "CacheService"]={}
+
+
+class CacheStats:
+    """
+    Hit/miss/eviction counters for a cache, exposed on the health routes for monitoring.
+    """
+    def __init__(self):
+        self.lock=threading.Lock()
+        self.hits=0
+        self.misses=0
+        self.evictions=0
+        self.sets=0
+        self.errors=0
+
+    def increment(self, counter:str, amount:int=1):
+        with self.lock:
+            setattr(self, counter, getattr(self, counter)+amount)
+
+    def to_dict(self)->Dict[str, Any]:
+        lookups=self.hits+self.misses
+        return {
+            "hits":self.hits,
+            "misses":self.misses,
+            "evictions":self.evictions,
+            "sets":self.sets,
+            "errors":self.errors,
+            "hit_rate":self.hits/lookups if lookups else 0.0,
+        }
+
+
+class InMemoryCacheBackend:
+    """
+    Thread-safe in-process LRU cache with a per-entry TTL. Lookups never block, so async callers use it directly.
+
+    Attributes:
+        max_size (int): Maximum number of entries kept before the least recently used one is evicted.
+        ttl_seconds (int): Lifetime of an entry.
+    """
+    blocking=False
+
+    def __init__(self, max_size:int, ttl_seconds:int):
+        self.max_size=max_size
+        self.ttl_seconds=ttl_seconds
+        self.entries=OrderedDict()
+        self.lock=threading.Lock()
+        self.stats=None
+
+    def get(self, key:str)->Optional[Any]:
+        with self.lock:
+            entry=self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at=entry
+            if expires_at<=time.monotonic():
+                del self.entries[key]
+                self.stats.increment("evictions")
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key:str, value:Any):
+        with self.lock:
+            self.entries[key]=(value, time.monotonic()+self.ttl_seconds)
+            self.entries.move_to_end(key)
+            while len(self.entries)>self.max_size:
+                self.entries.popitem(last=False)
+                self.stats.increment("evictions")
+
+    def size(self)->int:
+        return len(self.entries)
+
+
+class MongoCacheBackend:
+    """
+    Cache backend storing entries in a MongoDB collection, shared by every worker and surviving restarts.
+
+    Expiry is handled by a TTL index on `expiresAt`. Documents MongoDB has not reaped yet are treated as misses.
+
+    Attributes:
+        collection (Collection): The collection holding the cache entries.
+        ttl_seconds (int): Lifetime of an entry.
+    """
+    blocking=True
+
+    def __init__(self, collection, ttl_seconds:int):
+        self.collection=collection
+        self.ttl_seconds=ttl_seconds
+        self.stats=None
+        self.index_created=False
+
+    def ensure_index(self):
+        if not self.index_created:
+            self.collection.create_index("expiresAt", expireAfterSeconds=0)
+            self.index_created=True
+
+    def get(self, key:str)->Optional[Any]:
+        document=self.collection.find_one({"_id":key})
+        if document is None:
+            return None
+        if document["expiresAt"].replace(tzinfo=timezone.utc)<=datetime.now(timezone.utc):
+            self.stats.increment("evictions")
+            return None
+        return document["value"]
+
+    def set(self, key:str, value:Any):
+        self.ensure_index()
+        now=datetime.now(timezone.utc)
+        self.collection.update_one(
+            {"_id":key},
+            {"$set":{"value":value, "createdAt":now, "expiresAt":now+timedelta(seconds=self.ttl_seconds)}},
+            upsert=True,
+        )
+
+    def size(self)->int:
+        return self.collection.estimated_document_count()
+
+
+class CacheService:
+    """
+    Content-addressed cache in front of a pluggable backend.
+
+    Backend failures are logged and counted but never raised, so a cache outage only costs the work it would have saved.
+
+    Attributes:
+        name (str): Name the cache is registered and reported under.
+        backend (InMemoryCacheBackend | MongoCacheBackend): Where entries are stored.
+        stats (CacheStats): Hit/miss/eviction counters.
+    """
+    def __init__(self, name:str, backend):
+        self.name=name
+        self.backend=backend
+        self.stats=CacheStats()
+        self.backend.stats=self.stats
+        caches[name]=self
+
+    @staticmethod
+    def make_key(*parts:Any)->str:
+        """
+        Build a stable key by hashing the JSON encoding of `parts` with sorted keys.
+        """
+        payload=json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key:str)->Optional[Any]:
+        try:
+            value=self.backend.get(key)
+        except (errors.PyMongoError, OSError) as e:
+            logging.error(f"Error reading from cache {self.name}: {e}")
+            self.stats.increment("errors")
+            value=None
+        self.stats.increment("hits" if value is not None else "misses")
+        return value
+
+    def set(self, key:str, value:Any):
+        try:
+            self.backend.set(key, value)
+            self.stats.increment("sets")
+        except (errors.PyMongoError, OSError) as e:
+            logging.error(f"Error writing to cache {self.name}: {e}")
+            self.stats.increment("errors")
+
+    async def get_async(self, key:str)->Optional[Any]:
+        """
+        `get` for use on the event loop. Blocking backends are read on a worker thread.
+        """
+        if self.backend.blocking:
+            return await asyncio.to_thread(self.get, key)
+        return self.get(key)
+
+    async def set_async(self, key:str, value:Any):
+        if self.backend.blocking:
+            await asyncio.to_thread(self.set, key, value)
+        else:
+            self.set(key, value)
+
+    def get_stats(self)->Dict[str, Any]:
+        stats=self.stats.to_dict()
+        try:
+            stats["size"]=self.backend.size()
+        except (errors.PyMongoError, OSError):
+            stats["size"]=None
+        stats["backend"]=type(self.backend).__name__
+        return stats
+
+
+def render_cache_metrics():
+    lines=[]
+    for counter in ["hits", "misses", "evictions", "errors"]:
+        name=f"ai_api_cache_{counter}_total"
+        lines.extend([f"# HELP {name} Cache {counter}.", f"# TYPE {name} counter"])
+        lines.extend(f'{name}{{cache="{cache_name}"}} {getattr(cache.stats, counter)}' for cache_name, cache in caches.items())
+    return lines
+
+
+metrics.register_collector(render_cache_metrics)
+
+
+def create_cache_backend(backend_name:str, collection_name:str, ttl_seconds:int, max_size:int):
+    """
+    Create a cache backend from its configured name.
+
+    Args:
+        backend_name (str): `memory`, `mongo` or `none`.
+        collection_name (str): The MongoDB collection used by the `mongo` backend.
+        ttl_seconds (int): Lifetime of an entry.
+        max_size (int): Maximum number of entries kept by the `memory` backend.
+
+    Returns:
+        InMemoryCacheBackend | MongoCacheBackend | None: The backend, or None if caching is disabled.
+    """
+    if backend_name=="none":
+        return None
+    if backend_name=="memory":
+        return InMemoryCacheBackend(max_size, ttl_seconds)
+    if backend_name=="mongo":
+        from .DatabaseService import DatabaseService, DB_NAME
+        return MongoCacheBackend(DatabaseService(DB_NAME).db[collection_name], ttl_seconds)
+    raise ValueError(f"Unsupported cache backend: {backend_name}")
+
+
+def create_cache(name:str, backend_name:str, collection_name:str, ttl_seconds:int, max_size:int)->Optional[CacheService]:
+    backend=create_cache_backend(backend_name, collection_name, ttl_seconds, max_size)
+    if backend is None:
+        return None
+    return CacheService(name, backend)
+
+
+description_cache=create_cache(
+    "signposting_descriptions", description_cache_backend, "signposting_description_cache",
+    description_cache_ttl_seconds, description_cache_max_size,
+)
+
+translation_cache=create_cache(
+    "translations", translation_cache_backend, "translation_cache",
+    translation_cache_ttl_seconds, translation_cache_max_size,
+)
+
+answer_cache=create_cache(
+    "assistant_answers", answer_cache_backend, "assistant_answer_cache",
+    answer_cache_ttl_seconds, answer_cache_max_size,
+)
+
+transcription_cache=create_cache(
+    "transcriptions", transcription_cache_backend, "transcription_cache",
+    transcription_cache_ttl_seconds, transcription_cache_max_size,
+)
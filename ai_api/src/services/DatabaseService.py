@@ -1,119 +1,303 @@
-import os
-from pymongo import MongoClient, errors
-from dotenv import load_dotenv
-load_dotenv()
-MONGO_URI=os.environ.get("MONGO_URI")
-DB_NAME=os.environ.get("DB_NAME", "controlRoomDB_dev")
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pymongo import MongoClient, UpdateOne, errors, monitoring
+from .MetricsService import metrics
+from ..config.database_config import mongo_uri, db_name, mongo_client_options, mongo_use_transactions
+MONGO_URI=mongo_uri
+DB_NAME=db_name
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """
+    Counts connection pool events for the shared client so the health route can report pool usage.
+    """
+    def __init__(self):
+        self.lock=threading.Lock()
+        self.counters={
+            "connections_created":0,
+            "connections_closed":0,
+            "checkouts":0,
+            "checkins":0,
+            "checkout_failures":0,
+            "pools_cleared":0,
+        }
+
+    def increment(self, counter):
+        with self.lock:
+            self.counters[counter]+=1
+
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_check_out_started(self, event): pass
+
+    def pool_cleared(self, event):
+        self.increment("pools_cleared")
+
+    def connection_created(self, event):
+        self.increment("connections_created")
+
+    def connection_closed(self, event):
+        self.increment("connections_closed")
+
+    def connection_check_out_failed(self, event):
+        self.increment("checkout_failures")
+
+    def connection_checked_out(self, event):
+        self.increment("checkouts")
+
+    def connection_checked_in(self, event):
+        self.increment("checkins")
+
+    def get_stats(self):
+        with self.lock:
+            stats=dict(self.counters)
+        stats["open_connections"]=stats["connections_created"]-stats["connections_closed"]
+        stats["in_use"]=stats["checkouts"]-stats["checkins"]
+        return stats
+
+
+pool_stats_listener=PoolStatsListener()
+mongo_client_lock=threading.Lock()
+mongo_client=None
+
+
+def get_mongo_client():
+    """
+    Return the worker's shared, pooled `MongoClient`, creating it on first use.
+    """
+    global mongo_client
+    with mongo_client_lock:
+        if mongo_client is None:
+            mongo_client=MongoClient(MONGO_URI, event_listeners=[pool_stats_listener], **mongo_client_options)
+        return mongo_client
+
+
+def close_mongo_client():
+    global mongo_client
+    with mongo_client_lock:
+        if mongo_client is not None:
+            mongo_client.close()
+            mongo_client=None
+
+
+def get_pool_stats():
+    """
+    Report pool configuration, connection counters and a ping round-trip for the health route.
+    """
+    client=get_mongo_client()
+    stats={
+        "max_pool_size":mongo_client_options["maxPoolSize"],
+        "min_pool_size":mongo_client_options["minPoolSize"],
+        "write_concern":mongo_client_options["w"],
+        **pool_stats_listener.get_stats(),
+    }
+    try:
+        client.admin.command("ping")
+        stats["status"]="ok"
+    except errors.PyMongoError as e:
+        stats["status"]="error"
+        stats["error"]=str(e)
+    return stats
+
 
 class DatabaseService:
-    def __init__(self, db):
+    """
+    Data access for the transcription pipeline, backed by the worker's shared pooled `MongoClient`.
+    """
+    def __init__(self, db, client=None):
         try: 
-            self.client = MongoClient(MONGO_URI)
+            self.client = client or get_mongo_client()
             self.db = self.client[db]
         except errors.ConnectionFailure as e:
-            print("error connecting to MongoDB")
+            logging.error(f"Error connecting to MongoDB: {e}")
             raise
-    
-    def close(self):
-        self.client.close()
+
+    PROFILE_FIELD_SUFFIX="_profile"
+    PROFILE_MESSAGE_SIDS_FIELD="profileMessageSids"
+
+    def ensure_indexes(self):
+        """
+        Create the indexes the transcription update path relies on. `create_index` is a no-op for indexes that already exist.
+        """
+        self.db["messages"].create_index("MessageSid")
+        self.db["flow_history"].create_index("flowResponses.originalMessageSid")
+        self.db["contacts"].create_index(self.PROFILE_MESSAGE_SIDS_FIELD)
+        self.db["assistant_threads"].create_index("expiresAt", expireAfterSeconds=0)
+
+    @classmethod
+    def get_profile_fields(cls, contact):
+        """
+        Return the names of the contact's profile fields (e.g. `EnhamPA_profile`), i.e. object fields ending in `_profile`.
+        """
+        return [field for field, value in contact.items() if field.endswith(cls.PROFILE_FIELD_SUFFIX) and isinstance(value, dict)]
+
+    @classmethod
+    def collect_profile_message_sids(cls, contact):
+        """
+        Collect every `originalMessageSid` stored in the contact's profile fields, whether the entry is an object or an array of objects.
+        """
+        message_sids=[]
+        for profile_field in cls.get_profile_fields(contact):
+            for data in contact[profile_field].values():
+                items=data if isinstance(data, list) else [data]
+                for item in items:
+                    if isinstance(item, dict) and item.get("originalMessageSid"):
+                        message_sids.append(item["originalMessageSid"])
+        return list(dict.fromkeys(message_sids))
+
+    @classmethod
+    def find_profile_update_paths(cls, contact, message_sid):
+        """
+        Find the `value` paths of every profile entry recorded from the given message.
+
+        Returns:
+            list[str]: Dotted update paths such as `EnhamPA_profile.skills.0.value` or `EnhamPA_profile.username.value`.
+        """
+        update_paths=[]
+        for profile_field in cls.get_profile_fields(contact):
+            for field, data in contact[profile_field].items():
+                if isinstance(data, list):
+                    for i, item in enumerate(data):
+                        if isinstance(item, dict) and item.get("originalMessageSid")==message_sid:
+                            update_paths.append(f"{profile_field}.{field}.{i}.value")
+                elif isinstance(data, dict) and data.get("originalMessageSid")==message_sid:
+                    update_paths.append(f"{profile_field}.{field}.value")
+        return update_paths
 
     def update_message_text(self, message_sid, transcription, gcs_uri):
+        try:
+            self.update_message_texts([(message_sid, transcription, gcs_uri)])
+            logging.debug(f"Message {message_sid} body updated to {transcription}")
+        except errors.PyMongoError as e: 
+            logging.error(f"Error in update operation: {e}")
+
+    def update_message_texts(self, updates, use_transaction=mongo_use_transactions):
+        """
+        Write a batch of transcriptions to messages, flow_history and contacts with one `bulk_write` per collection.
+
+        A batch costs four round-trips however many voice notes it holds: three bulk writes plus one indexed `find`
+        for the contacts whose profile entries came from the batch's messages.
+
+        Args:
+            updates (list[tuple[str, str, str]]): `(MessageSid, transcription, gcs_uri)` tuples.
+            use_transaction (bool, optional): Apply the batch in a single multi-document transaction (requires a replica set). Defaults to `MONGO_USE_TRANSACTIONS`.
+
+        Returns:
+            dict: Per-collection and total timings for the batch, in milliseconds.
+
+        Raises:
+            PyMongoError: If any of the writes fail.
+        """
+        timings={"count":len(updates)}
+        if not updates:
+            return timings
+        start=time.perf_counter()
+        with metrics.track_stage("mongo.update_message_texts"):
+            if use_transaction:
+                with self.client.start_session() as session:
+                    session.with_transaction(lambda session: self.write_message_texts(updates, timings, session))
+            else:
+                self.write_message_texts(updates, timings)
+        timings["total_ms"]=(time.perf_counter()-start)*1000
+        logging.info(f"Transcription batch timings: {timings}")
+        return timings
+
+    def write_message_texts(self, updates, timings, session=None):
         message_collection=self.db["messages"]
         flow_history_collection=self.db["flow_history"]
         contacts_collection=self.db["contacts"]
-        try:
-           message_collection.update_one({"MessageSid": message_sid}, {"$set": {"Body": transcription, "gcsAudioUri": gcs_uri} } )
-           flow_history_collection.update_one(         {
-                "flowResponses.originalMessageSid": message_sid  # Filter to find the document
-            },
-            {
-                "$set": {
-                    "flowResponses.$.userResponse": f"<transcript>{transcription}</transcript>", 
-                    "flowResponses.$.gcsAudioUri":gcs_uri
-                      
-                          # Set the new userResponse for the matched element
-                }
-            })
-           print(f"Message {message_sid} body updated to {transcription}")
-           #TO-DO make this dynamic
-           contact = contacts_collection.find_one({
-    "$or": [
-        {
-            # Case: The field is an array
-            "$expr": {
-                "$anyElementTrue": {
-                    "$map": {
-                        "input": {"$objectToArray": "$EnhamPA_profile"},
-                        "as": "field",
-                        "in": {
-                            "$cond": [
-                                {"$isArray": "$$field.v"},
-                                {"$anyElementTrue": {
-                                    "$map": {
-                                        "input": "$$field.v",
-                                        "as": "item",
-                                        "in": {"$eq": ["$$item.originalMessageSid", message_sid]}
-                                    }
-                                }},
-                                False
-                            ]
-                        }
-                    }
-                }
-            }
-        },
-        {
-            # Case: The field is an object
-            "$expr": {
-                "$anyElementTrue": {
-                    "$map": {
-                        "input": {"$objectToArray": "$EnhamPA_profile"},
-                        "as": "field",
-                        "in": {
-                            "$and": [
-                                {"$isArray": "$$field.v"},
-                                {"$eq": ["$$field.v.originalMessageSid", message_sid]}
-                            ]
-                        }
-                    }
-                }
-            }
-        }
-    ]
-})
-           if contact:
-            print("Contact found for message SID:", contact)
-
-            # Iterate through EnhamPA_profile to handle both arrays and objects
-            for field, data in contact.get("EnhamPA_profile", {}).items():
-                # If it's an array, check if the message SID exists in the array elements
-                if isinstance(data, list):
-                    for i, item in enumerate(data):
-                        if item.get("originalMessageSid") == message_sid:
-                            update_path = f"EnhamPA_profile.{field}.{i}.value"
-                            contacts_collection.update_one(
-                                {"_id": contact["_id"]},
-                                {"$set": {update_path: transcription}}
-                            )
-                            print(f"Updated array field '{field}' at index {i} with value: {transcription}")
-                            break
-                # If it's a single object, just check and update it
-                elif isinstance(data, dict) and data.get("originalMessageSid") == message_sid:
-                    update_path = f"EnhamPA_profile.{field}.value"
-                    contacts_collection.update_one(
-                        {"_id": contact["_id"]},
-                        {"$set": {update_path: transcription}}
-                    )
-                    print(f"Updated object field '{field}' with value: {transcription}")
-                    break   
-        except errors.PyMongoError as e: 
-            print(f"Error in update operation: {e}")
+
+        start=time.perf_counter()
+        message_collection.bulk_write([
+            UpdateOne({"MessageSid": message_sid}, {"$set": {"Body": transcription, "gcsAudioUri": gcs_uri}})
+            for message_sid, transcription, gcs_uri in updates
+        ], ordered=False, session=session)
+        timings["messages_ms"]=(time.perf_counter()-start)*1000
+
+        start=time.perf_counter()
+        flow_history_collection.bulk_write([
+            UpdateOne(
+                {"flowResponses.originalMessageSid": message_sid},  # Filter to find the document
+                {"$set": {
+                    # Set the new userResponse for the matched element
+                    "flowResponses.$.userResponse": f"<transcript>{transcription}</transcript>",
+                    "flowResponses.$.gcsAudioUri": gcs_uri,
+                }}
+            )
+            for message_sid, transcription, gcs_uri in updates
+        ], ordered=False, session=session)
+        timings["flow_history_ms"]=(time.perf_counter()-start)*1000
+
+        start=time.perf_counter()
+        transcriptions={message_sid: transcription for message_sid, transcription, _ in updates}
+        # Indexed lookup on the sids the flows service records alongside each profile entry
+        contacts=contacts_collection.find({self.PROFILE_MESSAGE_SIDS_FIELD: {"$in": list(transcriptions)}}, session=session)
+        contact_operations=[]
+        for contact in contacts:
+            profile_update={}
+            for message_sid in contact.get(self.PROFILE_MESSAGE_SIDS_FIELD, []):
+                if message_sid in transcriptions:
+                    for update_path in self.find_profile_update_paths(contact, message_sid):
+                        profile_update[update_path]=transcriptions[message_sid]
+            if profile_update:
+                contact_operations.append(UpdateOne({"_id": contact["_id"]}, {"$set": profile_update}))
+        if contact_operations:
+            contacts_collection.bulk_write(contact_operations, ordered=False, session=session)
+        timings["contacts_ms"]=(time.perf_counter()-start)*1000
+        timings["contacts_updated"]=len(contact_operations)
+
+    def get_assistant_thread(self, conversation_key):
+        """
+        Return the assistant thread id stored for a conversation, or None if there is none or it has expired.
+        """
+        document=self.db["assistant_threads"].find_one({"_id": conversation_key, "expiresAt": {"$gt": datetime.now(timezone.utc)}})
+        return document["threadId"] if document else None
+
+    def save_assistant_thread(self, conversation_key, thread_id, ttl_seconds):
+        """
+        Store (or refresh) the assistant thread id for a conversation; it expires `ttl_seconds` after the last message.
+        """
+        now=datetime.now(timezone.utc)
+        self.db["assistant_threads"].update_one(
+            {"_id": conversation_key},
+            {"$set": {"threadId": thread_id, "updatedAt": now, "expiresAt": now+timedelta(seconds=ttl_seconds)}},
+            upsert=True,
+        )
+
+    def backfill_profile_message_sids(self, batch_size=500):
+        """
+        Populate `profileMessageSids` on contacts whose profile entries were written before the field was maintained.
+
+        Args:
+            batch_size (int): Number of contact updates sent per `bulk_write`.
+
+        Returns:
+            int: The number of contacts updated.
+        """
+        contacts_collection=self.db["contacts"]
+        updated=0
+        operations=[]
+        for contact in contacts_collection.find({}):
+            message_sids=self.collect_profile_message_sids(contact)
+            if not message_sids:
+                continue
+            operations.append(UpdateOne(
+                {"_id": contact["_id"]},
+                {"$addToSet": {self.PROFILE_MESSAGE_SIDS_FIELD: {"$each": message_sids}}}
+            ))
+            if len(operations)>=batch_size:
+                updated+=contacts_collection.bulk_write(operations, ordered=False).modified_count
+                operations=[]
+        if operations:
+            updated+=contacts_collection.bulk_write(operations, ordered=False).modified_count
+        return updated
 
     
 
 def get_database_service():
-    db_service = DatabaseService(DB_NAME)  # Replace with your database name
-    try:
-        yield db_service
-    finally:
-        db_service.close()
\ No newline at end of file
+    # The client is shared by the whole worker and closed in the app lifespan, not per request
+    return DatabaseService(DB_NAME)
\ No newline at end of file
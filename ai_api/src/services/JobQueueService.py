@@ -0,0 +1,225 @@
+import copy
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from pymongo import ReturnDocument, errors
+
+STATUS_PENDING="pending"
+STATUS_RUNNING="running"
+STATUS_FAILED="failed"
+
+
+class MongoJobQueue:
+    """
+    Durable job queue stored in a MongoDB collection, shared by every worker and surviving restarts.
+
+    Jobs are keyed by a caller-chosen id, so enqueueing the same id twice is collapsed into one job. A worker claims a
+    job by taking a lease on it; if the worker dies, the lease expires and another worker picks the job up.
+
+    Attributes:
+        collection (Collection): The collection holding the jobs.
+    """
+    def __init__(self, collection):
+        self.collection=collection
+
+    def ensure_indexes(self):
+        self.collection.create_index([("status", 1), ("availableAt", 1)])
+        self.collection.create_index([("status", 1), ("leaseExpiresAt", 1)])
+
+    def enqueue(self, job_id: str, fields: Dict[str, Any])->Tuple[Dict[str, Any], bool]:
+        """
+        Add a job unless one with the same id exists. A job that has failed for good is queued again.
+
+        Args:
+            job_id (str): The job's idempotency key.
+            fields (dict): The job's payload.
+
+        Returns:
+            tuple[dict, bool]: The job and whether this call queued it (False for a collapsed duplicate).
+        """
+        now=datetime.now(timezone.utc)
+        job={"_id":job_id, **fields, "status":STATUS_PENDING, "attempts":0, "availableAt":now, "createdAt":now, "updatedAt":now}
+        try:
+            self.collection.insert_one(job)
+            return job, True
+        except errors.DuplicateKeyError:
+            pass
+        requeued=self.collection.find_one_and_update(
+            {"_id":job_id, "status":STATUS_FAILED},
+            {"$set":{"status":STATUS_PENDING, "attempts":0, "availableAt":now, "updatedAt":now}, "$unset":{"error":""}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if requeued is not None:
+            return requeued, True
+        return self.collection.find_one({"_id":job_id}), False
+
+    def claim(self, worker_id: str, lease_seconds: float)->Optional[Dict[str, Any]]:
+        """
+        Lease the oldest job that is due, or whose previous lease has expired.
+
+        Returns:
+            dict | None: The claimed job, with `attempts` already incremented, or None if nothing is due.
+        """
+        now=datetime.now(timezone.utc)
+        return self.collection.find_one_and_update(
+            {"$or":[
+                {"status":STATUS_PENDING, "availableAt":{"$lte":now}},
+                {"status":STATUS_RUNNING, "leaseExpiresAt":{"$lte":now}},
+            ]},
+            {"$set":{"status":STATUS_RUNNING, "leaseOwner":worker_id, "leaseExpiresAt":now+timedelta(seconds=lease_seconds), "updatedAt":now}, "$inc":{"attempts":1}},
+            sort=[("availableAt", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def claim_in_status(self, status: str, worker_id: str, lease_seconds: float)->Optional[Dict[str, Any]]:
+        """
+        Lease a job in `status` that no other worker holds, for work outside the pending/running cycle (e.g. polling an
+        operation). Unlike `claim`, the job keeps its status and its `attempts` are not incremented.
+
+        Returns:
+            dict | None: The claimed job, or None if every job in `status` is leased.
+        """
+        now=datetime.now(timezone.utc)
+        return self.collection.find_one_and_update(
+            {"status":status, "leaseExpiresAt":{"$not":{"$gt":now}}},
+            {"$set":{"leaseOwner":worker_id, "leaseExpiresAt":now+timedelta(seconds=lease_seconds), "updatedAt":now}},
+            sort=[("updatedAt", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    @staticmethod
+    def create_filter(job_id: str, worker_id: Optional[str]):
+        # A worker whose lease was taken over must not overwrite the new owner's progress
+        return {"_id":job_id, "leaseOwner":worker_id} if worker_id else {"_id":job_id}
+
+    def update(self, job_id: str, fields: Dict[str, Any], worker_id: Optional[str]=None)->bool:
+        fields={**fields, "updatedAt":datetime.now(timezone.utc)}
+        return self.collection.update_one(self.create_filter(job_id, worker_id), {"$set":fields}).matched_count==1
+
+    def renew_lease(self, job_id: str, worker_id: str, lease_seconds: float)->bool:
+        return self.update(job_id, {"leaseExpiresAt":datetime.now(timezone.utc)+timedelta(seconds=lease_seconds)}, worker_id)
+
+    def finish(self, job_id: str, status: str, fields: Dict[str, Any], worker_id: Optional[str]=None)->bool:
+        """
+        Move a job to `status` and release its lease.
+        """
+        fields={**fields, "status":status, "updatedAt":datetime.now(timezone.utc)}
+        result=self.collection.update_one(
+            self.create_filter(job_id, worker_id),
+            {"$set":fields, "$unset":{"leaseOwner":"", "leaseExpiresAt":""}},
+        )
+        return result.matched_count==1
+
+    def get(self, job_id: str)->Optional[Dict[str, Any]]:
+        return self.collection.find_one({"_id":job_id})
+
+    def find_by_status(self, status: str)->List[Dict[str, Any]]:
+        return list(self.collection.find({"status":status}))
+
+
+class InMemoryJobQueue:
+    """
+    In-process stand-in for `MongoJobQueue` with the same semantics, for local runs and tests. Jobs are lost on restart
+    and are not shared between workers.
+    """
+    def __init__(self):
+        self.jobs: Dict[str, Dict[str, Any]]={}
+        self.lock=threading.Lock()
+
+    def ensure_indexes(self):
+        pass
+
+    def enqueue(self, job_id: str, fields: Dict[str, Any])->Tuple[Dict[str, Any], bool]:
+        now=datetime.now(timezone.utc)
+        with self.lock:
+            job=self.jobs.get(job_id)
+            if job is None:
+                job=self.jobs[job_id]={"_id":job_id, **fields, "status":STATUS_PENDING, "attempts":0, "availableAt":now, "createdAt":now, "updatedAt":now}
+                return copy.deepcopy(job), True
+            if job["status"]==STATUS_FAILED:
+                job.update({"status":STATUS_PENDING, "attempts":0, "availableAt":now, "updatedAt":now})
+                job.pop("error", None)
+                return copy.deepcopy(job), True
+            return copy.deepcopy(job), False
+
+    def claim(self, worker_id: str, lease_seconds: float)->Optional[Dict[str, Any]]:
+        now=datetime.now(timezone.utc)
+        with self.lock:
+            due=[
+                job for job in self.jobs.values()
+                if (job["status"]==STATUS_PENDING and job["availableAt"]<=now)
+                or (job["status"]==STATUS_RUNNING and job["leaseExpiresAt"]<=now)
+            ]
+            if not due:
+                return None
+            job=min(due, key=lambda job: job["availableAt"])
+            job.update({"status":STATUS_RUNNING, "leaseOwner":worker_id, "leaseExpiresAt":now+timedelta(seconds=lease_seconds), "updatedAt":now})
+            job["attempts"]+=1
+            return copy.deepcopy(job)
+
+    def claim_in_status(self, status: str, worker_id: str, lease_seconds: float)->Optional[Dict[str, Any]]:
+        now=datetime.now(timezone.utc)
+        with self.lock:
+            due=[
+                job for job in self.jobs.values()
+                if job["status"]==status and (job.get("leaseExpiresAt") is None or job["leaseExpiresAt"]<=now)
+            ]
+            if not due:
+                return None
+            job=min(due, key=lambda job: job["updatedAt"])
+            job.update({"leaseOwner":worker_id, "leaseExpiresAt":now+timedelta(seconds=lease_seconds), "updatedAt":now})
+            return copy.deepcopy(job)
+
+    def get_owned(self, job_id: str, worker_id: Optional[str]):
+        job=self.jobs.get(job_id)
+        if job is None or (worker_id and job.get("leaseOwner")!=worker_id):
+            return None
+        return job
+
+    def update(self, job_id: str, fields: Dict[str, Any], worker_id: Optional[str]=None)->bool:
+        with self.lock:
+            job=self.get_owned(job_id, worker_id)
+            if job is None:
+                return False
+            job.update(copy.deepcopy(fields), updatedAt=datetime.now(timezone.utc))
+            return True
+
+    def renew_lease(self, job_id: str, worker_id: str, lease_seconds: float)->bool:
+        return self.update(job_id, {"leaseExpiresAt":datetime.now(timezone.utc)+timedelta(seconds=lease_seconds)}, worker_id)
+
+    def finish(self, job_id: str, status: str, fields: Dict[str, Any], worker_id: Optional[str]=None)->bool:
+        with self.lock:
+            job=self.get_owned(job_id, worker_id)
+            if job is None:
+                return False
+            job.update(copy.deepcopy(fields), status=status, updatedAt=datetime.now(timezone.utc))
+            job.pop("leaseOwner", None)
+            job.pop("leaseExpiresAt", None)
+            return True
+
+    def get(self, job_id: str)->Optional[Dict[str, Any]]:
+        with self.lock:
+            job=self.jobs.get(job_id)
+            return copy.deepcopy(job) if job is not None else None
+
+    def find_by_status(self, status: str)->List[Dict[str, Any]]:
+        with self.lock:
+            return [copy.deepcopy(job) for job in self.jobs.values() if job["status"]==status]
+
+
+def create_job_queue(backend_name: str, collection):
+    """
+    Create a job queue from its configured name.
+
+    Args:
+        backend_name (str): `mongo` or `memory`.
+        collection (Collection): The collection used by the `mongo` backend.
+
+    Returns:
+        MongoJobQueue | InMemoryJobQueue: The queue.
+    """
+    if backend_name=="mongo":
+        return MongoJobQueue(collection)
+    if backend_name=="memory":
+        return InMemoryJobQueue()
+    raise ValueError(f"Unsupported job queue backend: {backend_name}")
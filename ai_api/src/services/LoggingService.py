@@ -0,0 +1,47 @@
+import contextvars
+import json
+import logging
+import sys
+import time
+from ..config.observability_config import log_level, log_format
+
+request_id_var: contextvars.ContextVar[str]=contextvars.ContextVar("request_id", default="-")
+
+
+class RequestIdFilter(logging.Filter):
+    """
+    Stamps every log record with the id of the request being handled, including in background tasks and worker
+    threads started from it, since both inherit the request's context.
+    """
+    def filter(self, record):
+        record.request_id=request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry={
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))+f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"]=self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+def configure_logging(level: str=log_level, format_name: str=log_format):
+    """
+    Send root logger output to stdout with the request id attached, as JSON lines or plain text.
+    """
+    handler=logging.StreamHandler(sys.stdout)
+    handler.addFilter(RequestIdFilter())
+    if format_name=="json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s"))
+    root=logging.getLogger()
+    root.handlers=[handler]
+    root.setLevel(level)
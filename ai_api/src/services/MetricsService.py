@@ -0,0 +1,147 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+from ..config.observability_config import metrics_latency_buckets, metrics_token_buckets
+
+LabelValues=Tuple[Tuple[str, str], ...]
+
+
+def format_labels(labels: LabelValues, extra: Dict[str, str]=None)->str:
+    pairs=list(labels)+list((extra or {}).items())
+    if not pairs:
+        return ""
+    escaped=[(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for name, value in pairs]
+    return "{"+",".join(f'{name}="{value}"' for name, value in escaped)+"}"
+
+
+class Counter:
+    """
+    Monotonic counter with labels.
+    """
+    def __init__(self, name: str, description: str):
+        self.name=name
+        self.description=description
+        self.lock=threading.Lock()
+        self.values: Dict[LabelValues, float]={}
+
+    def inc(self, amount: float=1, **labels):
+        key=tuple(sorted(labels.items()))
+        with self.lock:
+            self.values[key]=self.values.get(key, 0)+amount
+
+    def render(self)->List[str]:
+        lines=[f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for labels, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{format_labels(labels)} {value}")
+        return lines
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram with labels, as in the Prometheus data model.
+    """
+    def __init__(self, name: str, description: str, buckets: List[float]=metrics_latency_buckets):
+        self.name=name
+        self.description=description
+        self.buckets=sorted(buckets)
+        self.lock=threading.Lock()
+        self.values: Dict[LabelValues, Dict]={}
+
+    def observe(self, value: float, **labels):
+        key=tuple(sorted(labels.items()))
+        with self.lock:
+            series=self.values.get(key)
+            if series is None:
+                series=self.values[key]={"buckets":[0]*len(self.buckets), "sum":0.0, "count":0}
+            index=bisect.bisect_left(self.buckets, value)
+            if index<len(self.buckets):
+                series["buckets"][index]+=1
+            series["sum"]+=value
+            series["count"]+=1
+
+    def render(self)->List[str]:
+        lines=[f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for labels, series in sorted(self.values.items()):
+                cumulative=0
+                for bound, count in zip(self.buckets, series["buckets"]):
+                    cumulative+=count
+                    lines.append(f"{self.name}_bucket{format_labels(labels, {'le': repr(bound)})} {cumulative}")
+                lines.append(f"{self.name}_bucket{format_labels(labels, {'le': '+Inf'})} {series['count']}")
+                lines.append(f"{self.name}_sum{format_labels(labels)} {series['sum']}")
+                lines.append(f"{self.name}_count{format_labels(labels)} {series['count']}")
+        return lines
+
+
+class MetricsService:
+    """
+    In-process metrics registry rendered in the Prometheus text format on `/metrics`.
+
+    Metrics are per worker process, like the cache stats on `/health/cache`: with several gunicorn workers each scrape
+    sees the worker that answered it, so scrape with a per-worker target or aggregate by instance.
+
+    Attributes:
+        stage_duration (Histogram): Latency of each external call or processing stage, by stage, model and outcome.
+        stage_calls (Counter): Calls per stage, model and outcome.
+        http_request_duration (Histogram): Latency of each HTTP request until its body has been sent, by method, route and status.
+        prompt_tokens (Histogram): Estimated tokens per rendered prompt, by template, version and kind (single or batch).
+        llm_tokens (Counter): Tokens billed by the model as reported in its usage metadata, by model and kind (prompt or completion).
+        llm_routing (Counter): Model router events by backend: hedge, won (a hedge or failover beat the primary), failover, retry, circuit_open and rate_limited.
+        request_coalescing (Counter): Single-flight calls by name and outcome: leader (went upstream), coalesced (joined a call in flight) and timeout.
+    """
+    def __init__(self):
+        self.metrics=[]
+        self.collectors=[]
+        self.stage_duration=self.register(Histogram("ai_api_stage_duration_seconds", "Latency of a processing stage or external call."))
+        self.stage_calls=self.register(Counter("ai_api_stage_calls_total", "Calls made to a processing stage or external service."))
+        self.http_request_duration=self.register(Histogram("ai_api_http_request_duration_seconds", "Latency of HTTP requests handled by the API, until the response body has been sent."))
+        self.prompt_tokens=self.register(Histogram("ai_api_prompt_tokens", "Estimated tokens in each rendered prompt.", metrics_token_buckets))
+        self.llm_tokens=self.register(Counter("ai_api_llm_tokens_total", "Tokens reported by the model's usage metadata."))
+        self.llm_routing=self.register(Counter("ai_api_llm_routing_events_total", "Hedges, failovers, retries and skipped backends in the model router."))
+        self.request_coalescing=self.register(Counter("ai_api_request_coalescing_total", "Calls that went upstream, joined an identical call in flight or timed out waiting on one."))
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector):
+        """
+        Add a callable returning exposition lines for values kept elsewhere (e.g. cache stats), read at scrape time.
+        """
+        self.collectors.append(collector)
+
+    @contextmanager
+    def track_stage(self, stage: str, model: str=""):
+        """
+        Time the enclosed block as one call to `stage`, recording its outcome as `success` or `error`.
+
+        Works around `await` expressions too, so the same helper times sync and async calls.
+
+        Args:
+            stage (str): Stage name, e.g. `vertexai.generate` or `twilio.download`.
+            model (str, optional): The model or target the call was made for, where it varies.
+        """
+        start=time.perf_counter()
+        outcome="success"
+        try:
+            yield
+        except Exception:
+            outcome="error"
+            raise
+        finally:
+            self.stage_duration.observe(time.perf_counter()-start, stage=stage, model=model, outcome=outcome)
+            self.stage_calls.inc(stage=stage, model=model, outcome=outcome)
+
+    def render(self)->str:
+        lines=[]
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collector in self.collectors:
+            lines.extend(collector())
+        return "\n".join(lines)+"\n"
+
+
+metrics=MetricsService()
@@ -0,0 +1,330 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+import openai
+from google.api_core import exceptions as google_exceptions
+from ..config.routing_config import (
+    llm_hedging_enabled, llm_hedge_after_seconds, llm_hedge_min_seconds, llm_latency_window, llm_circuit_failure_threshold,
+    llm_circuit_reset_seconds, llm_rate_limits, llm_rate_limit_wait_seconds, llm_max_retries, llm_backoff_base_seconds,
+    llm_backoff_max_seconds,
+)
+from .MetricsService import metrics
+
+# A backend needs this many recent successes before its latency is trusted to choose it or to time a hedge
+MIN_LATENCY_SAMPLES=20
+QUOTA_ERRORS=(google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests, openai.RateLimitError)
+
+
+class BackendUnavailableError(Exception):
+    """
+    Raised when a backend is not called because its circuit is open or its rate limit would not allow the call in time.
+    """
+
+
+def is_quota_error(error: Exception)->bool:
+    return isinstance(error, QUOTA_ERRORS)
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter: `rate` calls per second on average, with bursts of up to `capacity`.
+    """
+    def __init__(self, rate: float, capacity: Optional[float]=None):
+        self.rate=rate
+        self.capacity=capacity if capacity is not None else max(1.0, rate)
+        self.tokens=self.capacity
+        self.updated_at=time.monotonic()
+        self.lock=threading.Lock()
+
+    def reserve(self, max_wait_seconds: float)->Optional[float]:
+        """
+        Take a token, possibly ahead of time.
+
+        Returns:
+            float | None: How long to wait before making the call, or None (taking nothing) if that exceeds `max_wait_seconds`.
+        """
+        with self.lock:
+            now=time.monotonic()
+            self.tokens=min(self.capacity, self.tokens+(now-self.updated_at)*self.rate)
+            self.updated_at=now
+            wait_seconds=max(0.0, (1-self.tokens)/self.rate)
+            if wait_seconds>max_wait_seconds:
+                return None
+            self.tokens-=1
+            return wait_seconds
+
+    async def acquire_async(self, max_wait_seconds: float)->bool:
+        wait_seconds=self.reserve(max_wait_seconds)
+        if wait_seconds is None:
+            return False
+        if wait_seconds:
+            await asyncio.sleep(wait_seconds)
+        return True
+
+
+class CircuitBreaker:
+    """
+    Stops calls to a backend after `failure_threshold` consecutive failures (quota errors aside). After `reset_seconds`
+    one probe call is let through: success closes the circuit again, failure re-opens it.
+    """
+    def __init__(self, failure_threshold: int=llm_circuit_failure_threshold, reset_seconds: float=llm_circuit_reset_seconds):
+        self.failure_threshold=failure_threshold
+        self.reset_seconds=reset_seconds
+        self.state="closed"
+        self.failures=0
+        self.opened_at=0.0
+        self.probe_in_flight=False
+        self.lock=threading.Lock()
+
+    def allow(self)->bool:
+        with self.lock:
+            if self.state=="closed":
+                return True
+            if self.state=="open" and time.monotonic()-self.opened_at>=self.reset_seconds:
+                self.state="half_open"
+            if self.state=="half_open" and not self.probe_in_flight:
+                self.probe_in_flight=True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.state="closed"
+            self.failures=0
+            self.probe_in_flight=False
+
+    def record_failure(self)->bool:
+        """
+        Returns:
+            bool: Whether this failure opened the circuit.
+        """
+        with self.lock:
+            self.failures+=1
+            self.probe_in_flight=False
+            if self.state=="half_open" or (self.state=="closed" and self.failures>=self.failure_threshold):
+                self.state="open"
+                self.opened_at=time.monotonic()
+                return True
+            return False
+
+    def release(self):
+        # A cancelled probe (e.g. the other side of a hedge won) says nothing about the backend's health
+        with self.lock:
+            self.probe_in_flight=False
+
+
+class BackendHealth:
+    """
+    Recent latency, error rate, circuit and rate limit of one backend, shared by every router that uses it.
+
+    Attributes:
+        name (str): The backend's route, as `provider:model`.
+    """
+    def __init__(self, name: str, rate_limit: Optional[float]=None, window: int=llm_latency_window):
+        self.name=name
+        self.breaker=CircuitBreaker()
+        self.bucket=TokenBucket(rate_limit) if rate_limit else None
+        self.latencies=deque(maxlen=window)
+        self.outcomes=deque(maxlen=window)
+        self.lock=threading.Lock()
+
+    def record(self, success: bool, latency_seconds: Optional[float]=None):
+        with self.lock:
+            self.outcomes.append(success)
+            if success:
+                self.latencies.append(latency_seconds)
+
+    def get_latency(self, quantile: float)->Optional[float]:
+        with self.lock:
+            if len(self.latencies)<MIN_LATENCY_SAMPLES:
+                return None
+            latencies=sorted(self.latencies)
+        return latencies[min(len(latencies)-1, int(len(latencies)*quantile))]
+
+    def get_error_rate(self)->float:
+        with self.lock:
+            return self.outcomes.count(False)/len(self.outcomes) if self.outcomes else 0.0
+
+    def get_expected_seconds(self)->Optional[float]:
+        """
+        Median latency inflated by the recent error rate, since a failed call costs a retry elsewhere; None without
+        enough history.
+        """
+        median=self.get_latency(0.5)
+        if median is None:
+            return None
+        return median/max(0.05, 1-self.get_error_rate())
+
+    def get_status(self)->Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "circuit": self.breaker.state,
+            "p50_seconds": self.get_latency(0.5),
+            "p95_seconds": self.get_latency(0.95),
+            "error_rate": round(self.get_error_rate(), 3),
+        }
+
+
+backend_health: Dict[str, BackendHealth]={}
+backend_health_lock=threading.Lock()
+
+
+def get_backend_health(name: str)->BackendHealth:
+    with backend_health_lock:
+        if name not in backend_health:
+            backend_health[name]=BackendHealth(name, llm_rate_limits.get(name))
+        return backend_health[name]
+
+
+def render_circuit_metrics()->List[str]:
+    lines=["# HELP ai_api_llm_circuit_open Whether the circuit breaker of an LLM backend is open (1) or half open (0.5).", "# TYPE ai_api_llm_circuit_open gauge"]
+    with backend_health_lock:
+        health=list(backend_health.values())
+    for backend in health:
+        lines.append(f'ai_api_llm_circuit_open{{backend="{backend.name}"}} {dict(closed=0, half_open=0.5, open=1)[backend.breaker.state]}')
+    return lines
+
+
+metrics.register_collector(render_circuit_metrics)
+
+
+class ModelRouter:
+    """
+    Routes a model request across one or more backends.
+
+    - Backends are tried in order of expected latency (recent median, inflated by the error rate). Backends without
+      enough history come after measured ones, in configured order, and are measured as hedges and failovers reach them.
+    - A call that has not finished after the hedge delay (`LLM_HEDGE_AFTER_SECONDS`, or the backend's recent p95) is
+      hedged: the same request goes to the next backend and the first success wins, cancelling the other.
+    - A call that fails fails over to the next backend straight away.
+    - Quota errors (HTTP 429 / `RESOURCE_EXHAUSTED`) are retried on the same backend with full-jitter exponential backoff.
+    - Each backend has a circuit breaker and an optional token-bucket rate limit (`LLM_RATE_LIMITS`); a backend whose
+      circuit is open or whose bucket is empty is skipped.
+
+    Backends are objects with a `name` (`provider:model`) and an async `generate_async(**request)`.
+    """
+    def __init__(self, backends: List[Any], hedging_enabled: bool=llm_hedging_enabled, hedge_after_seconds: float=llm_hedge_after_seconds, max_retries: int=llm_max_retries):
+        if not backends:
+            raise ValueError("A model router needs at least one backend")
+        self.backends=backends
+        self.hedging_enabled=hedging_enabled
+        self.hedge_after_seconds=hedge_after_seconds
+        self.max_retries=max_retries
+        self.health={backend.name: get_backend_health(backend.name) for backend in backends}
+
+    def select_backends(self)->List[Any]:
+        order={backend.name: index for index, backend in enumerate(self.backends)}
+
+        def rank(backend):
+            health=self.health[backend.name]
+            expected_seconds=health.get_expected_seconds()
+            return (health.breaker.state=="open", expected_seconds is None, expected_seconds or 0.0, order[backend.name])
+        return sorted(self.backends, key=rank)
+
+    def get_hedge_delay(self, backend)->Optional[float]:
+        if self.hedge_after_seconds>0:
+            return self.hedge_after_seconds
+        p95=self.health[backend.name].get_latency(0.95)
+        return max(llm_hedge_min_seconds, p95) if p95 is not None else None
+
+    @staticmethod
+    def get_backoff_seconds(attempt: int)->float:
+        return random.uniform(0, min(llm_backoff_max_seconds, llm_backoff_base_seconds*2**attempt))
+
+    async def call_backend(self, backend, request: Dict[str, Any])->Any:
+        """
+        Call one backend, retrying quota errors with jittered backoff.
+
+        Raises:
+            BackendUnavailableError: If the backend's circuit is open or its rate limit is exhausted.
+        """
+        health=self.health[backend.name]
+        for attempt in range(self.max_retries+1):
+            if not health.breaker.allow():
+                metrics.llm_routing.inc(backend=backend.name, event="circuit_open")
+                raise BackendUnavailableError(f"circuit open for {backend.name}")
+            if health.bucket is not None and not await health.bucket.acquire_async(llm_rate_limit_wait_seconds):
+                health.breaker.release()
+                metrics.llm_routing.inc(backend=backend.name, event="rate_limited")
+                raise BackendUnavailableError(f"rate limit reached for {backend.name}")
+            start=time.perf_counter()
+            try:
+                result=await backend.generate_async(**request)
+            except asyncio.CancelledError:
+                health.breaker.release()
+                raise
+            except Exception as e:
+                health.record(False)
+                # Quota errors mean slow down, not that the backend is broken, so they are backed off rather than counted
+                if is_quota_error(e):
+                    health.breaker.release()
+                elif health.breaker.record_failure():
+                    logging.warning(f"Circuit opened for {backend.name} after {health.breaker.failures} failures: {e}")
+                if is_quota_error(e) and attempt<self.max_retries:
+                    metrics.llm_routing.inc(backend=backend.name, event="retry")
+                    await asyncio.sleep(self.get_backoff_seconds(attempt))
+                    continue
+                raise
+            health.record(True, time.perf_counter()-start)
+            health.breaker.record_success()
+            return result
+
+    async def generate_async(self, **request)->Any:
+        """
+        Make a model request through the backends.
+
+        Args:
+            **request: Passed to the chosen backend's `generate_async`.
+
+        Returns:
+            Any: The first successful backend's parsed response.
+
+        Raises:
+            Exception: The last backend's error, if every backend failed or was unavailable.
+        """
+        candidates=iter(self.select_backends())
+        tasks={}
+
+        def start(backend, event=None):
+            if event:
+                metrics.llm_routing.inc(backend=backend.name, event=event)
+            tasks[asyncio.ensure_future(self.call_backend(backend, request))]=backend
+
+        primary=next(candidates)
+        start(primary)
+        hedge_delay=self.get_hedge_delay(primary) if self.hedging_enabled and len(self.backends)>1 else None
+        hedged=False
+        last_error=None
+        try:
+            while tasks:
+                done, _=await asyncio.wait(tasks, timeout=None if hedged else hedge_delay, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged=True
+                    backend=next(candidates, None)
+                    if backend is not None:
+                        start(backend, "hedge")
+                    continue
+                for task in done:
+                    backend=tasks.pop(task)
+                    if task.exception() is None:
+                        if backend is not primary:
+                            metrics.llm_routing.inc(backend=backend.name, event="won")
+                        return task.result()
+                    last_error=task.exception()
+                    if not isinstance(last_error, BackendUnavailableError):
+                        logging.error(f"Model call to {backend.name} failed: {last_error}")
+                if not tasks:
+                    backend=next(candidates, None)
+                    if backend is not None:
+                        start(backend, "failover")
+            raise last_error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def get_status(self)->List[Dict[str, Any]]:
+        return [self.health[backend.name].get_status() for backend in self.backends]
@@ -0,0 +1,184 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import string
+import threading
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+from ..config.prompt_config import prompt_template_dir, prompt_template_versions, default_prompt_template
+from .MetricsService import metrics
+
+MIN_TRIMMED_CHARS=40
+# Set by a request to tally the prompts it renders; concurrent model calls share the request's dict
+prompt_usage_var: ContextVar[Optional[Dict[str, int]]]=ContextVar("prompt_usage", default=None)
+
+
+def estimate_tokens(text: str)->int:
+    """
+    Rough token estimate (~4 characters per token) used for prompt budgeting without a count_tokens round-trip.
+    """
+    return len(text)//4+1
+
+
+class PromptTemplate:
+    """
+    A compiled signposting prompt template.
+
+    The prompt text is split into literal and placeholder parts once, when the template is loaded, so rendering is a
+    join. Options are projected to the template's `fields` and, if the JSON still exceeds `option_token_budget`, the
+    `trim_fields` are shortened (at a word boundary) in order until it fits, so one long `description_long` cannot
+    dominate the prompt.
+
+    Attributes:
+        name (str): The template name, usually the organisation it is written for.
+        version (int): The template version.
+        fingerprint (str): Hash of everything that shapes the prompt; description caches are keyed on it.
+    """
+    PLACEHOLDERS={"single": {"category", "option"}, "batch": {"category", "options"}}
+
+    def __init__(self, definition: Dict[str, Any]):
+        self.name=definition["name"]
+        self.version=int(definition["version"])
+        self.description=definition.get("description", "")
+        self.fields: Optional[List[str]]=definition.get("fields")
+        self.trim_fields: List[str]=definition.get("trim_fields", [])
+        self.option_token_budget: Optional[int]=definition.get("option_token_budget")
+        self.parts={kind: self.compile(kind, definition[kind]) for kind in self.PLACEHOLDERS}
+        self.fingerprint=hashlib.sha256(json.dumps(definition, sort_keys=True).encode("utf-8")).hexdigest()
+        self.base_tokens={kind: estimate_tokens(self.render_parts(kind, {"category": "", "option": "", "options": ""})) for kind in self.PLACEHOLDERS}
+
+    def compile(self, kind: str, text):
+        text="\n".join(text) if isinstance(text, list) else text
+        parts=[]
+        for literal, field_name, format_spec, conversion in string.Formatter().parse(text):
+            if field_name is not None and (field_name not in self.PLACEHOLDERS[kind] or format_spec or conversion):
+                raise ValueError(f"Prompt template {self.name} v{self.version} has an unsupported placeholder in its {kind} prompt: {field_name}")
+            parts.append((literal, field_name))
+        return parts
+
+    def render_parts(self, kind: str, values: Dict[str, str])->str:
+        return "".join(literal+(values[field_name] if field_name is not None else "") for literal, field_name in self.parts[kind])
+
+    def project_option(self, option: Dict[str, Any])->Dict[str, Any]:
+        """
+        Keep only the template's fields, dropping empty ones, and trim long text fields to the option token budget.
+        """
+        if self.fields is None:
+            projected=dict(option)
+        else:
+            projected={field: option[field] for field in self.fields if option.get(field) not in (None, "", [])}
+        if self.option_token_budget is None:
+            return projected
+        for field in self.trim_fields:
+            excess_tokens=estimate_tokens(self.serialise(projected))-self.option_token_budget
+            if excess_tokens<=0:
+                break
+            value=projected.get(field)
+            if not isinstance(value, str):
+                continue
+            keep=len(value)-excess_tokens*4
+            if keep<MIN_TRIMMED_CHARS:
+                del projected[field]
+            else:
+                projected[field]=value[:keep].rsplit(" ", 1)[0]+"…"
+        return projected
+
+    def serialise(self, value: Any)->str:
+        # v1 prompts kept json.dumps' default separators; later versions drop the padding
+        if self.version<=1:
+            return json.dumps(value)
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+    def render_single(self, option: Dict[str, Any], category: str)->str:
+        return self.render_parts("single", {"category": category, "option": self.serialise(self.project_option(option))})
+
+    def project_indexed_options(self, indexed_options: List[Dict[str, Any]])->List[Dict[str, Any]]:
+        return [{"index": indexed_option["index"], "organization": self.project_option(indexed_option["organization"])} for indexed_option in indexed_options]
+
+    def render_batch(self, indexed_options: List[Dict[str, Any]], category: str)->str:
+        return self.render_parts("batch", {"category": category, "options": self.serialise(self.project_indexed_options(indexed_options))})
+
+    def estimate_option_tokens(self, indexed_option: Dict[str, Any])->int:
+        return estimate_tokens(self.serialise(self.project_indexed_options([indexed_option])[0]))
+
+    def record_prompt(self, kind: str, prompt: str)->int:
+        """
+        Record the prompt's estimated token count in the `ai_api_prompt_tokens` histogram and the current request's tally.
+
+        Returns:
+            int: The estimated token count.
+        """
+        tokens=estimate_tokens(prompt)
+        metrics.prompt_tokens.observe(tokens, template=self.name, version=str(self.version), kind=kind)
+        usage=prompt_usage_var.get()
+        if usage is not None:
+            usage["prompts"]+=1
+            usage["tokens"]+=tokens
+        return tokens
+
+
+class PromptTemplateRegistry:
+    """
+    Signposting prompt templates loaded from `PROMPT_TEMPLATE_DIR`, compiled once per process.
+
+    Each JSON file holds one version of one template. A name resolves to its latest version unless
+    `PROMPT_TEMPLATE_VERSIONS` pins it (the default template is pinned to v1 unless that sets another version), and a
+    name without templates of its own (an organisation that needs no special wording) resolves to
+    `DEFAULT_PROMPT_TEMPLATE`.
+    """
+    def __init__(self, template_dir: str=prompt_template_dir, pinned_versions: Dict[str, int]=prompt_template_versions, default_name: str=default_prompt_template):
+        self.template_dir=template_dir
+        self.pinned_versions=pinned_versions
+        self.default_name=default_name
+        self.templates: Dict[str, Dict[int, PromptTemplate]]={}
+        self.lock=threading.Lock()
+        self.loaded=False
+
+    def load(self):
+        """
+        Load and compile every template. Fails loudly on a malformed template, so a bad deploy is caught at startup.
+        """
+        templates: Dict[str, Dict[int, PromptTemplate]]={}
+        for path in sorted(glob.glob(os.path.join(self.template_dir, "**", "*.json"), recursive=True)):
+            with open(path, encoding="utf-8") as template_file:
+                template=PromptTemplate(json.load(template_file))
+            templates.setdefault(template.name, {})[template.version]=template
+        if self.default_name not in templates:
+            raise ValueError(f"Default prompt template {self.default_name} not found in {self.template_dir}")
+        with self.lock:
+            self.templates=templates
+            self.loaded=True
+        logging.info(f"Loaded prompt templates: {', '.join(f'{name} v{self.get(name).version}' for name in templates)}")
+
+    def get(self, name: Optional[str]=None, version: Optional[int]=None)->PromptTemplate:
+        """
+        Resolve a template by name, loading the templates on first use.
+
+        Args:
+            name (str, optional): Usually the organisation; falls back to the default template when it has none.
+            version (int, optional): A specific version, overriding the configured pin.
+
+        Returns:
+            PromptTemplate: The template.
+        """
+        if not self.loaded:
+            self.load()
+        versions=self.templates.get(name or self.default_name) or self.templates[self.default_name]
+        template_name=next(iter(versions.values())).name
+        version=version or self.pinned_versions.get(template_name) or max(versions)
+        if version not in versions:
+            raise ValueError(f"Prompt template {template_name} has no version {version}")
+        return versions[version]
+
+    def list_templates(self)->List[Dict[str, Any]]:
+        if not self.loaded:
+            self.load()
+        return [
+            {"name": name, "version": version, "active": self.get(name).version==version, "fingerprint": template.fingerprint[:12]}
+            for name, versions in self.templates.items() for version, template in sorted(versions.items())
+        ]
+
+
+prompt_registry=PromptTemplateRegistry()
@@ -0,0 +1,143 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from ..config.coalescing_config import request_coalescing_enabled, llm_coalescing_timeout_seconds, translation_coalescing_timeout_seconds
+from .MetricsService import metrics
+
+flights: Dict[str, "SingleFlight"]={}
+
+
+class CoalescedCallTimeoutError(TimeoutError):
+    """
+    Raised when a caller gives up waiting on an upstream call after `timeout_seconds`.
+    """
+
+
+class AsyncFlight:
+    def __init__(self, task: asyncio.Task):
+        self.task=task
+        self.waiters=0
+
+
+class ThreadFlight:
+    def __init__(self):
+        self.done=threading.Event()
+        self.result=None
+        self.error=None
+
+
+class SingleFlight:
+    """
+    Collapses concurrent identical calls into one upstream call whose result (or error) is shared by every caller.
+
+    Callers pass a key identifying the request, e.g. a hash of the normalised prompt and its config. While a call for
+    that key is in flight, later callers wait on it instead of starting their own; once it finishes the key is free
+    again, so results are not reused beyond the callers that overlapped (that is what the caches are for).
+
+    Async callers share an `asyncio.Task`. Leaving, by timeout or cancellation, does not cancel the task while other
+    callers still wait on it; it is cancelled when the last one leaves. Sync callers, which run on worker threads, wait
+    on the thread that made the call; that thread cannot be interrupted, so only the other callers are bounded by the
+    timeout.
+
+    Attributes:
+        name (str): Label for the metrics, e.g. `vertexai.generate`.
+        timeout_seconds (float): How long a caller waits on a call before raising `CoalescedCallTimeoutError`.
+        enabled (bool): When False every call goes upstream.
+    """
+    def __init__(self, name: str, timeout_seconds: float, enabled: bool=request_coalescing_enabled):
+        self.name=name
+        self.timeout_seconds=timeout_seconds
+        self.enabled=enabled
+        self.async_flights: Dict[str, AsyncFlight]={}
+        self.thread_flights: Dict[str, ThreadFlight]={}
+        self.lock=threading.Lock()
+        flights[name]=self
+
+    def release_async_flight(self, key: str, flight: AsyncFlight):
+        if self.async_flights.get(key) is flight:
+            del self.async_flights[key]
+
+    async def do_async(self, key: str, call: Callable[[], Awaitable[Any]], timeout_seconds: Optional[float]=None)->Any:
+        """
+        Await `call()`, or the call already in flight for `key`.
+
+        Args:
+            key (str): Identifies the request.
+            call (Callable[[], Awaitable]): Starts the upstream call.
+            timeout_seconds (float, optional): Overrides `timeout_seconds` for this key.
+
+        Raises:
+            CoalescedCallTimeoutError: If the call does not finish in time.
+        """
+        if not self.enabled:
+            return await call()
+        loop=asyncio.get_running_loop()
+        flight=self.async_flights.get(key)
+        if flight is None or flight.task.get_loop() is not loop:
+            flight=AsyncFlight(loop.create_task(call()))
+            self.async_flights[key]=flight
+            flight.task.add_done_callback(lambda _, key=key, flight=flight: self.release_async_flight(key, flight))
+            metrics.request_coalescing.inc(name=self.name, outcome="leader")
+        else:
+            metrics.request_coalescing.inc(name=self.name, outcome="coalesced")
+        flight.waiters+=1
+        try:
+            return await asyncio.wait_for(asyncio.shield(flight.task), timeout_seconds or self.timeout_seconds)
+        except asyncio.TimeoutError:
+            metrics.request_coalescing.inc(name=self.name, outcome="timeout")
+            raise CoalescedCallTimeoutError(f"{self.name} call did not finish within {timeout_seconds or self.timeout_seconds}s")
+        finally:
+            flight.waiters-=1
+            if flight.waiters==0 and not flight.task.done():
+                # Nobody is left to use the result; free the key at once so a new caller starts afresh
+                flight.task.cancel()
+                self.release_async_flight(key, flight)
+
+    def do(self, key: str, call: Callable[[], Any], timeout_seconds: Optional[float]=None)->Any:
+        """
+        Blocking counterpart of `do_async`, for calls made on worker threads.
+        """
+        if not self.enabled:
+            return call()
+        with self.lock:
+            flight=self.thread_flights.get(key)
+            leader=flight is None
+            if leader:
+                flight=ThreadFlight()
+                self.thread_flights[key]=flight
+        if leader:
+            metrics.request_coalescing.inc(name=self.name, outcome="leader")
+            try:
+                flight.result=call()
+                return flight.result
+            except Exception as e:
+                flight.error=e
+                raise
+            finally:
+                with self.lock:
+                    del self.thread_flights[key]
+                flight.done.set()
+        metrics.request_coalescing.inc(name=self.name, outcome="coalesced")
+        if not flight.done.wait(timeout_seconds or self.timeout_seconds):
+            metrics.request_coalescing.inc(name=self.name, outcome="timeout")
+            raise CoalescedCallTimeoutError(f"{self.name} call did not finish within {timeout_seconds or self.timeout_seconds}s")
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def in_flight(self)->int:
+        with self.lock:
+            return len(self.async_flights)+len(self.thread_flights)
+
+
+def render_coalescing_metrics()->List[str]:
+    lines=["# HELP ai_api_coalescing_in_flight Distinct upstream calls in flight that identical requests can join.", "# TYPE ai_api_coalescing_in_flight gauge"]
+    for name, flight in flights.items():
+        lines.append(f'ai_api_coalescing_in_flight{{name="{name}"}} {flight.in_flight()}')
+    return lines
+
+
+metrics.register_collector(render_coalescing_metrics)
+
+model_flights=SingleFlight("vertexai.generate", llm_coalescing_timeout_seconds)
+translation_flights=SingleFlight("translate.api", translation_coalescing_timeout_seconds)
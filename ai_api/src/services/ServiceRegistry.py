@@ -0,0 +1,171 @@
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+from pymongo import errors
+from ..config.vertexai_config import signposting_model_name, vertexai_model_names
+from ..config.routing_config import signposting_model_routes
+from .AI_Service import VertexAI_Service, OpenAI_Service
+from .DatabaseService import DatabaseService, DB_NAME
+from .PromptTemplateService import prompt_registry
+from .SignpostingIndexService import SignpostingIndex
+from .SignpostingStoreService import SignpostingStore
+from .SpeechToTextService import SpeechToTextService
+from .TranscriptionJobService import TranscriptionJobService
+from .TranslationService import TranslationService
+
+
+class ServiceRegistry:
+    """
+    Process-wide registry of service instances, so SDK clients and models are created once per worker instead of once per request.
+
+    Services are created eagerly by `initialise` (run from the app lifespan) and lazily on first use if a request arrives
+    before initialisation has finished. Vertex AI services are kept per model name so several models can be served side by side.
+
+    Attributes:
+        ready (bool): Whether eager initialisation has completed.
+        error (str | None): The error raised by the last failed initialisation, if any.
+    """
+    def __init__(self):
+        self.lock=threading.RLock()
+        self.vertexai_services: Dict[str, VertexAI_Service]={}
+        self.translation_services: Dict[str, TranslationService]={}
+        self.openai_service: Optional[OpenAI_Service]=None
+        self.speech_to_text_service: Optional[SpeechToTextService]=None
+        self.transcription_job_service: Optional[TranscriptionJobService]=None
+        self.signposting_index: Optional[SignpostingIndex]=None
+        self.signposting_store: Optional[SignpostingStore]=None
+        self.ready=False
+        self.error=None
+        self.initialised_at=None
+        self.initialisation_seconds=None
+
+    def initialise(self, model_names: List[str]=vertexai_model_names):
+        """
+        Create every service up front and make sure the database indexes exist. Errors are recorded rather than raised so the readiness probe can report them.
+        """
+        start=time.perf_counter()
+        try:
+            DatabaseService(DB_NAME).ensure_indexes()
+        except errors.PyMongoError as e:
+            logging.error(f"Error creating database indexes: {e}")
+        try:
+            prompt_registry.load()
+            self.get_signposting_index()
+            for model_name in model_names:
+                self.get_vertexai_service(model_name)
+            self.get_openai_service()
+            self.get_speech_to_text_service()
+            transcription_job_service=self.get_transcription_job_service()
+        except Exception as e:
+            logging.error(f"Error initialising services: {e}")
+            self.error=str(e)
+            return
+        try:
+            transcription_job_service.queue.ensure_indexes()
+        except errors.PyMongoError as e:
+            logging.error(f"Error creating transcription queue indexes: {e}")
+        try:
+            self.get_signposting_store().ensure_indexes()
+        except errors.PyMongoError as e:
+            logging.error(f"Error creating signposting store indexes: {e}")
+        self.initialisation_seconds=time.perf_counter()-start
+        self.initialised_at=time.time()
+        self.error=None
+        self.ready=True
+        logging.info(f"Services initialised in {self.initialisation_seconds:.3f}s")
+
+    def get_vertexai_service(self, model_name: str)->VertexAI_Service:
+        with self.lock:
+            if model_name not in self.vertexai_services:
+                routes=signposting_model_routes if model_name==signposting_model_name else None
+                self.vertexai_services[model_name]=VertexAI_Service("vertexai", model_name, routes=routes)
+            return self.vertexai_services[model_name]
+
+    def get_openai_service(self)->OpenAI_Service:
+        with self.lock:
+            if self.openai_service is None:
+                self.openai_service=OpenAI_Service("openai", db_service=DatabaseService(DB_NAME))
+            return self.openai_service
+
+    def get_speech_to_text_service(self)->SpeechToTextService:
+        with self.lock:
+            if self.speech_to_text_service is None:
+                self.speech_to_text_service=SpeechToTextService()
+            return self.speech_to_text_service
+
+    def get_transcription_job_service(self)->TranscriptionJobService:
+        with self.lock:
+            if self.transcription_job_service is None:
+                self.transcription_job_service=TranscriptionJobService(DatabaseService(DB_NAME), self.get_speech_to_text_service())
+            return self.transcription_job_service
+
+    def get_signposting_index(self)->SignpostingIndex:
+        with self.lock:
+            if self.signposting_index is None:
+                self.signposting_index=SignpostingIndex()
+                self.signposting_index.load()
+            return self.signposting_index
+
+    def get_signposting_store(self)->SignpostingStore:
+        with self.lock:
+            if self.signposting_store is None:
+                self.signposting_store=SignpostingStore(DatabaseService(DB_NAME).db["signposting_messages"])
+            return self.signposting_store
+
+    def get_translation_service(self, target_language: str)->TranslationService:
+        with self.lock:
+            if target_language not in self.translation_services:
+                self.translation_services[target_language]=TranslationService(target_language)
+            return self.translation_services[target_language]
+
+    def get_status(self)->Dict:
+        return {
+            "ready":self.ready,
+            "error":self.error,
+            "initialised_at":self.initialised_at,
+            "initialisation_seconds":self.initialisation_seconds,
+            "vertexai_models":list(self.vertexai_services),
+            "llm_backends":{model_name: service.router.get_status() for model_name, service in self.vertexai_services.items()},
+            "translation_languages":list(self.translation_services),
+            "openai":self.openai_service is not None,
+            "speech_to_text":self.speech_to_text_service is not None,
+            "signposting_index_options":self.signposting_index.live_docs if self.signposting_index is not None else None,
+            "prompt_templates":{template["name"]: template["version"] for template in prompt_registry.list_templates() if template["active"]} if prompt_registry.loaded else {},
+        }
+
+    def shutdown(self):
+        with self.lock:
+            if self.signposting_index is not None:
+                self.signposting_index.close()
+                self.signposting_index=None
+            self.vertexai_services.clear()
+            self.translation_services.clear()
+            self.openai_service=None
+            self.speech_to_text_service=None
+            self.transcription_job_service=None
+            self.signposting_store=None
+            self.ready=False
+
+
+registry=ServiceRegistry()
+
+
+def get_signposting_service()->VertexAI_Service:
+    return registry.get_vertexai_service(signposting_model_name)
+
+
+def get_signposting_index()->SignpostingIndex:
+    return registry.get_signposting_index()
+
+
+def get_openai_service()->OpenAI_Service:
+    return registry.get_openai_service()
+
+
+def get_speech_to_text_service()->SpeechToTextService:
+    return registry.get_speech_to_text_service()
+
+
+def get_transcription_job_service()->TranscriptionJobService:
+    return registry.get_transcription_job_service()
@@ -0,0 +1,440 @@
+import contextlib
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from ..config.retrieval_config import signposting_index_dir, signposting_location_weight, signposting_index_autosave_updates, bm25_k1, bm25_b
+
+TOKEN_PATTERN=re.compile(r"[a-z0-9]+")
+STOPWORDS=frozenset("a an and are as at be by for from has have in is it its of on or our that the their to we who with you your".split())
+# Tags are chosen by people and short, so a match there says more than one in a long free-text description
+FIELD_WEIGHTS={"category_tags": 3, "description_short": 2, "name": 1, "description_long": 1, "area_covered": 1, "postcode": 1}
+ARRAY_NAMES=["tokens", "doc_start", "doc_length", "deleted", "doc_outward", "doc_area", "doc_local", "doc_freq"]
+
+
+def tokenize(text: str)->List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if len(token)>1 and token not in STOPWORDS]
+
+
+def parse_postcode(postcode: Optional[str])->Tuple[str, str]:
+    """
+    Split a UK postcode into its outward code (`SW1A`) and area (`SW`). Partial postcodes are taken as outward codes.
+    """
+    postcode=re.sub(r"[^A-Z0-9]", "", (postcode or "").upper())
+    outward=postcode[:-3] if len(postcode)>=5 else postcode
+    area=re.match(r"[A-Z]*", outward).group(0)
+    return outward, area
+
+
+class GrowableArray:
+    """
+    NumPy array with amortised O(1) appends, so the index can grow one option at a time.
+    """
+    def __init__(self, dtype, values=None):
+        self.data=np.array(values if values is not None else [], dtype=dtype)
+        self.size=len(self.data)
+
+    def append(self, value):
+        if self.size==len(self.data):
+            grown=np.zeros(max(16, 2*len(self.data)), dtype=self.data.dtype)
+            grown[:self.size]=self.data
+            self.data=grown
+        self.data[self.size]=value
+        self.size+=1
+
+    def view(self)->np.ndarray:
+        return self.data[:self.size]
+
+
+class SignpostingIndex:
+    """
+    In-process BM25 index over signposting options, used to rank a request's options by relevance and location and
+    cap how many reach the model.
+
+    Each option is tokenised from `category_tags`, `description_short`, `description_long`, `area_covered`, `postcode`
+    and `name` (weighted by `FIELD_WEIGHTS`) into one flat array of term ids. Options are keyed by name, organisation
+    and postcode; re-adding a changed option tombstones its old entry, and unchanged options are not re-indexed.
+
+    With `SIGNPOSTING_INDEX_DIR` set the index is saved there and the token array, which holds nearly all of its
+    size, is memory-mapped on load, so workers share it through the page cache. Options added since the last save live
+    in an in-memory tail that is folded in on the next save. After `SIGNPOSTING_INDEX_AUTOSAVE_UPDATES` additions a
+    background thread saves the index, so requests never wait on the disk, and `close` saves it at shutdown. Saves drop
+    tombstoned options, so the saved index only holds the current ones. Each save writes a new generation directory
+    and switches the `CURRENT` pointer atomically, so a worker never loads a half-written index.
+
+    A saved index is one worker's snapshot: workers do not merge their additions, and the last one to save replaces the
+    others' generations. Options a worker never ranked are indexed again, once, when it first sees them.
+
+    Attributes:
+        index_dir (str): Where the index is persisted, or "" to keep it in memory only.
+        location_weight (float): Weight of the location score against the (normalised) text score.
+    """
+    def __init__(self, index_dir: str=signposting_index_dir, location_weight: float=signposting_location_weight, autosave_updates: int=signposting_index_autosave_updates):
+        self.index_dir=index_dir
+        self.location_weight=location_weight
+        self.autosave_updates=autosave_updates
+        self.lock=threading.RLock()
+        self.save_requested=threading.Event()
+        self.saver: Optional[threading.Thread]=None
+        self.closing=False
+        self.reset()
+
+    def reset(self):
+        self.vocabulary: Dict[str, int]={}
+        self.terms: List[str]=[]
+        self.doc_ids: Dict[str, int]={}
+        self.doc_keys: List[str]=[]
+        self.content_hashes: List[str]=[]
+        self.base_tokens=np.zeros(0, dtype=np.int32)
+        self.pending_tokens: List[int]=[]
+        self.pending_array=np.zeros(0, dtype=np.int32)
+        self.doc_start=GrowableArray(np.int64)
+        self.doc_length=GrowableArray(np.int32)
+        self.deleted=GrowableArray(np.bool_)
+        self.doc_outward=GrowableArray("<U8")
+        self.doc_area=GrowableArray("<U4")
+        self.doc_local=GrowableArray(np.bool_)
+        self.doc_freq=GrowableArray(np.int32)
+        self.live_docs=0
+        self.live_length=0
+        self.revision=0
+        self.saved_revision=0
+        self.token_docs=None
+
+    @staticmethod
+    def get_option_key(option: Dict[str, Any])->str:
+        identity="\x1f".join(str(option.get(field) or "") for field in ("name", "organizationName", "postcode"))
+        return hashlib.sha256(identity.encode("utf-8")).hexdigest()[:24]
+
+    @staticmethod
+    def get_option_text(option: Dict[str, Any], field: str)->str:
+        value=option.get(field) or ""
+        return " ".join(value) if isinstance(value, list) else str(value)
+
+    def get_term_id(self, term: str)->int:
+        term_id=self.vocabulary.get(term)
+        if term_id is None:
+            term_id=self.vocabulary[term]=len(self.terms)
+            self.terms.append(term)
+            self.doc_freq.append(0)
+        return term_id
+
+    def get_doc_tokens(self, doc_id: int)->np.ndarray:
+        start, length=int(self.doc_start.data[doc_id]), int(self.doc_length.data[doc_id])
+        if start<len(self.base_tokens):
+            return self.base_tokens[start:start+length]
+        if len(self.pending_array)!=len(self.pending_tokens):
+            self.pending_array=np.array(self.pending_tokens, dtype=np.int32)
+        start-=len(self.base_tokens)
+        return self.pending_array[start:start+length]
+
+    def get_all_tokens(self)->np.ndarray:
+        if not self.pending_tokens:
+            return self.base_tokens
+        return np.concatenate([self.base_tokens, np.asarray(self.pending_tokens, dtype=np.int32)])
+
+    def remove_doc(self, doc_id: int):
+        self.deleted.data[doc_id]=True
+        self.doc_freq.data[np.unique(self.get_doc_tokens(doc_id))]-=1
+        self.live_docs-=1
+        self.live_length-=int(self.doc_length.data[doc_id])
+
+    def add_option(self, option: Dict[str, Any])->int:
+        """
+        Index an option, or return its existing entry if it has not changed.
+
+        Returns:
+            int: The option's document id.
+        """
+        with self.lock:
+            texts={field: self.get_option_text(option, field) for field in FIELD_WEIGHTS}
+            key=self.get_option_key(option)
+            content_hash=hashlib.sha256(json.dumps([texts, option.get("location_scope")], sort_keys=True).encode("utf-8")).hexdigest()[:24]
+            doc_id=self.doc_ids.get(key)
+            if doc_id is not None:
+                if self.content_hashes[doc_id]==content_hash:
+                    return doc_id
+                self.remove_doc(doc_id)
+            token_ids=[self.get_term_id(token) for field, weight in FIELD_WEIGHTS.items() for token in tokenize(texts[field])*weight]
+            for term_id in set(token_ids):
+                self.doc_freq.data[term_id]+=1
+            doc_id=len(self.doc_keys)
+            outward, area=parse_postcode(option.get("postcode"))
+            self.doc_start.append(len(self.base_tokens)+len(self.pending_tokens))
+            self.doc_length.append(len(token_ids))
+            self.deleted.append(False)
+            self.doc_outward.append(outward)
+            self.doc_area.append(area)
+            self.doc_local.append(option.get("location_scope")=="local")
+            self.pending_tokens.extend(token_ids)
+            self.doc_ids[key]=doc_id
+            self.doc_keys.append(key)
+            self.content_hashes.append(content_hash)
+            self.live_docs+=1
+            self.live_length+=len(token_ids)
+            self.revision+=1
+            self.token_docs=None
+            if self.index_dir and self.autosave_updates and self.revision-self.saved_revision>=self.autosave_updates:
+                self.request_save()
+            return doc_id
+
+    def add_options(self, options: List[Dict[str, Any]])->List[int]:
+        with self.lock:
+            return [self.add_option(option) for option in options]
+
+    def get_query_ids(self, query: str)->np.ndarray:
+        return np.unique(np.array([self.vocabulary[token] for token in tokenize(query) if token in self.vocabulary], dtype=np.int32))
+
+    def score_text(self, query_ids: np.ndarray, doc_ids: Optional[np.ndarray]=None)->np.ndarray:
+        """
+        BM25 scores of `doc_ids` (every document if None) for the query terms.
+        """
+        if doc_ids is None:
+            if self.token_docs is None:
+                self.token_docs=np.repeat(np.arange(len(self.doc_keys), dtype=np.int32), self.doc_length.view())
+            tokens=self.get_all_tokens()
+            token_docs=self.token_docs
+            doc_count=len(self.doc_keys)
+            lengths=self.doc_length.view()
+        else:
+            tokens=np.concatenate([self.get_doc_tokens(doc_id) for doc_id in doc_ids]) if len(doc_ids) else np.zeros(0, dtype=np.int32)
+            lengths=self.doc_length.data[doc_ids]
+            token_docs=np.repeat(np.arange(len(doc_ids), dtype=np.int32), lengths)
+            doc_count=len(doc_ids)
+        scores=np.zeros(doc_count, dtype=np.float32)
+        if len(query_ids)==0 or self.live_docs==0:
+            return scores
+        matched=np.isin(tokens, query_ids)
+        tokens, token_docs=tokens[matched], token_docs[matched]
+        length_norm=bm25_k1*(1-bm25_b+bm25_b*lengths/max(1.0, self.live_length/self.live_docs))
+        for term_id in query_ids:
+            term_frequency=np.bincount(token_docs[tokens==term_id], minlength=doc_count)
+            document_frequency=self.doc_freq.data[term_id]
+            idf=np.log(1+(self.live_docs-document_frequency+0.5)/(document_frequency+0.5))
+            scores+=idf*term_frequency*(bm25_k1+1)/(term_frequency+length_norm)
+        return scores
+
+    def score_location(self, postcode: Optional[str], doc_ids: Optional[np.ndarray]=None)->np.ndarray:
+        """
+        1 for options in the same outward code, 0.5 in the same postcode area, 0.25 for options that are not local
+        (regional or national services), otherwise 0.
+        """
+        select=(lambda array: array.view()) if doc_ids is None else (lambda array: array.data[doc_ids])
+        outward, area=parse_postcode(postcode)
+        not_local=~select(self.doc_local)
+        if not outward:
+            return np.zeros(len(not_local), dtype=np.float32)
+        return np.maximum.reduce([
+            (select(self.doc_outward)==outward)*1.0,
+            ((select(self.doc_area)==area)&(area!=""))*0.5,
+            not_local*0.25,
+        ]).astype(np.float32)
+
+    def score(self, query: str, postcode: Optional[str]=None, doc_ids: Optional[np.ndarray]=None)->np.ndarray:
+        text_scores=self.score_text(self.get_query_ids(query), doc_ids)
+        if text_scores.max(initial=0)>0:
+            text_scores=text_scores/text_scores.max()
+        return text_scores+self.location_weight*self.score_location(postcode, doc_ids)
+
+    def rank_options(self, options: List[Dict[str, Any]], query: str, postcode: Optional[str]=None, limit: Optional[int]=None)->List[Dict[str, Any]]:
+        """
+        Index any new options, then order them by relevance to `query` and closeness to `postcode`. Ties keep their
+        original order.
+
+        Returns:
+            list[dict]: At most `limit` options, best first.
+        """
+        with self.lock:
+            doc_ids=np.array(self.add_options(options), dtype=np.int64)
+            scores=self.score(query, postcode, doc_ids)
+        order=np.argsort(-scores, kind="stable")
+        return [options[index] for index in order[:limit]]
+
+    def search(self, query: str, postcode: Optional[str]=None, limit: int=10)->List[Tuple[str, float]]:
+        """
+        Rank every indexed option.
+
+        Returns:
+            list[tuple[str, float]]: The keys and scores of the best `limit` options.
+        """
+        with self.lock:
+            scores=self.score(query, postcode)
+            scores[self.deleted.view()]=-np.inf
+            limit=min(limit, len(scores))
+            best=np.argpartition(-scores, limit-1)[:limit] if limit else np.zeros(0, dtype=np.int64)
+            best=best[np.argsort(-scores[best], kind="stable")]
+            return [(self.doc_keys[doc_id], float(scores[doc_id])) for doc_id in best if np.isfinite(scores[doc_id])]
+
+    @contextlib.contextmanager
+    def lock_index_dir(self):
+        """
+        Hold an exclusive lock on `index_dir` across processes, so workers saving at once take turns.
+        """
+        os.makedirs(self.index_dir, exist_ok=True)
+        with open(os.path.join(self.index_dir, ".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def request_save(self):
+        """
+        Wake the background saver, starting it on first use. Called with `lock` held.
+        """
+        if self.closing:
+            return
+        if self.saver is None:
+            self.saver=threading.Thread(target=self.run_saver, name="signposting-index-saver", daemon=True)
+            self.saver.start()
+        self.save_requested.set()
+
+    def run_saver(self):
+        while True:
+            self.save_requested.wait()
+            self.save_requested.clear()
+            if self.closing:
+                return
+            try:
+                self.save()
+            except OSError as e:
+                logging.error(f"Error saving signposting index: {e}")
+
+    def create_snapshot(self)->Tuple[Dict[str, np.ndarray], Dict[str, List[str]]]:
+        """
+        Copy the live options' arrays and metadata, leaving tombstoned options out. Called with `lock` held.
+        """
+        live=~self.deleted.view()
+        lengths=self.doc_length.view()
+        live_lengths=lengths[live]
+        # Documents are laid out in id order, so the live ones' tokens are selected by repeating each flag over its length
+        tokens=np.asarray(self.get_all_tokens()[np.repeat(live, lengths)], dtype=np.int32)
+        arrays={
+            "tokens": tokens,
+            "doc_start": (np.cumsum(live_lengths, dtype=np.int64)-live_lengths),
+            "doc_length": live_lengths.copy(),
+            "deleted": np.zeros(len(live_lengths), dtype=np.bool_),
+            "doc_outward": self.doc_outward.view()[live].copy(),
+            "doc_area": self.doc_area.view()[live].copy(),
+            "doc_local": self.doc_local.view()[live].copy(),
+            "doc_freq": self.doc_freq.view().copy(),
+        }
+        live_ids=np.flatnonzero(live)
+        meta={
+            "terms": list(self.terms),
+            "doc_keys": [self.doc_keys[doc_id] for doc_id in live_ids],
+            "content_hashes": [self.content_hashes[doc_id] for doc_id in live_ids],
+        }
+        return arrays, meta
+
+    def save(self):
+        """
+        Write the index to a new generation directory, point `CURRENT` at it and memory-map the saved tokens.
+
+        Only the snapshot is taken under `lock`; the files are written outside it, so rankings carry on during a save.
+        The generation is written under a temporary name and renamed once complete, and `CURRENT` is replaced
+        atomically, so a reader never sees a partial generation. Saves from several workers are serialised by a lock
+        file, which also keeps one worker's pruning from removing a generation another is writing. If options were
+        added while the files were written, the in-memory index is kept and they are saved next time.
+        """
+        with self.lock:
+            revision=self.revision
+            arrays, meta=self.create_snapshot()
+        with self.lock_index_dir():
+            generation=f"gen-{time.time_ns()}"
+            path=os.path.join(self.index_dir, generation)
+            temporary_path=os.path.join(self.index_dir, f"tmp-{generation}")
+            os.makedirs(temporary_path)
+            for name, array in arrays.items():
+                np.save(os.path.join(temporary_path, f"{name}.npy"), array)
+            with open(os.path.join(temporary_path, "meta.json"), "w", encoding="utf-8") as meta_file:
+                json.dump(meta, meta_file)
+            os.rename(temporary_path, path)
+            pointer=os.path.join(self.index_dir, "CURRENT")
+            with open(f"{pointer}.{os.getpid()}.tmp", "w", encoding="utf-8") as pointer_file:
+                pointer_file.write(generation)
+            os.replace(f"{pointer}.{os.getpid()}.tmp", pointer)
+            with self.lock:
+                if self.revision==revision:
+                    self.load_generation(path)
+                    self.revision=self.saved_revision=revision
+            self.remove_old_generations(keep={generation})
+        logging.info(f"Saved signposting index with {len(meta['doc_keys'])} options to {path}")
+
+    def remove_old_generations(self, keep):
+        """
+        Delete all but the two newest generations, and anything left by a save that crashed. Called with the lock held.
+        """
+        names=os.listdir(self.index_dir)
+        # Keep the previous generation too: another worker may still be loading it
+        generations=sorted(name for name in names if name.startswith("gen-"))
+        stale=[name for name in generations[:-2] if name not in keep]+[name for name in names if name.startswith("tmp-")]
+        for name in stale:
+            shutil.rmtree(os.path.join(self.index_dir, name), ignore_errors=True)
+        for name in names:
+            if name.startswith("CURRENT.") and name.endswith(".tmp"):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(os.path.join(self.index_dir, name))
+
+    def load(self)->bool:
+        """
+        Load the current generation from `index_dir`, if there is one.
+
+        Returns:
+            bool: Whether an index was loaded.
+        """
+        pointer=os.path.join(self.index_dir, "CURRENT")
+        if not self.index_dir or not os.path.exists(pointer):
+            return False
+        with open(pointer, encoding="utf-8") as pointer_file:
+            path=os.path.join(self.index_dir, pointer_file.read().strip())
+        with self.lock:
+            self.load_generation(path)
+        logging.info(f"Loaded signposting index with {self.live_docs} options from {path}")
+        return True
+
+    def load_generation(self, path: str):
+        """
+        Replace the in-memory index with a saved generation. Called with `lock` held.
+        """
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as meta_file:
+            meta=json.load(meta_file)
+        arrays={name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in ARRAY_NAMES}
+        self.reset()
+        self.base_tokens=arrays["tokens"]
+        # Per-option arrays are small and updated in place, so they are copied into memory
+        for name in ARRAY_NAMES[1:]:
+            growable=getattr(self, name)
+            growable.data=np.array(arrays[name])
+            growable.size=len(growable.data)
+        self.terms=meta["terms"]
+        self.vocabulary={term: term_id for term_id, term in enumerate(self.terms)}
+        self.doc_keys=meta["doc_keys"]
+        self.content_hashes=meta["content_hashes"]
+        live=~self.deleted.view()
+        self.doc_ids={key: doc_id for doc_id, key in enumerate(self.doc_keys) if live[doc_id]}
+        self.live_docs=int(live.sum())
+        self.live_length=int(self.doc_length.view()[live].sum())
+
+    def close(self):
+        """
+        Stop the background saver and save any options added since the last save.
+        """
+        with self.lock:
+            self.closing=True
+            saver=self.saver
+        if saver is not None:
+            self.save_requested.set()
+            saver.join()
+        if self.index_dir and self.revision!=self.saved_revision:
+            try:
+                self.save()
+            except OSError as e:
+                logging.error(f"Error saving signposting index: {e}")
@@ -0,0 +1,83 @@
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List
+from .AI_Service import VertexAI_Service
+from .SignpostingStoreService import SignpostingStore
+from .TranslationService import TranslationService
+
+
+class SignpostingPregenerator:
+    """
+    Generates the signposting messages of a catalogue ahead of time and writes them to the `SignpostingStore`.
+
+    Only options whose content hash has changed since the last run (new or edited options, or a new prompt template
+    or model) are described again. Descriptions are generated with the service's bounded concurrency and batching
+    mode. Each language's missing translations are then sent to the Translation API together, in batches of up to
+    `TranslationService.MAX_SEGMENTS_PER_REQUEST`. Options whose description failed are left out, so the next run
+    retries them and requests fall back to live generation for them.
+
+    Attributes:
+        llm_service (VertexAI_Service): Generates the descriptions.
+        store (SignpostingStore): Where messages are written.
+        get_translation_service (Callable[[str], TranslationService]): Returns the translation service for a language.
+    """
+    def __init__(self, llm_service: VertexAI_Service, store: SignpostingStore, get_translation_service: Callable[[str], TranslationService]):
+        self.llm_service=llm_service
+        self.store=store
+        self.get_translation_service=get_translation_service
+
+    async def pregenerate_async(self, organisation: str, category: str, options: List[Dict[str, Any]], languages: List[str])->Dict[str, Any]:
+        """
+        Bring the stored messages for one organisation and category up to date.
+
+        Args:
+            organisation (str): Selects the prompt template, as on the signposting routes.
+            category (str): The category the options are shown for.
+            options (list[dict]): Every option in the catalogue for this organisation and category.
+            languages (list[str]): Languages to store besides English.
+
+        Returns:
+            dict: Counts of options, unchanged options, generated and failed descriptions, translations per language and removed entries.
+        """
+        template=self.llm_service.prompt_templates.get(organisation)
+        hashes=[self.store.create_content_hash(option, category, template, self.llm_service.model_name) for option in options]
+        all_languages=["en"]+[language for language in languages if language!="en"]
+        entry_ids={
+            language: [self.store.create_entry_id(organisation, category, option, language) for option in options]
+            for language in all_languages
+        }
+        existing=await asyncio.to_thread(self.store.find_entries, [entry_id for ids in entry_ids.values() for entry_id in ids])
+
+        def is_current(language, index):
+            entry=existing.get(entry_ids[language][index])
+            return entry is not None and entry["contentHash"]==hashes[index]
+
+        messages={index: existing[entry_ids["en"][index]]["message"] for index in range(len(options)) if is_current("en", index)}
+        stale_indices=[index for index in range(len(options)) if index not in messages]
+        descriptions=await self.llm_service.get_cached_descriptions([options[index] for index in stale_indices], category, template)
+        generated=[]
+        for index, description in zip(stale_indices, descriptions):
+            if description is not None:
+                messages[index]=self.llm_service.create_signposting_message(options[index], description)
+                generated.append({"option": options[index], "contentHash": hashes[index], "message": messages[index]})
+        await asyncio.to_thread(self.store.save_messages, organisation, category, "en", generated)
+
+        async def translate(language):
+            indices=[index for index in sorted(messages) if not is_current(language, index)]
+            translations=await self.get_translation_service(language).translate_batch_async([messages[index] for index in indices])
+            entries=[{"option": options[index], "contentHash": hashes[index], "message": translation} for index, translation in zip(indices, translations)]
+            return language, await asyncio.to_thread(self.store.save_messages, organisation, category, language, entries)
+        translated=dict(await asyncio.gather(*(translate(language) for language in all_languages[1:])))
+        removed=await asyncio.to_thread(self.store.remove_missing_options, organisation, category, options)
+        stats={
+            "organisation": organisation,
+            "category": category,
+            "options": len(options),
+            "unchanged": len(options)-len(stale_indices),
+            "generated": len(generated),
+            "failed": len(stale_indices)-len(generated),
+            "translated": translated,
+            "removed": removed,
+        }
+        logging.info(f"Pre-generated signposting messages: {stats}")
+        return stats
@@ -0,0 +1,135 @@
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+import pymongo
+from pymongo import UpdateOne, errors
+from ..config.pregeneration_config import signposting_store_timeout_seconds, signposting_store_retry_seconds
+from .CacheService import CacheService
+from .MetricsService import metrics
+from .PromptTemplateService import PromptTemplate
+from .SignpostingIndexService import SignpostingIndex
+
+
+class SignpostingStore:
+    """
+    Pre-generated signposting messages, written by the `pregenerate_signposting` job and read by the signposting routes
+    before any model call.
+
+    There is one document per (organisation, category, option, language). Each holds the finished message (the
+    description with the website and location details, translated for languages other than English). Its `contentHash`
+    covers the whole option, the category, the prompt template's fingerprint and the model. An entry whose hash no
+    longer matches is treated as missing, so an edited option or a new template version is never served stale.
+
+    Lookups sit on the request path, so each is bounded by `timeout_seconds` (server selection included), and after a
+    failure the store is skipped for `retry_seconds`: requests then generate their messages live instead of each
+    waiting on an unhealthy Mongo.
+
+    Attributes:
+        collection (Collection): The `signposting_messages` collection.
+        timeout_seconds (float): Time limit of a lookup.
+        retry_seconds (float): How long lookups are skipped after one fails.
+    """
+    def __init__(self, collection, timeout_seconds: float=signposting_store_timeout_seconds, retry_seconds: float=signposting_store_retry_seconds):
+        self.collection=collection
+        self.timeout_seconds=timeout_seconds
+        self.retry_seconds=retry_seconds
+        self.skip_until=0.0
+
+    def ensure_indexes(self):
+        self.collection.create_index([("organisation", 1), ("category", 1)])
+
+    @staticmethod
+    def create_entry_id(organisation: str, category: str, option: Dict[str, Any], language: str)->str:
+        return CacheService.make_key(organisation, category, SignpostingIndex.get_option_key(option), language)
+
+    @staticmethod
+    def resolve_category(category: str, options: List[Dict[str, Any]])->str:
+        """
+        Return the catalogue tag a request's messages are stored under.
+
+        The job stores entries by catalogue tag, while the flows send the user's reply as the category (e.g. "2"). The
+        flows select the options by tag, though, so every option in a request carries it: the request's category is used
+        if all the options are tagged with it, otherwise the first tag they share, otherwise the category as sent.
+        """
+        if not options:
+            return category
+        shared_tags=[tag for tag in options[0].get("category_tags") or [] if all(tag in (option.get("category_tags") or []) for option in options[1:])]
+        if category in shared_tags or not shared_tags:
+            return category
+        return shared_tags[0]
+
+    @staticmethod
+    def create_content_hash(option: Dict[str, Any], category: str, template: PromptTemplate, model_name: str)->str:
+        return CacheService.make_key(option, category, template.fingerprint, model_name)
+
+    def find_entries(self, entry_ids: List[str])->Dict[str, Dict[str, Any]]:
+        return {document["_id"]: document for document in self.collection.find({"_id": {"$in": entry_ids}}, {"message": 1, "contentHash": 1})}
+
+    def get_messages(self, organisation: str, category: str, language: str, options: List[Dict[str, Any]], template: PromptTemplate, model_name: str)->List[Optional[str]]:
+        """
+        Look up the stored messages for a request's options with one query. `category` is the catalogue tag, as
+        returned by `resolve_category`.
+
+        Returns:
+            list[str | None]: One message per option, in the order of `options`. None marks an option with no current
+            entry, and every option is None while the store is being skipped.
+        """
+        if time.monotonic()<self.skip_until:
+            return [None]*len(options)
+        entry_ids=[self.create_entry_id(organisation, category, option, language) for option in options]
+        hashes=[self.create_content_hash(option, category, template, model_name) for option in options]
+        try:
+            with metrics.track_stage("signposting_store.lookup"), pymongo.timeout(self.timeout_seconds):
+                entries=self.find_entries(entry_ids)
+        except errors.PyMongoError as e:
+            self.skip_until=time.monotonic()+self.retry_seconds
+            logging.error(f"Error reading pre-generated signposting messages, skipping the store for {self.retry_seconds}s: {e}")
+            return [None]*len(options)
+        messages=[]
+        for entry_id, content_hash in zip(entry_ids, hashes):
+            entry=entries.get(entry_id)
+            messages.append(entry["message"] if entry is not None and entry["contentHash"]==content_hash else None)
+        return messages
+
+    def save_messages(self, organisation: str, category: str, language: str, entries: List[Dict[str, Any]])->int:
+        """
+        Upsert messages with one `bulk_write`.
+
+        Args:
+            entries (list[dict]): `option`, `contentHash` and `message` of each entry.
+
+        Returns:
+            int: The number of entries written.
+        """
+        if not entries:
+            return 0
+        now=datetime.now(timezone.utc)
+        self.collection.bulk_write([
+            UpdateOne(
+                {"_id": self.create_entry_id(organisation, category, entry["option"], language)},
+                {"$set": {
+                    "organisation": organisation,
+                    "category": category,
+                    "language": language,
+                    "optionKey": SignpostingIndex.get_option_key(entry["option"]),
+                    "contentHash": entry["contentHash"],
+                    "message": entry["message"],
+                    "generatedAt": now,
+                }},
+                upsert=True,
+            )
+            for entry in entries
+        ], ordered=False)
+        return len(entries)
+
+    def remove_missing_options(self, organisation: str, category: str, options: List[Dict[str, Any]])->int:
+        """
+        Delete the entries of options no longer in the catalogue for this organisation and category.
+
+        Returns:
+            int: The number of entries deleted.
+        """
+        option_keys=[SignpostingIndex.get_option_key(option) for option in options]
+        result=self.collection.delete_many({"organisation": organisation, "category": category, "optionKey": {"$nin": option_keys}})
+        return result.deleted_count
@@ -1,11 +1,20 @@
-import requests
+import asyncio
+import hashlib
+import httpx
+import logging
 from google.cloud import speech
-from requests.auth import HTTPBasicAuth
-from ..config.speech_api_config import transcribe_client
+from ..config.speech_api_config import (
+    transcribe_client, audio_download_chunk_size, audio_upload_chunk_size, inline_audio_max_bytes, media_download_timeout_seconds,
+    long_running_min_bytes, audio_buffer_max_bytes, audio_blob_prefix, speech_language_code, speech_alternative_language_codes,
+    max_alternative_language_codes, sync_recognition_max_seconds, audio_probe_bytes, chunked_transcription_enabled,
+    chunked_transcription_min_seconds, transcription_segment_concurrency,
+)
 from ..config.storage_api_config import bucket, bucket_name
+from .AudioProbeService import AudioProbeService, UnsupportedAudioError, describe_format
+from .AudioSegmentService import AudioSegmentService
+from .CacheService import transcription_cache
+from .MetricsService import metrics
 import os
-import tempfile
-import shutil
 from dotenv import load_dotenv
 load_dotenv()
 username=os.environ.get("TWILIO_ACCOUNT_SID")
@@ -13,74 +22,436 @@ password=os.environ.get("TWILIO_AUTH_TOKEN")
 
 
 class SpeechToTextService:
-    def __init__(self):
+    """
+    Transcribes Twilio voice notes. Audio is streamed from Twilio to GCS in chunks and never touches local disk.
+
+    Short clips (known size up to `INLINE_AUDIO_MAX_BYTES`) are held in memory and sent inline with the recognition
+    request; anything larger or of unknown size is piped through a resumable GCS upload, so memory stays bounded by
+    the chunk sizes regardless of clip length.
+
+    The `RecognitionConfig` is built from the clip itself: `AudioProbeService` sniffs the header for the encoding,
+    sample rate, channel count and duration, so WAV, FLAC, AMR or WebM clips are recognised as such instead of
+    as 16 kHz Ogg Opus. Clips Speech-to-Text cannot read (e.g. MP3 or AAC) are transcoded to FLAC once, before upload. Requests may carry
+    a language code and alternative language codes for multilingual users; otherwise `SPEECH_LANGUAGE_CODE` and
+    `SPEECH_ALTERNATIVE_LANGUAGE_CODES` apply.
+
+    Clips longer than `SYNC_RECOGNITION_MAX_SECONDS` (or, when the probe cannot tell the duration, larger than
+    `LONG_RUNNING_MIN_BYTES`) are recognised with `long_running_recognize`, which lifts the ~1 minute limit of
+    synchronous `recognize`. With `CHUNKED_TRANSCRIPTION_ENABLED`, buffered clips longer than
+    `CHUNKED_TRANSCRIPTION_MIN_SECONDS` are instead split on silence by `AudioSegmentService` and the segments
+    recognised concurrently (at most `TRANSCRIPTION_SEGMENT_CONCURRENCY` at a time), which takes the wait from the
+    length of the clip down to that of its longest segment. Results are stitched back in order with word offsets
+    shifted to the whole clip's timeline.
+
+    The `_async` methods serve the request path: media is fetched with httpx and recognition uses `SpeechAsyncClient`,
+    so a worker can hold many transcriptions in flight without a thread each. GCS has no async client, so its writes
+    run on worker threads. Only `get_long_running_transcription` is synchronous; the job poller thread calls it.
+
+    The async path hashes the audio (SHA-256) as it is downloaded. Clips up to `AUDIO_BUFFER_MAX_BYTES` are hashed
+    before anything is uploaded: a clip already in the transcription cache is neither uploaded nor recognised again,
+    and otherwise it is stored under a content-addressed blob name, so an identical clip reuses the existing blob.
+    Larger clips are streamed to GCS as before and only skip recognition on a cache hit.
+
+    Each step is timed as a metrics stage: `twilio.connect` (until the media response headers arrive), `twilio.read`
+    (reading a short clip into memory), `gcs.upload` (for streamed clips this includes reading the download),
+    `speech.recognize`, `speech.recognize_segment`, `speech.long_running_start` and `speech.long_running_poll`.
+    """
+    def __init__(self, cache=transcription_cache):
         self.bucket=bucket
         self.bucket_name=bucket_name
         self.transcribe_client=transcribe_client
+        self.async_transcribe_client=None
+        self.cache=cache
 
-    def download_audio(self, audio_url):
-        temp_dir=tempfile.mkdtemp()
-        basic_auth=HTTPBasicAuth(username, password)
-        try:
-            file_name=audio_url.split("/")[-1]
-            response=requests.get(audio_url, auth=basic_auth)
-            if response.status_code==200:
-                content_type = response.headers.get('Content-Type')
-                extension = content_type.split('/')[-1]
-                file_path = os.path.join(temp_dir, f"{file_name}.{extension}")
-                with open(file_path, 'wb') as f:
-                    f.write(response.content)
-                
-                print(f"Media downloaded successfully and saved as {file_path}")
-                return file_path, temp_dir
-            else:
-                print(f"Failed to download media. Status code: {response}")
-                return None, temp_dir
-        except requests.exceptions.RequestException as e:
-            # Handle network-related errors
-            print(f"Network error occurred: {e}")
-            return None
-
-        except OSError as e:
-            # Handle file system errors
-            print(f"File I/O error occurred: {e}")
-            return None
+    def get_async_transcribe_client(self):
+        # Created on first use so the gRPC channel is bound to the running event loop
+        if self.async_transcribe_client is None:
+            self.async_transcribe_client=speech.SpeechAsyncClient()
+        return self.async_transcribe_client
 
-        except Exception as e:
-            # Catch any other exceptions
-            print(f"An unexpected error occurred: {e}")
-            return None
+    @staticmethod
+    def get_blob_name(audio_url, content_type):
+        file_name=audio_url.split("/")[-1]
+        extension=content_type.split('/')[-1]
+        return f"{file_name}.{extension}"
 
-    def upload_to_gcs(self, file_path):
-        destination_blob_name=f"{os.path.basename(file_path)}"
+    def upload_to_gcs(self, audio_content, destination_blob_name, content_type):
         blob=self.bucket.blob(destination_blob_name)
-        blob.upload_from_filename(file_path)
-        gcs_uri = f"gs://{self.bucket_name}/{destination_blob_name}"
-        print(f"file uploaded at {gcs_uri}")
+        with metrics.track_stage("gcs.upload"):
+            blob.upload_from_string(audio_content, content_type=content_type)
+        gcs_uri=f"gs://{self.bucket_name}/{destination_blob_name}"
+        logging.info(f"file uploaded at {gcs_uri}")
         return gcs_uri
-    
-    def transcribe_audio(self, gcs_uri):
-        audio=speech.RecognitionAudio(uri=gcs_uri)
-        config = speech.RecognitionConfig(
-        encoding=speech.RecognitionConfig.AudioEncoding.OGG_OPUS,  # Change based on your audio format
-        sample_rate_hertz=16000,  # Set based on your file
-        language_code="en-US",  # Language of the audio
-    )
-        response=self.transcribe_client.recognize(config=config, audio=audio)
+
+    async def stream_to_gcs_async(self, response, destination_blob_name, content_type, head=b"", hasher=None):
+        """
+        Pipe an httpx streaming response into a resumable GCS upload.
+
+        Downloaded chunks are buffered up to the upload chunk size so each blocking write to GCS is one upload request.
+
+        Args:
+            response (httpx.Response): The open streaming response.
+            destination_blob_name (str): The blob to write.
+            content_type (str): The clip's content type.
+            head (bytes, optional): Bytes already read from the response, written first.
+            hasher (hashlib._Hash, optional): Updated with every chunk read from the response.
+
+        Returns:
+            tuple[str, int]: The GCS URI and the number of bytes uploaded.
+        """
+        blob=self.bucket.blob(destination_blob_name)
+        size_bytes=len(head)
+        buffer=bytearray(head)
+        with metrics.track_stage("gcs.upload"):
+            gcs_file=await asyncio.to_thread(blob.open, "wb", chunk_size=audio_upload_chunk_size, content_type=content_type)
+            try:
+                async for chunk in response.aiter_bytes(chunk_size=audio_download_chunk_size):
+                    if hasher is not None:
+                        hasher.update(chunk)
+                    buffer.extend(chunk)
+                    size_bytes+=len(chunk)
+                    if len(buffer)>=audio_upload_chunk_size:
+                        await asyncio.to_thread(gcs_file.write, bytes(buffer))
+                        buffer.clear()
+                if buffer:
+                    await asyncio.to_thread(gcs_file.write, bytes(buffer))
+            finally:
+                await asyncio.to_thread(gcs_file.close)
+        gcs_uri=f"gs://{self.bucket_name}/{destination_blob_name}"
+        logging.info(f"file streamed to {gcs_uri}")
+        return gcs_uri, size_bytes
+
+    @staticmethod
+    async def read_audio(response, hasher, max_bytes):
+        """
+        Read and hash the response body, stopping once more than `max_bytes` have been read.
+
+        Returns:
+            tuple[bytes, bool]: The bytes read and whether they are the whole body.
+        """
+        buffer=bytearray()
+        async for chunk in response.aiter_bytes(chunk_size=audio_download_chunk_size):
+            hasher.update(chunk)
+            buffer.extend(chunk)
+            if len(buffer)>max_bytes:
+                return bytes(buffer), False
+        return bytes(buffer), True
+
+    def upload_to_gcs_once(self, audio_content, destination_blob_name, content_type):
+        """
+        Upload to a content-addressed blob, skipping the upload if the blob already holds this content.
+        """
+        blob=self.bucket.blob(destination_blob_name)
+        with metrics.track_stage("gcs.exists"):
+            exists=blob.exists()
+        if exists:
+            gcs_uri=f"gs://{self.bucket_name}/{destination_blob_name}"
+            logging.info(f"reusing existing blob {gcs_uri}")
+            return gcs_uri
+        return self.upload_to_gcs(audio_content, destination_blob_name, content_type)
+
+    @staticmethod
+    def get_language_hints(language_code=None, alternative_language_codes=None):
+        """
+        Resolve a request's language hints against the configured defaults.
+
+        Returns:
+            tuple[str, list[str]]: The primary language code and at most 3 alternative codes, excluding the primary one.
+        """
+        language_code=language_code or speech_language_code
+        alternative_language_codes=speech_alternative_language_codes if alternative_language_codes is None else alternative_language_codes
+        alternative_language_codes=[code for code in dict.fromkeys(alternative_language_codes) if code!=language_code]
+        return language_code, alternative_language_codes[:max_alternative_language_codes]
+
+    def create_transcription_cache_key(self, content_hash, language_code=None, alternative_language_codes=None):
+        language_code, alternative_language_codes=self.get_language_hints(language_code, alternative_language_codes)
+        return self.cache.make_key("transcription", content_hash, language_code, *sorted(alternative_language_codes))
+
+    async def get_cached_transcription(self, content_hash, language_code=None, alternative_language_codes=None):
+        """
+        Returns:
+            dict | None: The cached `transcription`, `gcsUri`, `languageCode` and `confidence`, or None on a miss.
+        """
+        if self.cache is None:
+            return None
+        return await self.cache.get_async(self.create_transcription_cache_key(content_hash, language_code, alternative_language_codes))
+
+    def cache_transcription(self, content_hash, result, gcs_uri, language_code=None, alternative_language_codes=None):
+        if self.cache is None or content_hash is None:
+            return
+        self.cache.set(self.create_transcription_cache_key(content_hash, language_code, alternative_language_codes), {**result, "gcsUri": gcs_uri})
+
+    async def prepare_audio_async(self, audio_url, language_code=None, alternative_language_codes=None):
+        """
+        Download the Twilio media, probe its format, hash it and store it in GCS unless the transcription cache already has it.
+
+        Args:
+            audio_url (str): The Twilio media URL.
+            language_code (str, optional): The request's language hint, part of the transcription cache key.
+            alternative_language_codes (list[str], optional): The request's alternative language hints.
+
+        Returns:
+            dict | None: `gcs_uri`, `audio_content` (bytes for inline recognition, short clips only), `buffered_audio`
+            (the whole clip when it was buffered, for chunked recognition), `size_bytes`, `content_hash`,
+            `audio_format` (as probed by `AudioProbeService`, after any transcoding) and `cached` (the cached
+            transcription result, or None), or None if the download failed.
+
+        Raises:
+            UnsupportedAudioError: If the clip's format cannot be recognised or transcoded.
+        """
+        hints=(language_code, alternative_language_codes)
+        # Twilio media URLs redirect to the storage backend, which requests follows by default but httpx does not
+        async with httpx.AsyncClient(auth=(username, password), timeout=media_download_timeout_seconds, follow_redirects=True) as client:
+            try:
+                with metrics.track_stage("twilio.connect"):
+                    response=await client.send(client.build_request("GET", audio_url), stream=True)
+                try:
+                    if response.status_code!=200:
+                        logging.warning(f"Failed to download media. Status code: {response}")
+                        return None
+                    content_type=response.headers.get('Content-Type', 'audio/ogg')
+                    content_length=int(response.headers.get('Content-Length') or 0)
+                    hasher=hashlib.sha256()
+                    # Clips too large to buffer are still read far enough to sniff their format before streaming
+                    read_bytes=audio_buffer_max_bytes if content_length<=audio_buffer_max_bytes else audio_probe_bytes
+                    with metrics.track_stage("twilio.read"):
+                        audio_content, complete=await self.read_audio(response, hasher, read_bytes)
+                    if complete:
+                        return await self.store_buffered_audio(audio_content, hasher.hexdigest(), content_type, *hints)
+                    audio_format=AudioProbeService.probe(audio_content, content_type, complete=False)
+                    if not audio_format["supported"]:
+                        raise UnsupportedAudioError(f"{describe_format(audio_format)} audio over {audio_buffer_max_bytes} bytes cannot be transcoded")
+                    blob_name=self.get_blob_name(audio_url, content_type)
+                    gcs_uri, size_bytes=await self.stream_to_gcs_async(response, blob_name, content_type, audio_content, hasher)
+                finally:
+                    await response.aclose()
+            except httpx.HTTPError as e:
+                logging.warning(f"Network error occurred: {e}")
+                return None
+        content_hash=hasher.hexdigest()
+        cached=await self.get_cached_transcription(content_hash, *hints)
+        return {"gcs_uri": gcs_uri, "audio_content": None, "buffered_audio": None, "size_bytes": size_bytes, "content_hash": content_hash, "audio_format": audio_format, "cached": cached}
+
+    async def store_buffered_audio(self, audio_content, content_hash, content_type, language_code=None, alternative_language_codes=None):
+        """
+        Probe a fully downloaded clip, transcode it if Speech-to-Text cannot read it, and upload it to a content-addressed
+        blob. The cache is checked first, keyed by the hash of the original bytes, so a cached clip is never transcoded.
+        """
+        cached=await self.get_cached_transcription(content_hash, language_code, alternative_language_codes)
+        audio_format=AudioProbeService.probe(audio_content, content_type)
+        if cached is not None:
+            logging.info(f"transcription cache hit for {content_hash}")
+            return {"gcs_uri": cached["gcsUri"], "audio_content": None, "buffered_audio": None, "size_bytes": len(audio_content), "content_hash": content_hash, "audio_format": audio_format, "cached": cached}
+        if not audio_format["supported"]:
+            logging.info(f"transcoding unsupported {describe_format(audio_format)} audio {content_hash}")
+            audio_content=await AudioProbeService.transcode_async(audio_content)
+            content_type="audio/flac"
+            audio_format=AudioProbeService.probe(audio_content, content_type)
+        size_bytes=len(audio_content)
+        blob_name=f"{audio_blob_prefix}{content_hash}.{content_type.split('/')[-1]}"
+        gcs_uri=await asyncio.to_thread(self.upload_to_gcs_once, audio_content, blob_name, content_type)
+        inline_content=audio_content if size_bytes<=inline_audio_max_bytes else None
+        return {"gcs_uri": gcs_uri, "audio_content": inline_content, "buffered_audio": audio_content, "size_bytes": size_bytes, "content_hash": content_hash, "audio_format": audio_format, "cached": None}
+
+    def download_from_gcs(self, gcs_uri):
+        blob_name=gcs_uri.removeprefix(f"gs://{self.bucket_name}/")
+        with metrics.track_stage("gcs.download"):
+            return self.bucket.blob(blob_name).download_as_bytes()
+
+    @staticmethod
+    def select_recognition_mode(size_bytes, duration_seconds=None):
+        """
+        Choose synchronous or long-running recognition from the probed duration, falling back to the clip size when
+        the duration is unknown (e.g. a streamed Ogg clip, whose duration is only in its last page).
+        """
+        if duration_seconds is not None:
+            return "long_running" if duration_seconds>sync_recognition_max_seconds else "sync"
+        return "long_running" if size_bytes>long_running_min_bytes else "sync"
+
+    @staticmethod
+    def should_split(audio_format):
+        """
+        Whether a clip is long enough, and decodable, to be recognised in segments.
+        """
+        duration_seconds=(audio_format or {}).get("duration_seconds")
+        return (
+            chunked_transcription_enabled
+            and duration_seconds is not None
+            and duration_seconds>chunked_transcription_min_seconds
+            and AudioSegmentService.can_split(audio_format)
+        )
+
+    @classmethod
+    def create_recognition_config(cls, audio_format=None, language_code=None, alternative_language_codes=None):
+        """
+        Build the `RecognitionConfig` for a probed clip.
+
+        Args:
+            audio_format (dict, optional): The clip's format from `AudioProbeService.probe`. Without it the clip is
+                assumed to be WhatsApp's 16 kHz Ogg Opus.
+            language_code (str, optional): The primary language, defaulting to `SPEECH_LANGUAGE_CODE`.
+            alternative_language_codes (list[str], optional): Other languages the speaker may use.
+
+        Returns:
+            speech.RecognitionConfig: The config.
+
+        Raises:
+            UnsupportedAudioError: If `audio_format` is one Speech-to-Text cannot read; such clips must be transcoded first.
+        """
+        if audio_format is not None and not audio_format["supported"]:
+            raise UnsupportedAudioError(f"{describe_format(audio_format)} audio must be transcoded before recognition")
+        language_code, alternative_language_codes=cls.get_language_hints(language_code, alternative_language_codes)
+        config=speech.RecognitionConfig(
+            encoding=speech.RecognitionConfig.AudioEncoding.OGG_OPUS,
+            sample_rate_hertz=16000,
+            language_code=language_code,
+            alternative_language_codes=alternative_language_codes,
+        )
+        if audio_format is not None and audio_format.get("encoding"):
+            config.encoding=speech.RecognitionConfig.AudioEncoding[audio_format["encoding"]]
+            # Left unset, the API reads the rate from WAV and FLAC headers; every other encoding needs it
+            config.sample_rate_hertz=audio_format.get("sample_rate_hertz") or 0
+            if audio_format.get("channels"):
+                config.audio_channel_count=audio_format["channels"]
+        return config
+
+    @staticmethod
+    def join_transcript(results):
         transcription = ''
-        print(response.results)
-        for result in response.results:
+        for result in results:
             transcription += result.alternatives[0].transcript
-
         return transcription
 
-    def handle_transcription(self, audio_url):
-        file_path, temp_dir=self.download_audio(audio_url)
-        if file_path is None:
+    @classmethod
+    def create_transcription_result(cls, results):
+        """
+        Returns:
+            dict: The `transcription`, the detected `languageCode` and the mean `confidence` of the top alternatives.
+        """
+        alternatives=[result.alternatives[0] for result in results if result.alternatives]
+        language_codes=[result.language_code for result in results if result.language_code]
+        return {
+            "transcription": cls.join_transcript(results),
+            "languageCode": language_codes[0] if language_codes else None,
+            "confidence": sum(alternative.confidence for alternative in alternatives)/len(alternatives) if alternatives else None,
+        }
+
+    async def transcribe_audio_async(self, gcs_uri, audio_content=None, config=None):
+        """
+        Returns:
+            dict: The transcription result, as built by `create_transcription_result`.
+        """
+        if audio_content is not None:
+            audio=speech.RecognitionAudio(content=audio_content)
+        else:
+            audio=speech.RecognitionAudio(uri=gcs_uri)
+        with metrics.track_stage("speech.recognize"):
+            response=await self.get_async_transcribe_client().recognize(config=config or self.create_recognition_config(), audio=audio)
+        logging.debug(response.results)
+        return self.create_transcription_result(response.results)
+
+    @staticmethod
+    def get_word_offsets(results, offset_seconds):
+        return [
+            {
+                "word": word.word,
+                "startSeconds": round(word.start_time.total_seconds()+offset_seconds, 3),
+                "endSeconds": round(word.end_time.total_seconds()+offset_seconds, 3),
+            }
+            for result in results if result.alternatives
+            for word in result.alternatives[0].words
+        ]
+
+    @staticmethod
+    def stitch_segment_results(segment_results):
+        """
+        Join per-segment results, in segment order, into one result.
+
+        Returns:
+            dict: The `transcription`, the first detected `languageCode`, the `confidence` weighted by segment duration,
+            the `words` with offsets into the whole clip and the `segmentCount`.
+        """
+        weighted=[(result["confidence"], result["durationSeconds"]) for result in segment_results if result["confidence"] is not None]
+        total_duration=sum(duration for _, duration in weighted)
+        language_codes=[result["languageCode"] for result in segment_results if result["languageCode"]]
+        return {
+            "transcription": " ".join(result["transcription"].strip() for result in segment_results if result["transcription"].strip()),
+            "languageCode": language_codes[0] if language_codes else None,
+            "confidence": sum(confidence*duration for confidence, duration in weighted)/total_duration if total_duration else None,
+            "words": [word for result in segment_results for word in result["words"]],
+            "segmentCount": len(segment_results),
+        }
+
+    async def transcribe_chunked_async(self, audio_content, audio_format, language_code=None, alternative_language_codes=None, on_progress=None):
+        """
+        Split a clip on silence and recognise its segments concurrently.
+
+        Args:
+            audio_content (bytes): The whole clip.
+            audio_format (dict): The clip's format from `AudioProbeService.probe`.
+            language_code (str, optional): The primary language hint.
+            alternative_language_codes (list[str], optional): Alternative language hints.
+            on_progress (Callable[[dict, int], Awaitable[None]], optional): Awaited whenever the run of finished
+                segments from the start of the clip grows, with the stitched result so far and the total segment count.
+
+        Returns:
+            dict: The stitched result, as built by `stitch_segment_results`.
+
+        Raises:
+            UnsupportedAudioError: If the clip cannot be decoded for splitting.
+        """
+        segments, segment_format=await AudioSegmentService.split_async(audio_content, audio_format)
+        config=self.create_recognition_config(segment_format, language_code, alternative_language_codes)
+        config.enable_word_time_offsets=True
+        logging.info(f"transcribing {len(segments)} segments of {describe_format(audio_format)} audio")
+        segment_results=[None]*len(segments)
+        semaphore=asyncio.Semaphore(max(1, transcription_segment_concurrency))
+        reported=0
+        progress_lock=asyncio.Lock()
+
+        async def transcribe_segment(segment):
+            nonlocal reported
+            async with semaphore:
+                with metrics.track_stage("speech.recognize_segment"):
+                    response=await self.get_async_transcribe_client().recognize(config=config, audio=speech.RecognitionAudio(content=segment["audio_content"]))
+            segment_results[segment["index"]]={
+                **self.create_transcription_result(response.results),
+                "words": self.get_word_offsets(response.results, segment["offset_seconds"]),
+                "durationSeconds": segment["duration_seconds"],
+            }
+            if on_progress is None:
+                return
+            async with progress_lock:
+                finished=reported
+                while finished<len(segment_results) and segment_results[finished] is not None:
+                    finished+=1
+                if finished>reported:
+                    reported=finished
+                    await on_progress(self.stitch_segment_results(segment_results[:finished]), len(segments))
+        await asyncio.gather(*(transcribe_segment(segment) for segment in segments))
+        return self.stitch_segment_results(segment_results)
+
+    async def start_long_running_transcription_async(self, gcs_uri, config=None):
+        audio=speech.RecognitionAudio(uri=gcs_uri)
+        with metrics.track_stage("speech.long_running_start"):
+            operation=await self.get_async_transcribe_client().long_running_recognize(config=config or self.create_recognition_config(), audio=audio)
+        return operation.operation.name
+
+    def get_long_running_transcription(self, operation_name):
+        """
+        Check a long-running recognition job.
+
+        Returns:
+            dict | None: The transcription result, as built by `create_transcription_result`, or None if the job has not finished yet.
+
+        Raises:
+            RuntimeError: If the job finished with an error.
+        """
+        with metrics.track_stage("speech.long_running_poll"):
+            operation=self.transcribe_client.transport.operations_client.get_operation(operation_name)
+        if not operation.done:
             return None
-        gcs_uri=self.upload_to_gcs(file_path)
-        transcription=self.transcribe_audio(gcs_uri)
-        shutil.rmtree(temp_dir)
-        return transcription, gcs_uri
-    
-        
\ No newline at end of file
+        if operation.HasField("error"):
+            raise RuntimeError(f"Recognition failed: {operation.error.message}")
+        response=speech.LongRunningRecognizeResponse.deserialize(operation.response.value)
+        return self.create_transcription_result(response.results)
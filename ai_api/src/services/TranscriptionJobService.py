@@ -0,0 +1,330 @@
+import asyncio
+import logging
+import random
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from pymongo import errors
+from ..config.speech_api_config import (
+    transcription_poll_interval_seconds, transcription_queue_backend, transcription_workers, transcription_queue_poll_seconds,
+    transcription_lease_seconds, transcription_max_attempts, transcription_retry_base_seconds, transcription_retry_max_seconds,
+)
+from .AudioProbeService import UnsupportedAudioError
+from .JobQueueService import create_job_queue, STATUS_PENDING, STATUS_RUNNING, STATUS_FAILED
+
+
+class TranscriptionJobError(Exception):
+    """
+    Raised when a step of a transcription job fails in a way worth retrying.
+    """
+
+
+class TranscriptionJobService:
+    """
+    Runs voice note transcriptions as queued jobs so `/tasks/transcription` can return straight away.
+
+    Jobs are keyed by `MessageSid`, so Cloud Tasks retries and duplicate webhooks collapse into one job and the
+    message is written once. `TranscriptionWorkerPool` claims jobs with a lease and processes them; a failed attempt is
+    retried with jittered exponential backoff up to `TRANSCRIPTION_MAX_ATTEMPTS`. Each step records its result on the
+    job (`gcsAudioUri`, `operationName`, `transcription`), and a retried job skips every step already recorded.
+
+    The audio's probed format is recorded on the job (`audioFormat`) along with the request's language hints
+    (`requestedLanguageCode`, `alternativeLanguageCodes`), so a retried job rebuilds the same `RecognitionConfig`. A clip
+    in a format that cannot be recognised or transcoded fails straight away instead of being retried.
+
+    Finished transcriptions are cached by the audio's content hash, so a forwarded or re-sent voice note is completed
+    from the cache without uploading or recognising it again (`cacheHit` on the job).
+
+    Long buffered clips may be recognised in segments (`chunked` mode, see `SpeechToTextService.transcribe_chunked_async`):
+    the job records `segmentsCompleted` of `segmentCount` as segments finish and, if the request asked for partial
+    results, the transcript of the finished leading segments in `partialTranscription`.
+
+    Short clips are recognised directly by the worker. Long clips start a `long_running_recognize` operation and are
+    left in the `recognising` state; `TranscriptionJobPoller` completes them once the operation finishes.
+
+    Attributes:
+        db_service (DatabaseService): Used for the job collection and for writing finished transcriptions.
+        speech_to_text_service (SpeechToTextService): Used to prepare and recognise the audio.
+        queue (MongoJobQueue | InMemoryJobQueue): Where jobs are stored and leased.
+    """
+    STATUS_PENDING=STATUS_PENDING
+    STATUS_RUNNING=STATUS_RUNNING
+    STATUS_RECOGNISING="recognising"
+    STATUS_COMPLETED="completed"
+    STATUS_FAILED=STATUS_FAILED
+    RESULT_FIELDS=["transcription", "languageCode", "confidence", "words", "segmentCount"]
+
+    def __init__(self, db_service, speech_to_text_service, queue=None, max_attempts=transcription_max_attempts, lease_seconds=transcription_lease_seconds):
+        self.db_service=db_service
+        self.speech_to_text_service=speech_to_text_service
+        self.queue=queue if queue is not None else create_job_queue(transcription_queue_backend, db_service.db["transcription_jobs"])
+        self.max_attempts=max_attempts
+        self.lease_seconds=lease_seconds
+        # Set on enqueue so idle workers in this process pick the job up without waiting for their next poll
+        self.job_enqueued=asyncio.Event()
+
+    def create_job(self, message_sid, media_url, language_code=None, alternative_language_codes=None, partial_results=False):
+        """
+        Queue a transcription for a message, collapsing duplicates.
+
+        Args:
+            message_sid (str): The message's SID, used as the job id.
+            media_url (str): The Twilio media URL.
+            language_code (str, optional): The speaker's expected language, defaulting to `SPEECH_LANGUAGE_CODE`.
+            alternative_language_codes (list[str], optional): Other languages the speaker may use.
+            partial_results (bool, optional): Record the transcript so far on the job while a chunked transcription runs.
+
+        Returns:
+            tuple[dict, bool]: The job and whether it was newly queued.
+        """
+        return self.queue.enqueue(message_sid, {
+            "MessageSid": message_sid,
+            "MediaUrl0": media_url,
+            "requestedLanguageCode": language_code,
+            "alternativeLanguageCodes": alternative_language_codes,
+            "partialResults": partial_results,
+        })
+
+    @staticmethod
+    def get_language_hints(job):
+        return job.get("requestedLanguageCode"), job.get("alternativeLanguageCodes")
+
+    def get_job(self, job_id):
+        return self.queue.get(job_id)
+
+    @staticmethod
+    def get_retry_delay(attempts):
+        delay=min(transcription_retry_max_seconds, transcription_retry_base_seconds*2**(attempts-1))
+        return delay*random.uniform(0.5, 1.0)
+
+    def retry_or_fail(self, job, error, worker_id=None, fields=None):
+        """
+        Put a job back in the queue after a backoff delay, or mark it failed once it has used all its attempts.
+        """
+        fields={**(fields or {}), "error": error}
+        try:
+            if job.get("attempts", 0)>=self.max_attempts:
+                self.queue.finish(job["_id"], self.STATUS_FAILED, fields, worker_id)
+                return
+            fields["availableAt"]=datetime.now(timezone.utc)+timedelta(seconds=self.get_retry_delay(job.get("attempts", 1)))
+            self.queue.finish(job["_id"], self.STATUS_PENDING, fields, worker_id)
+        except errors.PyMongoError as e:
+            logging.error(f"Error rescheduling transcription job {job['_id']}: {e}")
+
+    async def run_job(self, job, worker_id):
+        """
+        Process a claimed job, rescheduling it if any step fails. Unsupported audio fails the job without a retry.
+
+        A job re-claimed after its lease expired (its worker died mid-job, so `retry_or_fail` never ran) still counts the
+        lost attempts, and is failed instead of run once they exceed `max_attempts`.
+        """
+        if job.get("attempts", 0)>self.max_attempts:
+            logging.error(f"Transcription job {job['_id']} was abandoned by its workers {self.max_attempts} times")
+            await asyncio.to_thread(self.queue.finish, job["_id"], self.STATUS_FAILED, {"error": f"Abandoned after {self.max_attempts} attempts"}, worker_id)
+            return
+        try:
+            await self.process_job(job, worker_id)
+        except UnsupportedAudioError as e:
+            logging.error(f"Transcription job {job['_id']} has unsupported audio: {e}")
+            await asyncio.to_thread(self.queue.finish, job["_id"], self.STATUS_FAILED, {"error": str(e)}, worker_id)
+        except Exception as e:
+            logging.error(f"Error running transcription job {job['_id']} (attempt {job.get('attempts')}): {e}")
+            await asyncio.to_thread(self.retry_or_fail, job, str(e), worker_id)
+
+    async def process_job(self, job, worker_id):
+        """
+        Prepare the job's audio and either transcribe it straight away or hand it to long-running recognition,
+        skipping the steps a previous attempt already completed.
+        """
+        job_id=job["_id"]
+        if job.get("transcription") is not None:
+            result={field: job.get(field) for field in self.RESULT_FIELDS}
+            await asyncio.to_thread(self.complete_job, job, result, job["gcsAudioUri"], worker_id, job.get("contentHash"))
+            return
+        if job.get("operationName"):
+            await asyncio.to_thread(self.queue.finish, job_id, self.STATUS_RECOGNISING, {}, worker_id)
+            return
+        audio_content, buffered_audio=None, None
+        language_hints=self.get_language_hints(job)
+        if job.get("gcsAudioUri") is None:
+            prepared_audio=await self.speech_to_text_service.prepare_audio_async(job["MediaUrl0"], *language_hints)
+            if prepared_audio is None:
+                raise TranscriptionJobError("Failed to download media")
+            gcs_uri, audio_content, content_hash=prepared_audio["gcs_uri"], prepared_audio["audio_content"], prepared_audio["content_hash"]
+            audio_format, buffered_audio=prepared_audio["audio_format"], prepared_audio["buffered_audio"]
+            mode=self.speech_to_text_service.select_recognition_mode(prepared_audio["size_bytes"], audio_format["duration_seconds"])
+            if buffered_audio is not None and self.speech_to_text_service.should_split(audio_format):
+                mode="chunked"
+            fields={"gcsAudioUri": gcs_uri, "sizeBytes": prepared_audio["size_bytes"], "mode": mode, "contentHash": content_hash, "audioFormat": audio_format}
+            if prepared_audio["cached"] is not None:
+                await asyncio.to_thread(self.queue.update, job_id, {**fields, "cacheHit": True}, worker_id)
+                await asyncio.to_thread(self.complete_job, job, prepared_audio["cached"], gcs_uri, worker_id)
+                return
+            await asyncio.to_thread(self.queue.update, job_id, fields, worker_id)
+        else:
+            gcs_uri, mode, content_hash, audio_format=job["gcsAudioUri"], job["mode"], job.get("contentHash"), job.get("audioFormat")
+            await asyncio.to_thread(self.queue.renew_lease, job_id, worker_id, self.lease_seconds)
+        if mode=="chunked":
+            try:
+                result=await self.transcribe_chunked(job, worker_id, gcs_uri, buffered_audio, audio_format)
+                await asyncio.to_thread(self.queue.update, job_id, result, worker_id)
+                await asyncio.to_thread(self.complete_job, job, result, gcs_uri, worker_id, content_hash)
+                return
+            except UnsupportedAudioError as e:
+                mode=self.speech_to_text_service.select_recognition_mode(job.get("sizeBytes") or 0, audio_format["duration_seconds"])
+                logging.warning(f"Cannot split audio for job {job_id}, recognising it in one piece ({mode}): {e}")
+                await asyncio.to_thread(self.queue.update, job_id, {"mode": mode}, worker_id)
+        config=self.speech_to_text_service.create_recognition_config(audio_format, *language_hints)
+        if mode=="long_running":
+            operation_name=await self.speech_to_text_service.start_long_running_transcription_async(gcs_uri, config)
+            await asyncio.to_thread(self.queue.finish, job_id, self.STATUS_RECOGNISING, {"operationName": operation_name}, worker_id)
+            logging.info(f"Started long-running transcription {operation_name} for {job['MessageSid']}")
+            return
+        result=await self.speech_to_text_service.transcribe_audio_async(gcs_uri, audio_content, config)
+        await asyncio.to_thread(self.queue.update, job_id, result, worker_id)
+        await asyncio.to_thread(self.complete_job, job, result, gcs_uri, worker_id, content_hash)
+
+    async def transcribe_chunked(self, job, worker_id, gcs_uri, audio_content, audio_format):
+        """
+        Recognise a clip in segments, recording progress on the job and renewing its lease as segments finish. The clip
+        is read back from GCS when a retried job no longer has it in memory.
+        """
+        if audio_content is None:
+            audio_content=await asyncio.to_thread(self.speech_to_text_service.download_from_gcs, gcs_uri)
+
+        async def record_progress(partial_result, segment_count):
+            fields={"segmentsCompleted": partial_result["segmentCount"], "segmentCount": segment_count}
+            if job.get("partialResults"):
+                fields["partialTranscription"]=partial_result["transcription"]
+            await asyncio.to_thread(self.queue.update, job["_id"], fields, worker_id)
+            await asyncio.to_thread(self.queue.renew_lease, job["_id"], worker_id, self.lease_seconds)
+        return await self.speech_to_text_service.transcribe_chunked_async(
+            audio_content, audio_format, *self.get_language_hints(job), on_progress=record_progress,
+        )
+
+    def complete_job(self, job, result, gcs_uri, worker_id=None, content_hash=None):
+        """
+        Write the transcription to the message, cache it under the audio's content hash (when given) and the job's
+        language hints, and mark the job completed.
+        """
+        self.db_service.update_message_texts([(job["MessageSid"], result["transcription"], gcs_uri)])
+        self.speech_to_text_service.cache_transcription(content_hash, result, gcs_uri, *self.get_language_hints(job))
+        self.queue.finish(job["_id"], self.STATUS_COMPLETED, {field: result.get(field) for field in self.RESULT_FIELDS}, worker_id)
+
+    def poll_recognising_jobs(self, worker_id, recheck_seconds=transcription_poll_interval_seconds):
+        """
+        Complete every job whose long-running recognition has finished. A failed operation is retried from recognition,
+        reusing the uploaded audio.
+
+        Each job is leased before its operation is checked, so with a poller in every worker process a job is only
+        completed once, and the lease owner fences the writes. A job still being recognised keeps its lease for
+        `recheck_seconds`, which takes it out of this pass and hands it to whichever poller runs next.
+
+        Args:
+            worker_id (str): The poller's lease owner id.
+            recheck_seconds (float, optional): How long before an unfinished operation is checked again.
+
+        Returns:
+            int: The number of jobs completed or rescheduled in this pass.
+        """
+        finished=0
+        seen=set()
+        while True:
+            job=self.queue.claim_in_status(self.STATUS_RECOGNISING, worker_id, self.lease_seconds)
+            if job is None or job["_id"] in seen:
+                if job is not None:
+                    self.queue.renew_lease(job["_id"], worker_id, recheck_seconds)
+                return finished
+            seen.add(job["_id"])
+            try:
+                result=self.speech_to_text_service.get_long_running_transcription(job["operationName"])
+            except Exception as e:
+                logging.error(f"Long-running transcription failed for job {job['_id']}: {e}")
+                self.retry_or_fail(job, str(e), worker_id, fields={"operationName": None})
+                finished+=1
+                continue
+            if result is None:
+                self.queue.renew_lease(job["_id"], worker_id, recheck_seconds)
+                continue
+            try:
+                self.complete_job(job, result, job["gcsAudioUri"], worker_id, job.get("contentHash"))
+            except errors.PyMongoError as e:
+                logging.error(f"Error completing transcription job {job['_id']}: {e}")
+                self.retry_or_fail(job, str(e), worker_id, fields=result)
+            finished+=1
+
+
+class TranscriptionWorkerPool:
+    """
+    Asyncio workers that claim and run queued transcription jobs, at most `workers` at a time per process.
+
+    Attributes:
+        get_job_service (Callable[[], TranscriptionJobService]): Returns the job service to work for.
+        workers (int): Number of jobs processed concurrently.
+        poll_interval_seconds (float): How long an idle worker waits before checking the queue again.
+    """
+    def __init__(self, get_job_service, workers=transcription_workers, poll_interval_seconds=transcription_queue_poll_seconds):
+        self.get_job_service=get_job_service
+        self.workers=workers
+        self.poll_interval_seconds=poll_interval_seconds
+        self.tasks=[]
+
+    async def work(self, worker_id):
+        while True:
+            try:
+                job_service=await asyncio.to_thread(self.get_job_service)
+                job=await asyncio.to_thread(job_service.queue.claim, worker_id, job_service.lease_seconds)
+            except Exception as e:
+                logging.error(f"Error claiming transcription job: {e}")
+                await asyncio.sleep(self.poll_interval_seconds)
+                continue
+            if job is not None:
+                await job_service.run_job(job, worker_id)
+                continue
+            job_service.job_enqueued.clear()
+            try:
+                await asyncio.wait_for(job_service.job_enqueued.wait(), self.poll_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        process_id=uuid.uuid4().hex[:8]
+        self.tasks=[asyncio.create_task(self.work(f"{process_id}-{index}")) for index in range(self.workers)]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks=[]
+
+
+class TranscriptionJobPoller:
+    """
+    Background thread that periodically completes finished long-running transcription jobs.
+
+    Attributes:
+        get_job_service (Callable[[], TranscriptionJobService]): Returns the job service to poll with.
+        interval_seconds (float): Delay between polling passes.
+    """
+    def __init__(self, get_job_service, interval_seconds=transcription_poll_interval_seconds):
+        self.get_job_service=get_job_service
+        self.interval_seconds=interval_seconds
+        self.stop_event=threading.Event()
+        self.thread=None
+
+    def run(self):
+        worker_id=f"poller-{uuid.uuid4().hex[:8]}"
+        while not self.stop_event.wait(self.interval_seconds):
+            try:
+                self.get_job_service().poll_recognising_jobs(worker_id, self.interval_seconds)
+            except Exception as e:
+                logging.error(f"Error polling transcription jobs: {e}")
+
+    def start(self):
+        self.thread=threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=self.interval_seconds)
@@ -1,9 +1,113 @@
-from ..config.translation_api_config import translate_client
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from ..config.translation_api_config import translate_client, stream_translation_window_seconds
+from .CacheService import CacheService, translation_cache
+from .MetricsService import metrics
+from .RequestCoalescingService import translation_flights
 class TranslationService:
-    def __init__(self, target_language):
+    """
+    Translates text into a target language with the Cloud Translation v2 API.
+
+    Translations are cached per (text hash, target language), so repeated content costs no API calls. Identical
+    requests made while one is in flight (e.g. many users receiving the same broadcast) share a single API call.
+    """
+    MAX_SEGMENTS_PER_REQUEST=128
+
+    def __init__(self, target_language, cache:Optional[CacheService]=translation_cache):
         self.client=translate_client
         self.target_language=target_language
+        self.cache=cache
 
     def translate_text(self, text):
-        result = self.client.translate(text, self.target_language)
-        return result["translatedText"]
\ No newline at end of file
+        return self.translate_batch([text])[0]
+
+    def translate_batch(self, texts: List[str])->List[str]:
+        """
+        Translate a list of strings with as few API calls as possible.
+
+        Identical inputs are translated once, cached translations are reused, and the remaining strings are sent
+        together in requests of up to `MAX_SEGMENTS_PER_REQUEST` segments.
+
+        Args:
+            texts (list[str]): The strings to translate.
+
+        Returns:
+            list[str]: The translated strings, in the order of `texts`.
+        """
+        translations={}
+        keys={}
+        missing=[]
+        for text in dict.fromkeys(texts):
+            if self.cache is None:
+                missing.append(text)
+                continue
+            keys[text]=self.cache.make_key(text, self.target_language)
+            cached=self.cache.get(keys[text])
+            if cached is None:
+                missing.append(text)
+            else:
+                translations[text]=cached
+        for start in range(0, len(missing), self.MAX_SEGMENTS_PER_REQUEST):
+            chunk=missing[start:start+self.MAX_SEGMENTS_PER_REQUEST]
+            results=translation_flights.do(CacheService.make_key(self.target_language, chunk), lambda chunk=chunk: self.translate_chunk(chunk))
+            for text, result in zip(chunk, results):
+                translations[text]=result["translatedText"]
+                if self.cache is not None:
+                    self.cache.set(keys[text], result["translatedText"])
+        return [translations[text] for text in texts]
+
+    def translate_chunk(self, texts: List[str])->List[Dict[str, Any]]:
+        with metrics.track_stage("translate.api", self.target_language):
+            return self.client.translate(texts, target_language=self.target_language)
+
+    async def translate_batch_async(self, texts: List[str])->List[str]:
+        """
+        Run `translate_batch` on a worker thread, as the Translation v2 client has no async API.
+        """
+        if not texts:
+            return []
+        return await asyncio.to_thread(self.translate_batch, texts)
+
+    async def translate_stream_async(self, texts: AsyncIterator[Tuple[int, str]], window_seconds: float=stream_translation_window_seconds)->AsyncIterator[Tuple[int, str]]:
+        """
+        Translate `(index, text)` pairs as they arrive, without a Translation API call per text: the first text waits
+        up to `window_seconds` for others, and each window is translated with one `translate_batch_async` call.
+
+        Yields:
+            tuple[int, str]: The index and the translated text, window by window.
+        """
+        queue=asyncio.Queue()
+        end=object()
+
+        async def read():
+            try:
+                async for item in texts:
+                    await queue.put(item)
+            finally:
+                queue.put_nowait(end)
+        reader=asyncio.create_task(read())
+        loop=asyncio.get_running_loop()
+        try:
+            finished=False
+            while not finished:
+                item=await queue.get()
+                if item is end:
+                    break
+                window=[item]
+                deadline=loop.time()+window_seconds
+                while True:
+                    try:
+                        item=await asyncio.wait_for(queue.get(), max(0.0, deadline-loop.time()))
+                    except asyncio.TimeoutError:
+                        break
+                    if item is end:
+                        finished=True
+                        break
+                    window.append(item)
+                translations=await self.translate_batch_async([text for _, text in window])
+                for (index, _), translation in zip(window, translations):
+                    yield index, translation
+            # Re-raise an error from the source iterator
+            await reader
+        finally:
+            reader.cancel()
@@ -1,3 +1,7 @@
 #!/bin/bash
+if [ "$APP_ENV" = "production" ]; then
+  echo "Starting FastAPI server with Gunicorn (${WEB_CONCURRENCY:-2} Uvicorn workers)..."
+  exec gunicorn -c gunicorn.conf.py src.main:app
+fi
 echo "Starting FastAPI server with Uvicorn..."
-uvicorn src.main:app --reload
\ No newline at end of file
+uvicorn src.main:app --reload
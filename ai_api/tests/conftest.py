@@ -0,0 +1,9 @@
+import os
+import google.auth
+from google.auth.credentials import AnonymousCredentials
+
+# The service modules create their clients at import time; tests make no API calls, so placeholder settings do
+google.auth.default=lambda *args, **kwargs: (AnonymousCredentials(), "test-project")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("GOOGLE_PROJECT_ID", "test-project")
+os.environ.setdefault("GOOGLE_PROJECT_LOCATION", "europe-west2")
@@ -0,0 +1,14 @@
+from src.services.AI_Service import VertexAI_Service
+
+
+def create_key(service, tool_config, prompt="Describe   this\norganisation"):
+    function_dictionaries=[{"func_name": "describe", "func_description": "", "func_params": {}}]
+    return service.create_request_key("async", prompt, {"temperature": 0.6}, True, function_dictionaries, tool_config)
+
+
+def test_identical_tool_configs_share_a_key():
+    service=VertexAI_Service("vertexai", "gemini-test", description_cache=None)
+    key=create_key(service, VertexAI_Service.create_tool_config(["describe"]))
+    assert create_key(service, VertexAI_Service.create_tool_config(["describe"]), "Describe this organisation")==key
+    assert create_key(service, VertexAI_Service.create_tool_config(["summarise"]))!=key
+    assert create_key(service, None)!=key
@@ -0,0 +1,108 @@
+import asyncio
+import time
+import pytest
+from google.api_core import exceptions as google_exceptions
+from src.services import ModelRouterService
+from src.services.ModelRouterService import CircuitBreaker, ModelRouter, TokenBucket
+
+
+class FakeBackend:
+    def __init__(self, name, result="ok", latency=0.0, errors=()):
+        self.name=name
+        self.result=result
+        self.latency=latency
+        self.errors=list(errors)
+        self.calls=0
+        self.cancelled=0
+
+    async def generate_async(self, **request):
+        self.calls+=1
+        try:
+            await asyncio.sleep(self.latency)
+        except asyncio.CancelledError:
+            self.cancelled+=1
+            raise
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.result
+
+
+@pytest.fixture(autouse=True)
+def fresh_backend_health(monkeypatch):
+    # Health is shared by backend name across routers; each test starts from none
+    monkeypatch.setattr(ModelRouterService, "backend_health", {})
+    monkeypatch.setattr(ModelRouter, "get_backoff_seconds", staticmethod(lambda attempt: 0.0))
+
+
+def test_breaker_opens_after_consecutive_failures_and_recovers_through_one_probe():
+    breaker=CircuitBreaker(failure_threshold=3, reset_seconds=0.05)
+    assert not breaker.record_failure() and not breaker.record_failure()
+    assert breaker.record_failure()
+    assert breaker.state=="open" and not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow() and breaker.state=="half_open"
+    # Only one probe at a time
+    assert not breaker.allow()
+    assert breaker.record_failure() and breaker.state=="open"
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state=="closed" and breaker.failures==0 and breaker.allow()
+
+
+def test_token_bucket_refuses_calls_that_would_wait_too_long():
+    bucket=TokenBucket(rate=10, capacity=1)
+    assert bucket.reserve(0)==0
+    assert bucket.reserve(0.01) is None
+    wait_seconds=bucket.reserve(1)
+    assert 0<wait_seconds<=0.1
+
+
+def test_open_circuit_skips_the_backend():
+    primary=FakeBackend("test:primary", errors=[RuntimeError("down")]*10)
+    secondary=FakeBackend("test:secondary", result="secondary")
+    router=ModelRouter([primary, secondary], hedging_enabled=False)
+    for _ in range(ModelRouterService.llm_circuit_failure_threshold):
+        assert asyncio.run(router.generate_async())=="secondary"
+    assert router.health["test:primary"].breaker.state=="open"
+    calls=primary.calls
+    assert asyncio.run(router.generate_async())=="secondary"
+    assert primary.calls==calls
+
+
+def test_hedge_wins_and_cancels_the_slow_call():
+    slow=FakeBackend("test:slow", result="slow", latency=1.0)
+    fast=FakeBackend("test:fast", result="fast", latency=0.01)
+    router=ModelRouter([slow, fast], hedging_enabled=True, hedge_after_seconds=0.05)
+    start=time.perf_counter()
+    assert asyncio.run(router.generate_async())=="fast"
+    assert time.perf_counter()-start<0.5
+    assert slow.calls==1 and slow.cancelled==1
+    # A cancelled call is not a failure
+    health=router.health["test:slow"]
+    assert health.breaker.state=="closed" and health.breaker.failures==0 and health.get_error_rate()==0
+
+
+def test_quota_errors_are_retried_then_fail_over():
+    quota_error=google_exceptions.ResourceExhausted("quota")
+    limited=FakeBackend("test:limited", errors=[quota_error]*3)
+    spare=FakeBackend("test:spare", result="spare")
+    router=ModelRouter([limited, spare], hedging_enabled=False, max_retries=2)
+    assert asyncio.run(router.generate_async())=="spare"
+    assert limited.calls==3 and spare.calls==1
+    # Quota errors ask for a slower rate; they do not count towards opening the circuit
+    assert router.health["test:limited"].breaker.failures==0
+
+
+def test_quota_error_retry_succeeds_on_the_same_backend():
+    limited=FakeBackend("test:limited", result="limited", errors=[google_exceptions.TooManyRequests("slow down")])
+    spare=FakeBackend("test:spare", result="spare")
+    router=ModelRouter([limited, spare], hedging_enabled=False, max_retries=2)
+    assert asyncio.run(router.generate_async())=="limited"
+    assert limited.calls==2 and spare.calls==0
+
+
+def test_last_error_is_raised_when_every_backend_fails():
+    router=ModelRouter([FakeBackend("test:a", errors=[RuntimeError("a")]), FakeBackend("test:b", errors=[ValueError("b")])], hedging_enabled=False)
+    with pytest.raises(ValueError, match="b"):
+        asyncio.run(router.generate_async())
@@ -0,0 +1,21 @@
+import asyncio
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from src.main import app
+from src.services.MetricsService import metrics
+
+
+@app.get("/test/slow-stream")
+async def slow_stream():
+    async def lines():
+        for index in range(3):
+            await asyncio.sleep(0.1)
+            yield f"{index}\n"
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def test_streamed_responses_are_timed_to_their_last_line():
+    response=TestClient(app).get("/test/slow-stream")
+    assert response.text=="0\n1\n2\n" and response.headers["x-request-id"]
+    series=metrics.http_request_duration.values[(("method", "GET"), ("route", "/test/slow-stream"), ("status", "200"))]
+    assert series["count"]==1 and series["sum"]>=0.3
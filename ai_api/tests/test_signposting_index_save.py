@@ -0,0 +1,53 @@
+import multiprocessing
+import os
+from src.services.SignpostingIndexService import SignpostingIndex
+
+
+def create_option(i):
+    return {
+        "name": f"Organisation {i}", "organizationName": "Alix", "postcode": "SW1A 1AA", "area_covered": "UK",
+        "location_scope": "local", "category_tags": ["debt-advice"], "description_short": f"Debt advice service {i}",
+        "description_long": None, "external_url": f"https://example.org/{i}", "email": None, "community_group": None,
+    }
+
+
+def build_and_save(index_dir, worker):
+    index=SignpostingIndex(index_dir, autosave_updates=0)
+    for round_number in range(5):
+        index.add_options([create_option(worker*100+round_number*10+i) for i in range(10)])
+        index.save()
+
+
+def test_concurrent_saves_leave_a_complete_current_generation(tmp_path):
+    index_dir=str(tmp_path)
+    processes=[multiprocessing.Process(target=build_and_save, args=(index_dir, worker)) for worker in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode==0
+    names=os.listdir(index_dir)
+    assert len([name for name in names if name.startswith("gen-")])<=2
+    assert not [name for name in names if name.startswith("tmp-") or name.endswith(".tmp")]
+    index=SignpostingIndex(index_dir)
+    assert index.load()
+    assert index.live_docs==50
+
+
+def test_autosave_runs_in_the_background_and_drops_replaced_options(tmp_path):
+    index=SignpostingIndex(str(tmp_path), autosave_updates=5)
+    options=[create_option(i) for i in range(5)]
+    index.add_options(options)
+    assert index.saver is not None and index.saver.is_alive()
+    # Changing an option tombstones its old entry
+    index.add_option(dict(options[0], description_short="Benefits advice service"))
+    index.close()
+    assert not index.saver.is_alive()
+    saved=SignpostingIndex(str(tmp_path))
+    assert saved.load()
+    assert saved.live_docs==5 and len(saved.doc_keys)==5 and not saved.deleted.view().any()
+    assert len(saved.base_tokens)==int(saved.doc_length.view().sum())
+    assert saved.search("benefits", limit=1)[0][0]==SignpostingIndex.get_option_key(options[0])
+    # The saved options are recognised, not indexed again
+    saved.add_options(options[1:])
+    assert len(saved.doc_keys)==5
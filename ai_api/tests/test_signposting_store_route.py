@@ -0,0 +1,78 @@
+import asyncio
+import mongomock
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from src.routes import llm
+from src.services.AI_Service import VertexAI_Service
+from src.services.ServiceRegistry import registry, get_signposting_service
+from src.services.SignpostingPregenerationService import SignpostingPregenerator
+from src.services.SignpostingStoreService import SignpostingStore
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text=text
+
+
+class CountingModel:
+    def __init__(self):
+        self.calls=0
+
+    async def generate_content_async(self, contents, generation_config=None, tools=None, tool_config=None):
+        self.calls+=1
+        return StubResponse("Debt Help offers free debt advice.")
+
+
+class StubVertexAI_Service(VertexAI_Service):
+    def __init__(self, model):
+        self.stub_model=model
+        super().__init__("vertexai", "stub-model", mode="per_option", description_cache=None)
+
+    def create_model(self, model_source, model_name=None):
+        return self.stub_model
+
+
+def make_option(i):
+    return {
+        "community_group": None,
+        "location_scope": "national",
+        "category_tags": ["debt-advice", "budget-advice"],
+        "description_short": f"Debt advice service {i}",
+        "description_long": None,
+        "postcode": "SW1A 1AA",
+        "area_covered": "UK",
+        "external_url": f"https://example.org/{i}",
+        "email": f"org{i}@example.org",
+        "name": f"Debt Help {i}",
+        "organizationName": "Alix",
+    }
+
+
+def test_pregenerated_messages_are_served_without_the_model(monkeypatch):
+    model=CountingModel()
+    service=StubVertexAI_Service(model)
+    store=SignpostingStore(mongomock.MongoClient().db["signposting_messages"])
+    monkeypatch.setattr(registry, "signposting_store", store)
+    monkeypatch.setattr(llm, "signposting_store_enabled", True)
+    options=[make_option(i) for i in range(3)]
+    # The job groups the catalogue by tag
+    asyncio.run(SignpostingPregenerator(service, store, registry.get_translation_service).pregenerate_async("alix", "debt-advice", options, []))
+    generated_calls=model.calls
+    assert generated_calls==3
+
+    app=FastAPI()
+    app.include_router(llm.router)
+    app.dependency_overrides[get_signposting_service]=lambda: service
+    # The Alix flow sends the user's reply, not the tag
+    response=TestClient(app).post("/llm/signposting-alix", json={"options": options, "language": "en", "category": "2"})
+    body=response.json()
+    assert body["message"]=="success" and body["indices"]==[0, 1, 2]
+    assert all(message.startswith("Debt Help offers free debt advice.") for message in body["data"])
+    assert model.calls==generated_calls
+
+
+def test_resolve_category_prefers_the_requested_tag():
+    options=[{"category_tags": ["debt-advice", "budget-advice"]}, {"category_tags": ["budget-advice", "debt-advice"]}]
+    assert SignpostingStore.resolve_category("budget-advice", options)=="budget-advice"
+    assert SignpostingStore.resolve_category("2", options)=="debt-advice"
+    assert SignpostingStore.resolve_category("2", [{"category_tags": ["a"]}, {"category_tags": ["b"]}])=="2"
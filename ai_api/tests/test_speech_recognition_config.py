@@ -0,0 +1,48 @@
+import asyncio
+import struct
+import pytest
+from google.cloud import speech
+from src.services.AudioProbeService import AudioProbeService, UnsupportedAudioError
+from src.services.SpeechToTextService import SpeechToTextService
+
+
+def create_mp3(frame_count=10):
+    # MPEG-1 Layer III, 128 kbit/s, 44.1 kHz, mono: 417-byte frames
+    header=struct.pack(">I", 0xFFFB90C0)
+    return b"ID3"+bytes([4, 0, 0, 0, 0, 0, 0])+(header+bytes(413))*frame_count
+
+
+def create_flac(sample_rate=16000, channels=1, total_samples=16000):
+    packed=sample_rate<<44|(channels-1)<<41|15<<36|total_samples
+    return b"fLaC"+bytes([0x80, 0, 0, 34])+bytes(10)+packed.to_bytes(8, "big")+bytes(16)
+
+
+def test_mp3_is_not_passed_to_speech_v1():
+    audio_format=AudioProbeService.probe(create_mp3(), "audio/mpeg")
+    assert audio_format["codec"]=="mp3"
+    assert audio_format["sample_rate_hertz"]==44100
+    assert not audio_format["supported"]
+    with pytest.raises(UnsupportedAudioError):
+        SpeechToTextService.create_recognition_config(audio_format)
+
+
+def test_mp3_is_transcoded_and_recognised_as_flac(monkeypatch):
+    mp3=create_mp3()
+    transcoded=[]
+    uploads=[]
+
+    # ffmpeg is not needed to check what happens around it
+    async def transcode_async(data):
+        transcoded.append(data)
+        return create_flac()
+    monkeypatch.setattr(AudioProbeService, "transcode_async", transcode_async)
+    service=SpeechToTextService(cache=None)
+    monkeypatch.setattr(service, "upload_to_gcs_once", lambda audio_content, blob_name, content_type: uploads.append((blob_name, content_type)) or f"gs://bucket/{blob_name}")
+    prepared_audio=asyncio.run(service.store_buffered_audio(mp3, "hash", "audio/mpeg"))
+    assert transcoded==[mp3]
+    assert len(uploads)==1 and uploads[0][0].endswith("hash.flac") and uploads[0][1]=="audio/flac"
+    audio_format=prepared_audio["audio_format"]
+    assert audio_format["codec"]=="flac" and audio_format["supported"]
+    config=SpeechToTextService.create_recognition_config(audio_format)
+    assert config.encoding==speech.RecognitionConfig.AudioEncoding.FLAC
+    assert config.sample_rate_hertz==16000
@@ -0,0 +1,68 @@
+import asyncio
+from src.services.JobQueueService import InMemoryJobQueue
+from src.services.TranscriptionJobService import TranscriptionJobService
+
+
+class StubDatabaseService:
+    def __init__(self):
+        self.updates=[]
+
+    def update_message_texts(self, updates):
+        self.updates.extend(updates)
+
+
+class StubSpeechToTextService:
+    def __init__(self, finished):
+        self.finished=finished
+        self.cached=[]
+
+    def get_long_running_transcription(self, operation_name):
+        return {"transcription": "hello", "languageCode": "en-GB", "confidence": 0.9} if self.finished else None
+
+    def cache_transcription(self, content_hash, result, gcs_uri, language_code=None, alternative_language_codes=None):
+        self.cached.append(content_hash)
+
+
+def create_recognising_job(queue, job_id="SM1"):
+    queue.enqueue(job_id, {"MessageSid": job_id, "MediaUrl": "https://example.com/a.ogg"})
+    job=queue.claim("worker", 60)
+    queue.finish(job["_id"], TranscriptionJobService.STATUS_RECOGNISING, {"operationName": "op", "gcsAudioUri": "gs://b/a", "contentHash": "hash"}, "worker")
+
+
+def test_two_pollers_complete_a_job_once():
+    queue=InMemoryJobQueue()
+    db_service, speech_service=StubDatabaseService(), StubSpeechToTextService(finished=True)
+    service=TranscriptionJobService(db_service, speech_service, queue=queue)
+    create_recognising_job(queue)
+    # The first poller's lease is still held when the second one runs
+    queue.claim_in_status(TranscriptionJobService.STATUS_RECOGNISING, "poller-a", 60)
+    assert service.poll_recognising_jobs("poller-b")==0
+    queue.update("SM1", {"leaseExpiresAt": None})
+    assert service.poll_recognising_jobs("poller-b")==1
+    assert service.poll_recognising_jobs("poller-a")==0
+    assert len(db_service.updates)==1 and speech_service.cached==["hash"]
+    assert queue.get("SM1")["status"]==TranscriptionJobService.STATUS_COMPLETED
+
+
+def test_unfinished_operation_is_left_for_the_next_pass():
+    queue=InMemoryJobQueue()
+    service=TranscriptionJobService(StubDatabaseService(), StubSpeechToTextService(finished=False), queue=queue)
+    create_recognising_job(queue)
+    assert service.poll_recognising_jobs("poller-a", recheck_seconds=60)==0
+    job=queue.get("SM1")
+    assert job["status"]==TranscriptionJobService.STATUS_RECOGNISING and job["leaseOwner"]=="poller-a"
+    assert service.poll_recognising_jobs("poller-b")==0
+
+
+def test_job_abandoned_by_dead_workers_fails_after_max_attempts():
+    queue=InMemoryJobQueue()
+    service=TranscriptionJobService(StubDatabaseService(), StubSpeechToTextService(finished=True), queue=queue, max_attempts=3)
+    queue.enqueue("SM1", {"MessageSid": "SM1", "MediaUrl0": "https://example.com/a.ogg"})
+    # Each worker takes the job and dies before finishing it, so its lease simply expires
+    for attempt in range(1, 4):
+        assert queue.claim(f"worker-{attempt}", 0)["attempts"]==attempt
+    job=queue.claim("worker-4", 60)
+    asyncio.run(service.run_job(job, "worker-4"))
+    job=queue.get("SM1")
+    assert job["status"]==TranscriptionJobService.STATUS_FAILED and "leaseOwner" not in job
+    assert queue.claim("worker-5", 60) is None
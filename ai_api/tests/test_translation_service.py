@@ -0,0 +1,63 @@
+import asyncio
+import pytest
+from src.services.CacheService import CacheService, InMemoryCacheBackend
+from src.services.TranslationService import TranslationService
+
+
+class StubTranslateClient:
+    def __init__(self):
+        self.requests=[]
+
+    def translate(self, values, target_language=None):
+        self.requests.append(list(values))
+        return [{"translatedText": f"[{target_language}] {value}"} for value in values]
+
+
+async def arrive(delays):
+    for index, delay in enumerate(delays):
+        await asyncio.sleep(delay)
+        yield index, f"message {index}"
+
+
+def translate_stream(delays, window_seconds):
+    service=TranslationService("cy", cache=None)
+    service.client=StubTranslateClient()
+
+    async def collect():
+        return [item async for item in service.translate_stream_async(arrive(delays), window_seconds)]
+    return asyncio.run(collect()), service.client.requests
+
+
+def test_texts_arriving_together_share_a_request():
+    translations, requests=translate_stream([0, 0.01, 0.01, 0.3, 0.01], window_seconds=0.1)
+    assert translations==[(index, f"[cy] message {index}") for index in range(5)]
+    assert requests==[["message 0", "message 1", "message 2"], ["message 3", "message 4"]]
+
+
+def test_source_errors_are_raised():
+    async def fail():
+        yield 0, "message 0"
+        raise RuntimeError("model failed")
+    service=TranslationService("cy", cache=None)
+    service.client=StubTranslateClient()
+
+    async def collect():
+        return [item async for item in service.translate_stream_async(fail(), 0.05)]
+    with pytest.raises(RuntimeError, match="model failed"):
+        asyncio.run(collect())
+
+
+def test_batch_skips_duplicate_and_cached_segments_and_keeps_order_across_chunks():
+    cache=CacheService("test_translation", InMemoryCacheBackend(max_size=1000, ttl_seconds=60))
+    service=TranslationService("cy", cache=cache)
+    service.client=StubTranslateClient()
+    cache.set(cache.make_key("cached", "cy"), "wedi'i storio")
+    texts=[f"text {index}" for index in range(TranslationService.MAX_SEGMENTS_PER_REQUEST+10)]
+    texts=["cached"]+texts+["text 0", "text 5", "cached"]
+    translations=service.translate_batch(texts)
+    assert translations==["wedi'i storio" if text=="cached" else f"[cy] {text}" for text in texts]
+    sent=[text for request in service.client.requests for text in request]
+    assert sorted(sent)==sorted(f"text {index}" for index in range(TranslationService.MAX_SEGMENTS_PER_REQUEST+10))
+    assert [len(request) for request in service.client.requests]==[TranslationService.MAX_SEGMENTS_PER_REQUEST, 10]
+    # Everything is cached now
+    assert service.translate_batch(texts)==translations and len(service.client.requests)==2
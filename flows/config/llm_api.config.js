@@ -2,4 +2,9 @@ let api_base = process.env.API_BASE;
 if (process.env.NODE_ENV === "development") {
   api_base = "http://127.0.0.1:8000/";
 }
-module.exports = { api_base };
+// Time allowed for a streamed response to start, and the longest gap between its lines
+const llm_stream_timeout_ms = Number(process.env.LLM_STREAM_TIMEOUT_MS || 30000);
+const llm_stream_idle_timeout_ms = Number(
+  process.env.LLM_STREAM_IDLE_TIMEOUT_MS || 20000
+);
+module.exports = { api_base, llm_stream_timeout_ms, llm_stream_idle_timeout_ms };
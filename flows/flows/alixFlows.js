@@ -101,7 +101,7 @@ ${messageItem.messageText}
           AlixSignpostingFlow.FLOW_NAME
         );
         // send to llm here
-        let texts = options.map(
+        const texts = options.map(
           (option) =>
             `${option.name}\n${option.description_short}\nLocation:${
               option.location_scope === "local"
@@ -114,15 +114,7 @@ ${messageItem.messageText}
           category: category_2,
           language: "en", //default for now TO-DO add translation
         };
-        const response = await llmService.makeLLMRequest(
-          aiAPIRequest,
-          AlixSignpostingFlow.FLOW_NAME
-        );
-        const LLMProcessedMessages = response.data?.data;
-        if (LLMProcessedMessages && LLMProcessedMessages.length > 0) {
-          texts = LLMProcessedMessages;
-        }
-        for (const text of texts) {
+        const sendOptionMessage = async (text) => {
           const message = createTextMessage({
             waId: this.WaId,
             textContent: text,
@@ -133,6 +125,30 @@ ${messageItem.messageText}
             message,
             AlixSignpostingFlow.FLOW_NAME
           );
+        };
+        // each description is sent as soon as it is ready, rather than after the slowest one
+        const sentIndices = new Set();
+        // options the API ranked out are not sent; if it never said which it kept, every option falls back
+        let selectedIndices = [...texts.keys()];
+        try {
+          await llmService.streamLLMRequest(
+            aiAPIRequest,
+            AlixSignpostingFlow.FLOW_NAME,
+            async (index, text) => {
+              sentIndices.add(index);
+              await sendOptionMessage(text);
+            },
+            (indices) => {
+              selectedIndices = indices;
+            }
+          );
+        } catch (error) {
+          console.error("Error streaming signposting messages:", error.message);
+        }
+        for (const index of selectedIndices) {
+          if (!sentIndices.has(index)) {
+            await sendOptionMessage(texts[index]);
+          }
         }
         if (remainingCount > 0) {
           await this.saveAndSendTemplateMessage({
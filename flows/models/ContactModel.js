@@ -100,6 +100,17 @@ class ContactModel {
           },
         };
       }
+      // Keep an indexed list of the message SIDs behind profile entries so the AI API
+      // can find this contact when a voice note transcription comes back
+      const profileMessageSids = []
+        .concat(updateDoc[updateKey] ?? [])
+        .map((item) => item?.originalMessageSid)
+        .filter(Boolean);
+      if (profileMessageSids.length) {
+        updateOperation.$addToSet = {
+          profileMessageSids: { $each: profileMessageSids },
+        };
+      }
 
       await this.contactsCollection.findOneAndUpdate(
         { WaId: recipient, organizationId: contactOrganizationId },
@@ -1,4 +1,8 @@
 const axios = require("axios");
+const {
+  llm_stream_timeout_ms,
+  llm_stream_idle_timeout_ms,
+} = require("../config/llm_api.config");
 class LLMService {
   constructor(api_base) {
     this.api_base = api_base;
@@ -19,6 +23,62 @@ class LLMService {
     });
     return response;
   }
+  // Streams /llm/<path>/stream, calling onSelect(indices) with the options the API chose to describe (it may cap the
+  // list), then onMessage(index, text) for each option as soon as it is described.
+  // Resolves to true if the stream reported success, false if it ended with an error or was cut short. Throws if the
+  // response does not start within llm_stream_timeout_ms or stalls for llm_stream_idle_timeout_ms (time spent in
+  // onMessage does not count), so the caller can fall back.
+  async streamLLMRequest(requestBody, path, onMessage, onSelect = () => {}) {
+    const controller = new AbortController();
+    let stream;
+    let idleTimer;
+    const startIdleTimer = () => {
+      idleTimer = setTimeout(() => {
+        controller.abort();
+        stream?.destroy(new Error("LLM stream stalled"));
+      }, llm_stream_idle_timeout_ms);
+    };
+    try {
+      const response = await axios({
+        headers: {
+          "Content-Type": "application/json",
+        },
+        method: "post",
+        url: `${this.api_base}llm/${path || ""}/stream`,
+        data: requestBody,
+        responseType: "stream",
+        timeout: llm_stream_timeout_ms,
+        signal: controller.signal,
+      });
+      stream = response.data;
+      stream.setEncoding("utf8");
+      let buffered = "";
+      let succeeded = false;
+      startIdleTimer();
+      for await (const chunk of stream) {
+        clearTimeout(idleTimer);
+        const lines = (buffered + chunk).split("\n");
+        buffered = lines.pop();
+        for (const line of lines) {
+          if (!line.trim()) {
+            continue;
+          }
+          const event = JSON.parse(line);
+          if (event.indices) {
+            onSelect(event.indices);
+          } else if (event.done) {
+            succeeded = event.message === "success";
+          } else {
+            await onMessage(event.index, event.data);
+          }
+        }
+        startIdleTimer();
+      }
+      return succeeded;
+    } finally {
+      clearTimeout(idleTimer);
+    }
+  }
 }
 
 module.exports = {